@@ -0,0 +1,35 @@
+"""Full-text search index
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from prompt_manager.core.models import (
+    POSTGRES_SEARCH_DDL,
+    POSTGRES_SEARCH_DROP,
+    SQLITE_SEARCH_DDL,
+    SQLITE_SEARCH_DROP,
+)
+
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _run(statements: dict[str, list[str]]) -> None:
+    for statement in statements.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    _run({"sqlite": SQLITE_SEARCH_DDL, "postgresql": POSTGRES_SEARCH_DDL})
+
+
+def downgrade() -> None:
+    _run({"sqlite": SQLITE_SEARCH_DROP, "postgresql": POSTGRES_SEARCH_DROP})
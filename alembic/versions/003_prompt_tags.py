@@ -0,0 +1,45 @@
+"""Normalized prompt tags
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    prompt_tags = op.create_table(
+        "prompt_tags",
+        sa.Column(
+            "prompt_id",
+            sa.String(36),
+            sa.ForeignKey("prompts.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("tag", sa.String(255), primary_key=True),
+    )
+    op.create_index("ix_prompt_tags_tag_prompt_id", "prompt_tags", ["tag", "prompt_id"])
+
+    # Backfill from the JSON tags column
+    prompts = sa.table("prompts", sa.column("id", sa.String), sa.column("tags", sa.JSON))
+    rows = [
+        {"prompt_id": prompt_id, "tag": tag}
+        for prompt_id, tags in op.get_bind().execute(sa.select(prompts.c.id, prompts.c.tags))
+        for tag in dict.fromkeys(tags or [])
+    ]
+    if rows:
+        op.bulk_insert(prompt_tags, rows)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_prompt_tags_tag_prompt_id", table_name="prompt_tags")
+    op.drop_table("prompt_tags")
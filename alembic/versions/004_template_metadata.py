@@ -0,0 +1,51 @@
+"""Template metadata derived on write
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from prompt_manager.core.templates import TemplateEngine
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("prompts", sa.Column("content_hash", sa.String(64), nullable=True))
+    op.add_column(
+        "prompts",
+        sa.Column("template_variables", sa.JSON, nullable=False, server_default="[]"),
+    )
+    op.add_column("prompts", sa.Column("template_error", sa.Text, nullable=True))
+
+    # Backfill from existing content. Invalid legacy templates are kept but flagged.
+    prompts = sa.table(
+        "prompts",
+        sa.column("id", sa.String),
+        sa.column("content", sa.Text),
+        sa.column("content_hash", sa.String),
+        sa.column("template_variables", sa.JSON),
+        sa.column("template_error", sa.Text),
+    )
+    engine = TemplateEngine()
+    bind = op.get_bind()
+    for prompt_id, content in bind.execute(sa.select(prompts.c.id, prompts.c.content)).all():
+        info = engine.analyze(content)
+        bind.execute(
+            prompts.update().where(prompts.c.id == prompt_id).values(**info.columns())
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("prompts") as batch_op:
+        batch_op.drop_column("template_error")
+        batch_op.drop_column("template_variables")
+        batch_op.drop_column("content_hash")
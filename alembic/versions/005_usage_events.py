@@ -0,0 +1,38 @@
+"""Usage event log and rollups
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "prompt_usage_events",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("prompt_id", sa.String(36), nullable=False),
+        sa.Column("used_at", sa.DateTime, nullable=False),
+        sa.Column("count", sa.Integer, nullable=False, server_default="1"),
+    )
+    op.create_table(
+        "prompt_usage_rollups",
+        sa.Column("granularity", sa.String(8), primary_key=True),
+        sa.Column("bucket", sa.DateTime, primary_key=True),
+        sa.Column("prompt_id", sa.String(36), primary_key=True),
+        sa.Column("count", sa.Integer, nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("prompt_usage_rollups")
+    op.drop_table("prompt_usage_events")
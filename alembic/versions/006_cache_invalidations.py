@@ -0,0 +1,30 @@
+"""Cache invalidation messages for the polling bus
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cache_invalidations",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("origin", sa.String(32), nullable=False),
+        sa.Column("slug", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cache_invalidations")
@@ -0,0 +1,29 @@
+"""Library revision counter for ETags
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    library_revision = op.create_table(
+        "library_revision",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("revision", sa.Integer, nullable=False),
+    )
+    op.bulk_insert(library_revision, [{"id": 1, "revision": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("library_revision")
@@ -0,0 +1,94 @@
+"""Delta-compressed version history
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from prompt_manager.core.versions import encode_history, materialize
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+prompt_versions = sa.table(
+    "prompt_versions",
+    sa.column("id", sa.String),
+    sa.column("prompt_id", sa.String),
+    sa.column("version", sa.Integer),
+    sa.column("content", sa.Text),
+    sa.column("delta", sa.Text),
+)
+
+
+def _histories():
+    """Yield each prompt's id and version rows, oldest first, one prompt at a time."""
+    bind = op.get_bind()
+    prompt_ids = bind.execute(sa.select(prompt_versions.c.prompt_id).distinct()).scalars().all()
+    for prompt_id in prompt_ids:
+        rows = bind.execute(
+            sa.select(
+                prompt_versions.c.id,
+                prompt_versions.c.version,
+                prompt_versions.c.content,
+                prompt_versions.c.delta,
+            )
+            .where(prompt_versions.c.prompt_id == prompt_id)
+            .order_by(prompt_versions.c.version)
+        ).all()
+        yield prompt_id, rows
+
+
+def _store(rows: list[dict]) -> None:
+    if rows:
+        op.get_bind().execute(
+            prompt_versions.update()
+            .where(prompt_versions.c.id == sa.bindparam("row_id"))
+            .values(content=sa.bindparam("new_content"), delta=sa.bindparam("new_delta")),
+            rows,
+        )
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("prompt_versions") as batch_op:
+        batch_op.add_column(sa.Column("delta", sa.Text, nullable=True))
+        batch_op.alter_column("content", existing_type=sa.Text, nullable=True)
+    op.drop_index("ix_prompt_versions_prompt_id", table_name="prompt_versions")
+    op.create_index(
+        "ix_prompt_versions_prompt_id_version", "prompt_versions", ["prompt_id", "version"]
+    )
+
+    # Rewrite every version after a snapshot as a delta against the one before
+    for _, rows in _histories():
+        encoded = encode_history((row.version, row.content) for row in rows)
+        _store(
+            [
+                {"row_id": row.id, "new_content": content, "new_delta": delta}
+                for row, (content, delta) in zip(rows, encoded, strict=True)
+                if delta is not None
+            ]
+        )
+
+
+def downgrade() -> None:
+    for prompt_id, rows in _histories():
+        contents = materialize(prompt_id, rows)
+        _store(
+            [
+                {"row_id": row.id, "new_content": content, "new_delta": None}
+                for row, content in zip(rows, contents, strict=True)
+                if row.content is None
+            ]
+        )
+
+    op.drop_index("ix_prompt_versions_prompt_id_version", table_name="prompt_versions")
+    op.create_index("ix_prompt_versions_prompt_id", "prompt_versions", ["prompt_id"])
+    with op.batch_alter_table("prompt_versions") as batch_op:
+        batch_op.alter_column("content", existing_type=sa.Text, nullable=False)
+        batch_op.drop_column("delta")
@@ -0,0 +1,108 @@
+"""Benchmark GET /api/v1/prompts?page_size=100 against the response_model path.
+
+Seeds an in-memory SQLite database with 100 prompts of ~20 KB content and
+times the fast route (rows serialized with orjson) against an equivalent route
+that returns a validated ``PromptList`` through FastAPI's ``response_model``,
+then times the serialization step on its own.
+
+Usage: python scripts/bench_list.py [requests]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+import timeit
+from collections.abc import AsyncGenerator
+
+import orjson
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from prompt_manager.api.deps import AuthDep, ServiceDep
+from prompt_manager.api.main import app
+from prompt_manager.api.responses import prompt_list_to_dict
+from prompt_manager.core.database import get_session
+from prompt_manager.core.models import Base
+from prompt_manager.core.repository import PromptRepository
+from prompt_manager.core.schemas import PromptCreate, PromptList, PromptRead
+from prompt_manager.core.service import PromptService
+
+CONTENT = "Review the following code and explain each issue you find. " * 350
+
+
+async def main(requests: int) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_maker() as session:
+        repo = PromptRepository(session)
+        for i in range(100):
+            await repo.create(
+                PromptCreate(
+                    slug=f"prompt-{i}",
+                    title=f"Prompt {i}",
+                    content=CONTENT,
+                    tags=["bench", f"t{i % 10}"],
+                )
+            )
+
+    async def override_get_session() -> AsyncGenerator[AsyncSession, None]:
+        async with session_maker() as session:
+            yield session
+
+    baseline = FastAPI()
+
+    # Same work as the real route (auth, ETag lookup), minus the fast path
+    @baseline.get("/api/v1/prompts", response_model=PromptList)
+    async def list_prompts(service: ServiceDep, _auth: AuthDep) -> PromptList:
+        await service.library_etag()
+        return await service.list_prompts(page_size=100)
+
+    for target in (app, baseline):
+        target.dependency_overrides[get_session] = override_get_session
+
+    params = {"page_size": 100}
+    for name, target in (("response_model", baseline), ("fast path", app)):
+        async with AsyncClient(transport=ASGITransport(app=target), base_url="http://b") as client:
+            for _ in range(10):  # warm up
+                (await client.get("/api/v1/prompts", params=params)).raise_for_status()
+            start = time.perf_counter()
+            for _ in range(requests):
+                await client.get("/api/v1/prompts", params=params)
+            elapsed = time.perf_counter() - start
+        print(f"{name:>15}: {elapsed / requests * 1000:.2f} ms/request")
+
+    # Serialization alone, on the same loaded rows
+    async with session_maker() as session:
+        service = PromptService(session)
+        page = await service.page_prompts(page_size=100)
+        adapter = TypeAdapter(PromptList)
+        timings = {
+            "response_model": lambda: adapter.dump_json(
+                adapter.validate_python(
+                    PromptList(
+                        items=[PromptRead.model_validate(p) for p in page.items],
+                        total=page.total,
+                        page=page.page,
+                        page_size=page.page_size,
+                        pages=page.pages,
+                    )
+                )
+            ),
+            "fast path": lambda: orjson.dumps(prompt_list_to_dict(page)),
+        }
+        for name, serialize in timings.items():
+            elapsed = timeit.timeit(serialize, number=requests)
+            print(f"{name:>15}: {elapsed / requests * 1000:.2f} ms serializing")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,30 @@
+"""HTTP conditional request helpers."""
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(",")
+    )
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Response | None:
+    """Tag ``response`` with ``etag``; return a 304 if the client's copy is current."""
+    response.headers["ETag"] = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+def body_etag(body: bytes | memoryview) -> str:
+    """Weak ETag derived from an encoded response body."""
+    return f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
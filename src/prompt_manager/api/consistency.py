@@ -0,0 +1,63 @@
+"""Read-your-writes routing between the primary database and read replicas."""
+
+import math
+import time
+
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from prompt_manager.core.service import wrote_recently
+
+# Holds the time until which the client's reads go to the primary
+PRIMARY_COOKIE = "pm_read_primary"
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def reads_from_primary(request: Request) -> bool:
+    """Whether the client wrote recently enough that replicas may not have caught up.
+
+    Clients that keep cookies are tracked by :data:`PRIMARY_COOKIE`. Clients
+    without one, such as scripts and the ``pm`` CLI, cannot be told apart
+    (they share the API key), so they read from the primary while any prompt
+    was written within the window.
+    """
+    cookie = request.cookies.get(PRIMARY_COOKIE)
+    if cookie is None:
+        return wrote_recently()
+    try:
+        return float(cookie) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """Pins a client's reads to the primary for ``window`` seconds after it writes.
+
+    Successful responses to unsafe methods set a cookie that
+    :func:`reads_from_primary` checks, so stickiness holds whichever worker
+    serves the next request. Clients that drop the cookie fall back to
+    following every recent write.
+    """
+
+    def __init__(self, app: ASGIApp, window: float):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{PRIMARY_COOKIE}={time.time() + self.window:.3f}; "
+                    f"Max-Age={math.ceil(self.window)}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
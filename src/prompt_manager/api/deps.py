@@ -3,19 +3,29 @@
 from collections.abc import AsyncGenerator
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from prompt_manager.api.auth import verify_api_key
-from prompt_manager.core.database import get_session
+from prompt_manager.api.consistency import reads_from_primary
+from prompt_manager.core.database import get_read_session, get_session, replica_engines
 from prompt_manager.core.service import PromptService
 
 
 async def get_prompt_service(
+    request: Request,
     session: AsyncSession = Depends(get_session),
+    read_session: AsyncSession = Depends(get_read_session),
 ) -> AsyncGenerator[PromptService, None]:
-    """Get prompt service instance."""
-    yield PromptService(session)
+    """Get prompt service instance.
+
+    Sessions only connect when first used, so requests that never read or
+    never write do not hold the other connection. Clients that wrote within
+    the read-your-writes window read from the primary instead of a replica.
+    """
+    if replica_engines and reads_from_primary(request):
+        read_session = session
+    yield PromptService(session, read_session)
 
 
 # Type aliases for cleaner route signatures
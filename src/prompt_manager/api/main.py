@@ -8,11 +8,31 @@ from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
-
-from prompt_manager.api.routes import prompts_router, search_router, stats_router
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from prompt_manager.api.consistency import ReadYourWritesMiddleware
+from prompt_manager.api.routes import (
+    backup_router,
+    prompts_router,
+    render_router,
+    search_router,
+    stats_router,
+)
 from prompt_manager.core.config import settings
-from prompt_manager.core.database import async_session_maker, close_db, init_db
+from prompt_manager.core.database import (
+    async_session_maker,
+    close_db,
+    engine,
+    init_db,
+    read_engine,
+    replica_engines,
+)
+from prompt_manager.core.executor import render_executor
+from prompt_manager.core.invalidation import invalidation_bus
 from prompt_manager.core.templates import TemplateRenderError
+from prompt_manager.core.usage import usage_aggregator
+from prompt_manager.core.writer import write_queue
 
 # Configure logging
 logging.basicConfig(
@@ -31,9 +51,16 @@ async def lifespan(app: FastAPI):
     logger.info(f"Listening on {settings.host}:{settings.port}")
     await init_db()
     logger.info("Database initialized")
+    await invalidation_bus.start(engine, read_engine)
+    usage_aggregator.start(async_session_maker)
+    write_queue.start(async_session_maker)
     yield
     # Shutdown
     logger.info("Shutting down...")
+    await write_queue.stop()
+    await usage_aggregator.stop()
+    await invalidation_bus.stop()
+    render_executor.shutdown()
     await close_db()
 
 
@@ -55,6 +82,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if replica_engines:
+    app.add_middleware(ReadYourWritesMiddleware, window=settings.read_your_writes_window)
+
 
 # Exception handlers
 @app.exception_handler(TemplateRenderError)
@@ -68,6 +98,30 @@ async def template_error_handler(
     )
 
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError) -> JSONResponse:
+    """Tell clients to retry when no database connection became free in time."""
+    logger.warning(f"Database pool exhausted: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(DBAPIError)
+async def database_error_handler(request: Request, exc: DBAPIError) -> JSONResponse:
+    """Report statements cancelled by ``PM_DB_STATEMENT_TIMEOUT_MS`` as timeouts."""
+    # 57014 is PostgreSQL's query_canceled, raised when statement_timeout expires
+    if getattr(exc.orig, "sqlstate", None) == "57014":
+        logger.warning(f"Statement timed out on {request.url.path}")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Database query took too long"},
+        )
+    raise exc
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(
     request: Request, exc: Exception
@@ -81,8 +135,10 @@ async def general_exception_handler(
 
 # Include routers
 app.include_router(prompts_router, prefix="/api/v1")
+app.include_router(render_router, prefix="/api/v1")
 app.include_router(search_router, prefix="/api/v1")
 app.include_router(stats_router, prefix="/api/v1")
+app.include_router(backup_router, prefix="/api/v1")
 
 
 @app.get("/health")
@@ -0,0 +1,76 @@
+"""Fast JSON serialization for hot endpoints."""
+
+from typing import Any
+
+import orjson
+from fastapi import Response
+
+from prompt_manager.core.models import Prompt, PromptVersion
+from prompt_manager.core.schemas import PromptRead
+from prompt_manager.core.service import PromptListPage
+
+PROMPT_FIELDS = tuple(PromptRead.model_fields)
+
+
+def select_fields(fields: str | None, exclude: str | None) -> tuple[str, ...] | None:
+    """Resolve comma-separated ``fields``/``exclude`` parameters to a field list.
+
+    Returns None when every field is wanted. ``slug`` is always included.
+    Raises ValueError for names that are not ``PromptRead`` fields.
+    """
+    if not fields and not exclude:
+        return None
+    wanted = _split(fields) if fields else list(PROMPT_FIELDS)
+    excluded = set(_split(exclude)) if exclude else set()
+    unknown = [name for name in [*wanted, *excluded] if name not in PROMPT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["slug", *(name for name in wanted if name not in excluded)]))
+
+
+def _split(names: str) -> list[str]:
+    return [name.strip() for name in names.split(",") if name.strip()]
+
+
+def prompt_to_dict(prompt: Prompt, fields: tuple[str, ...] = PROMPT_FIELDS) -> dict[str, Any]:
+    """The ``PromptRead`` fields of an ORM row, without pydantic validation.
+
+    Column values are already the right types, and orjson encodes datetimes the
+    same way pydantic does, so the output matches ``PromptRead`` serialization.
+    """
+    return {name: getattr(prompt, name) for name in fields}
+
+
+def prompt_list_to_dict(
+    result: PromptListPage, fields: tuple[str, ...] = PROMPT_FIELDS
+) -> dict[str, Any]:
+    """A :class:`PromptListPage` in the shape of ``PromptList``."""
+    return {
+        "items": [prompt_to_dict(prompt, fields) for prompt in result.items],
+        "total": result.total,
+        "page": result.page,
+        "page_size": result.page_size,
+        "pages": result.pages,
+        "next_cursor": result.next_cursor,
+    }
+
+
+def export_line(prompt: Prompt, versions: list[PromptVersion] | None = None) -> bytes:
+    """One NDJSON line of an export: the prompt's fields and optionally its history."""
+    record = prompt_to_dict(prompt)
+    if versions is not None:
+        record["versions"] = [
+            {
+                "version": version.version,
+                "content": version.content,
+                "changed_at": version.changed_at,
+                "change_note": version.change_note,
+            }
+            for version in versions
+        ]
+    return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def json_response(content: Any, headers: dict[str, str] | None = None) -> Response:
+    """Encode ``content`` with orjson, bypassing ``response_model`` validation."""
+    return Response(orjson.dumps(content), media_type="application/json", headers=headers)
@@ -0,0 +1,72 @@
+"""Bulk export and import endpoints."""
+
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+
+from prompt_manager.api.deps import AuthDep, ServiceDep
+from prompt_manager.api.responses import export_line
+from prompt_manager.core.schemas import ImportResult
+from prompt_manager.core.service import PromptService
+
+router = APIRouter(tags=["backup"])
+
+EXPORT_MEDIA_TYPE = "application/x-ndjson"
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_prompts(
+    service: ServiceDep,
+    _auth: AuthDep,
+    versions: bool = Query(False, description="Include each prompt's version history"),
+) -> StreamingResponse:
+    """Stream every prompt as newline-delimited JSON, one prompt per line.
+
+    Prompts are read from a server-side cursor and written as they arrive, so
+    the export takes constant memory however large the library is.
+    """
+    return StreamingResponse(
+        _export_lines(service, versions),
+        media_type=EXPORT_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="prompts.ndjson"'},
+    )
+
+
+async def _export_lines(service: PromptService, versions: bool) -> AsyncIterator[bytes]:
+    async for prompt, history in service.export_prompts(include_versions=versions):
+        yield export_line(prompt, history)
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_prompts(
+    request: Request,
+    service: ServiceDep,
+    _auth: AuthDep,
+    on_conflict: Literal["rename", "skip"] = Query(
+        "rename", description="Suffix colliding slugs with -1, -2, ... or skip those prompts"
+    ),
+    batch_size: int | None = Query(
+        None, ge=1, le=10_000, description="Prompts per INSERT (default PM_IMPORT_BATCH_SIZE)"
+    ),
+) -> ImportResult:
+    """Create prompts from an NDJSON body, one prompt per line.
+
+    Accepts the output of ``GET /export``. The body is read as it streams in
+    inserted in batches, each committed on its own; lines that fail validation
+    are reported in ``results`` and do not stop the import.
+    """
+    return await service.import_prompts(_body_lines(request), on_conflict, batch_size)
+
+
+async def _body_lines(request: Request) -> AsyncIterator[bytes]:
+    """Split the streamed request body into lines."""
+    pending = b""
+    async for chunk in request.stream():
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
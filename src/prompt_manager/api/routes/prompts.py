@@ -2,14 +2,16 @@
 
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
+from prompt_manager.api.caching import check_etag
 from prompt_manager.api.deps import AuthDep, ServiceDep
 from prompt_manager.core.schemas import (
     PromptCreate,
     PromptRead,
     PromptUpdate,
     PromptVersionRead,
+    PromptVersionSummary,
     RenderResponse,
 )
 
@@ -30,18 +32,24 @@ async def create_prompt(
 @router.get("/{slug}", response_model=PromptRead)
 async def get_prompt(
     slug: str,
+    request: Request,
+    response: Response,
     service: ServiceDep,
     _auth: AuthDep,
     increment_usage: bool = Query(True, description="Whether to increment usage count"),
-) -> PromptRead:
-    """Get a prompt by slug."""
-    prompt = await service.get_prompt(slug, increment_usage=increment_usage)
+) -> PromptRead | Response:
+    """Get a prompt by slug.
+
+    Returns 304 when ``If-None-Match`` matches the prompt's ETag; the use is
+    still counted.
+    """
+    prompt = await service.get_prompt_read(slug, increment_usage=increment_usage)
     if not prompt:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Prompt '{slug}' not found",
         )
-    return PromptRead.model_validate(prompt)
+    return check_etag(request, response, service.prompt_etag(prompt)) or prompt
 
 
 @router.put("/{slug}", response_model=PromptRead)
@@ -91,13 +99,6 @@ async def render_prompt(
     if variables is None:
         variables = {}
 
-    prompt = await service.get_prompt(slug, increment_usage=False)
-    if not prompt:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Prompt '{slug}' not found",
-        )
-
     result = await service.render_prompt(slug, variables)
     if result is None:
         raise HTTPException(
@@ -105,23 +106,28 @@ async def render_prompt(
             detail=f"Prompt '{slug}' not found",
         )
 
-    rendered, used_vars = result
+    prompt, rendered = result
     return RenderResponse(
         content=rendered,
         slug=slug,
         is_template=prompt.is_template,
-        variables_used=used_vars,
+        variables_used=variables,
     )
 
 
-@router.get("/{slug}/versions", response_model=list[PromptVersionRead])
+@router.get(
+    "/{slug}/versions", response_model=list[PromptVersionRead] | list[PromptVersionSummary]
+)
 async def list_versions(
     slug: str,
     service: ServiceDep,
     _auth: AuthDep,
-) -> list[PromptVersionRead]:
+    content: bool = Query(True, description="Include each version's content"),
+) -> list[PromptVersionRead] | list[PromptVersionSummary]:
     """Get version history for a prompt."""
-    versions = await service.get_versions(slug)
+    versions = await service.get_versions(slug, with_content=content)
+    if not content:
+        return [PromptVersionSummary.model_validate(v) for v in versions]
     return [PromptVersionRead.model_validate(v) for v in versions]
 
 
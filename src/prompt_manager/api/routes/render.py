@@ -0,0 +1,36 @@
+"""Batch template rendering endpoints."""
+
+from fastapi import APIRouter, HTTPException, status
+
+from prompt_manager.api.deps import AuthDep, ServiceDep
+from prompt_manager.core.config import settings
+from prompt_manager.core.schemas import BatchRenderRequest, BatchRenderResponse
+
+router = APIRouter(prefix="/render", tags=["render"])
+
+
+@router.post("/batch", response_model=BatchRenderResponse)
+async def render_batch(
+    data: BatchRenderRequest,
+    service: ServiceDep,
+    _auth: AuthDep,
+) -> BatchRenderResponse:
+    """Render many prompts or variable sets in one request.
+
+    Results are returned in job order; a failing job reports its error without
+    affecting the others.
+    """
+    jobs = data.expand()
+    if len(jobs) > settings.render_batch_max_jobs:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {settings.render_batch_max_jobs} jobs",
+        )
+
+    results = await service.render_batch(jobs)
+    failed = sum(1 for result in results if result.error is not None)
+    return BatchRenderResponse(
+        results=results,
+        rendered=len(results) - failed,
+        failed=failed,
+    )
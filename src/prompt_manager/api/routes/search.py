@@ -2,16 +2,36 @@
 
 from typing import Literal
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
+from prompt_manager.api.caching import body_etag, check_etag
 from prompt_manager.api.deps import AuthDep, ServiceDep
+from prompt_manager.api.responses import (
+    PROMPT_FIELDS,
+    json_response,
+    prompt_list_to_dict,
+    select_fields,
+)
+from prompt_manager.core.pagination import InvalidCursorError
 from prompt_manager.core.schemas import PromptList, PromptRead
 
 router = APIRouter(tags=["search"])
 
+TOTAL_MODES: dict[str, Literal["exact", "estimated", "none"]] = {
+    "true": "exact",
+    "false": "none",
+    "estimated": "estimated",
+}
+
+# Recording usage changes these without moving the library revision
+USAGE_FIELDS = frozenset({"usage_count", "last_used_at", "updated_at"})
+USAGE_SORTS = frozenset({"popular", "recent", "updated"})
+
 
 @router.get("/prompts", response_model=PromptList)
 async def list_prompts(
+    request: Request,
+    response: Response,
     service: ServiceDep,
     _auth: AuthDep,
     page: int = Query(1, ge=1, description="Page number"),
@@ -19,21 +39,71 @@ async def list_prompts(
     category: str | None = Query(None, description="Filter by category"),
     tags: str | None = Query(None, description="Filter by tags (comma-separated)"),
     q: str | None = Query(None, description="Full-text search query"),
-    sort: Literal["recent", "popular", "updated", "created"] = Query(
-        "created", description="Sort order"
+    sort: Literal["recent", "popular", "updated", "created", "relevance"] = Query(
+        "created", description="Sort order ('relevance' ranks search matches)"
+    ),
+    cursor: str | None = Query(
+        None, description="Continue after this cursor (from next_cursor); overrides page"
     ),
-) -> PromptList:
-    """List prompts with filtering and pagination."""
+    include_total: Literal["true", "false", "estimated"] = Query(
+        "true", description="Count matches exactly, skip counting, or use a cached estimate"
+    ),
+    fields: str | None = Query(
+        None, description="Only return these item fields (comma-separated); slug is always kept"
+    ),
+    exclude: str | None = Query(None, description="Omit these item fields (comma-separated)"),
+) -> PromptList | Response:
+    """List prompts with filtering and pagination.
+
+    Pages can be addressed by number or, for stable and constant-cost deep
+    paging, by passing the previous response's ``next_cursor`` as ``cursor``.
+    Returns 304 when the client's ``If-None-Match`` is still current: pages
+    that show or sort by usage are compared by content, since usage does not
+    move the library revision, and other pages by revision before querying.
+    With ``fields``/``exclude``, omitted columns are not even read from the database.
+    """
+    try:
+        selected = select_fields(fields, exclude)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+    follows_usage = sort in USAGE_SORTS or not USAGE_FIELDS.isdisjoint(selected or PROMPT_FIELDS)
+    etag = None
+    if not follows_usage:
+        etag = await service.library_etag()
+        not_modified = check_etag(request, response, etag)
+        if not_modified:
+            return not_modified
+
     tag_list = tags.split(",") if tags else None
 
-    return await service.list_prompts(
-        page=page,
-        page_size=page_size,
-        category=category,
-        tags=tag_list,
-        search=q,
-        sort=sort,
-    )
+    try:
+        result = await service.page_prompts(
+            page=page,
+            page_size=page_size,
+            category=category,
+            tags=tag_list,
+            search=q,
+            sort=sort,
+            cursor=cursor,
+            total_mode=TOTAL_MODES[include_total],
+            fields=selected,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+
+    # Serialized straight from the rows; response_model only documents the shape
+    listing = json_response(prompt_list_to_dict(result, selected or PROMPT_FIELDS))
+    if etag is None:
+        etag = body_etag(listing.body)
+        not_modified = check_etag(request, response, etag)
+        if not_modified:
+            return not_modified
+    listing.headers["ETag"] = etag
+    return listing
 
 
 @router.get("/random", response_model=PromptRead)
@@ -43,8 +113,6 @@ async def get_random_prompt(
     category: str | None = Query(None, description="Filter by category"),
 ) -> PromptRead:
     """Get a random prompt, optionally filtered by category."""
-    from fastapi import HTTPException, status
-
     prompt = await service.get_random(category)
     if not prompt:
         raise HTTPException(
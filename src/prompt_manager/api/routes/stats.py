@@ -1,38 +1,96 @@
 """Statistics and metadata endpoints."""
 
-from fastapi import APIRouter
+from typing import Any, Literal
 
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+
+from prompt_manager.api.caching import check_etag
 from prompt_manager.api.deps import AuthDep, ServiceDep
-from prompt_manager.core.schemas import CategoryCount, Stats, TagCount
+from prompt_manager.core.database import pool_stats
+from prompt_manager.core.schemas import CategoryCount, Stats, TagCount, UsageSeries
+from prompt_manager.core.service import prompt_cache
+from prompt_manager.core.templates import template_cache
+from prompt_manager.core.versions import version_cache
 
 router = APIRouter(tags=["stats"])
 
 
 @router.get("/stats", response_model=Stats)
 async def get_stats(
+    request: Request,
+    response: Response,
+    service: ServiceDep,
+    _auth: AuthDep,
+) -> Stats | Response:
+    """Get usage statistics.
+
+    Usage does not move the library revision, so the ETag is derived from the
+    statistics themselves.
+    """
+    stats = await service.get_stats()
+    not_modified = check_etag(request, response, service.stats_etag(stats))
+    if not_modified:
+        return not_modified
+    return stats
+
+
+@router.get("/stats/usage", response_model=UsageSeries)
+async def get_usage_series(
     service: ServiceDep,
     _auth: AuthDep,
-) -> Stats:
-    """Get usage statistics."""
-    return await service.get_stats()
+    granularity: Literal["hour", "day"] = Query("day", description="Bucket size"),
+    periods: int = Query(30, ge=1, le=2000, description="Number of buckets, ending now"),
+    slug: str | None = Query(None, description="Only count uses of this prompt"),
+) -> UsageSeries:
+    """Get usage per hour or day from the usage rollups."""
+    series = await service.get_usage_series(granularity, periods, slug)
+    if series is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Prompt '{slug}' not found",
+        )
+    return series
+
+
+@router.get("/metrics")
+async def get_metrics(_auth: AuthDep) -> dict[str, Any]:
+    """Get in-process cache counters and database pool occupancy of this worker."""
+    return {
+        "caches": {
+            "prompts": prompt_cache.stats(),
+            "templates": template_cache.stats(),
+            "versions": version_cache.stats(),
+        },
+        "pools": pool_stats(),
+    }
 
 
 @router.get("/categories", response_model=list[CategoryCount])
 async def list_categories(
+    request: Request,
+    response: Response,
     service: ServiceDep,
     _auth: AuthDep,
-) -> list[CategoryCount]:
+) -> list[CategoryCount] | Response:
     """List all categories with prompt counts."""
+    not_modified = check_etag(request, response, await service.library_etag())
+    if not_modified:
+        return not_modified
     categories = await service.get_categories()
     return [CategoryCount(category=cat, count=count) for cat, count in categories]
 
 
 @router.get("/tags", response_model=list[TagCount])
 async def list_tags(
+    request: Request,
+    response: Response,
     service: ServiceDep,
     _auth: AuthDep,
-) -> list[TagCount]:
+) -> list[TagCount] | Response:
     """List all tags with counts."""
+    not_modified = check_etag(request, response, await service.library_etag())
+    if not_modified:
+        return not_modified
     tags = await service.get_tags()
     return sorted(
         [TagCount(tag=tag, count=count) for tag, count in tags.items()],
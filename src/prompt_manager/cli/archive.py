@@ -0,0 +1,43 @@
+"""Compressed files for library exports and imports."""
+
+import gzip
+from pathlib import Path
+from typing import BinaryIO, Literal, cast
+
+Compression = Literal["auto", "none", "gzip", "zstd"]
+
+SUFFIXES = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+
+
+def detect_compression(path: Path, compression: Compression = "auto") -> str:
+    """Resolve ``auto`` from the file extension (``.gz`` or ``.zst``)."""
+    if compression != "auto":
+        return compression
+    return SUFFIXES.get(path.suffix.lower(), "none")
+
+
+def open_archive(
+    path: Path,
+    mode: Literal["rb", "wb"],
+    compression: Compression = "auto",
+    fileobj: BinaryIO | None = None,
+) -> BinaryIO:
+    """Open ``path`` for binary reading or writing, compressing as requested.
+
+    Pass an already open ``fileobj`` to wrap it instead; ``path`` then only
+    determines the ``auto`` compression. zstd needs the optional ``zstandard``
+    package (``pip install prompt-manager[zstd]``).
+    """
+    kind = detect_compression(path, compression)
+    target: Path | BinaryIO = path if fileobj is None else fileobj
+    if kind == "gzip":
+        return gzip.open(target, mode)  # type: ignore[return-value]
+    if kind == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise RuntimeError(
+                "zstd compression requires the zstandard package (pip install zstandard)"
+            ) from e
+        return cast(BinaryIO, zstandard.open(target, mode))
+    return open(path, mode) if fileobj is None else fileobj
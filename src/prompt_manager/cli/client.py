@@ -1,12 +1,56 @@
 """HTTP client for API communication."""
 
-from typing import Any
+import hashlib
+import json
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, Literal, cast
 
 import httpx
 
 from prompt_manager.core.config import settings
 
 
+class ResponseCache:
+    """Small on-disk cache of GET responses keyed by URL and revalidated by ETag.
+
+    Entries are one JSON file each; the least recently written are removed once
+    there are more than ``max_entries``.
+    """
+
+    def __init__(self, directory: Path, max_entries: int = 256):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def get(self, url: str) -> tuple[str, Any] | None:
+        """Return the cached ``(etag, body)`` for ``url``, if any."""
+        try:
+            entry = json.loads(self._path(url).read_text())
+        except (OSError, ValueError):
+            return None
+        return entry["etag"], entry["body"]
+
+    def set(self, url: str, etag: str, body: Any) -> None:
+        """Store a response body under ``url``."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._path(url).write_text(json.dumps({"etag": etag, "body": body}))
+            self._prune()
+        except OSError:
+            pass  # Caching is best effort
+
+    def _prune(self) -> None:
+        entries = list(self.directory.glob("*.json"))
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda path: path.stat().st_mtime)
+        for path in entries[: len(entries) - self.max_entries]:
+            path.unlink(missing_ok=True)
+
+
 class APIClient:
     """HTTP client for communicating with the Prompt Manager API."""
 
@@ -14,10 +58,15 @@ class APIClient:
         self,
         base_url: str | None = None,
         api_key: str | None = None,
+        cache: ResponseCache | Literal[False] | None = None,
     ):
         self.base_url = (base_url or settings.api_url).rstrip("/")
         self.api_key = api_key or settings.api_key
         self._client: httpx.Client | None = None
+        # None uses the default disk cache unless PM_CLIENT_CACHE is off; False disables it
+        if cache is None and settings.client_cache:
+            cache = ResponseCache(settings.config_dir / "http-cache")
+        self.cache = cache or None
 
     @property
     def client(self) -> httpx.Client:
@@ -58,6 +107,27 @@ class APIClient:
             return {}
         return response.json()
 
+    def _get(self, path: str, params: dict[str, Any] | None = None) -> Any:
+        """GET ``path``, revalidating a cached copy with ``If-None-Match``."""
+        if self.cache is None:
+            return self._handle_response(self.client.get(path, params=params))
+
+        request = self.client.build_request("GET", path, params=params)
+        key = f"{self.api_key}@{request.url}"
+        cached = self.cache.get(key)
+        if cached:
+            request.headers["If-None-Match"] = cached[0]
+
+        response = self.client.send(request)
+        if response.status_code == 304 and cached:
+            return cached[1]
+
+        body = self._handle_response(response)
+        etag = response.headers.get("ETag")
+        if etag:
+            self.cache.set(key, etag, body)
+        return body
+
     # Prompt CRUD
     def create_prompt(self, data: dict[str, Any]) -> dict[str, Any]:
         """Create a new prompt."""
@@ -69,8 +139,7 @@ class APIClient:
     ) -> dict[str, Any]:
         """Get a prompt by slug."""
         params = {"increment_usage": str(increment_usage).lower()}
-        response = self.client.get(f"/api/v1/prompts/{slug}", params=params)
-        return self._handle_response(response)
+        return cast(dict[str, Any], self._get(f"/api/v1/prompts/{slug}", params=params))
 
     def update_prompt(self, slug: str, data: dict[str, Any]) -> dict[str, Any]:
         """Update a prompt."""
@@ -93,6 +162,24 @@ class APIClient:
         )
         return self._handle_response(response)
 
+    def render_batch(
+        self,
+        jobs: list[dict[str, Any]] | None = None,
+        slug: str | None = None,
+        variable_sets: list[dict[str, Any]] | None = None,
+    ) -> dict[str, Any]:
+        """Render many prompts in one request.
+
+        Pass ``jobs`` as ``{"slug": ..., "variables": {...}}`` dicts, and/or one
+        ``slug`` with a list of ``variable_sets``.
+        """
+        data: dict[str, Any] = {"jobs": jobs or []}
+        if slug:
+            data["slug"] = slug
+            data["variable_sets"] = variable_sets or []
+        response = self.client.post("/api/v1/render/batch", json=data)
+        return self._handle_response(response)
+
     # Search
     def list_prompts(
         self,
@@ -102,22 +189,61 @@ class APIClient:
         tags: list[str] | None = None,
         search: str | None = None,
         sort: str = "created",
+        cursor: str | None = None,
+        include_total: bool | Literal["estimated"] = True,
+        fields: list[str] | None = None,
     ) -> dict[str, Any]:
-        """List prompts with filtering."""
+        """List prompts with filtering.
+
+        Use ``sort="relevance"`` with ``search`` to get the best matches first.
+        Pass the previous result's ``next_cursor`` as ``cursor`` to continue a listing.
+        Set ``include_total`` to False (or "estimated") when ``total`` is not needed.
+        Pass ``fields`` to receive only those item fields (and ``slug``).
+        """
         params: dict[str, Any] = {
             "page": page,
             "page_size": page_size,
             "sort": sort,
         }
+        if include_total is not True:
+            params["include_total"] = include_total or "false"
+        if cursor:
+            params["cursor"] = cursor
         if category:
             params["category"] = category
         if tags:
             params["tags"] = ",".join(tags)
         if search:
             params["q"] = search
+        if fields:
+            params["fields"] = ",".join(fields)
 
-        response = self.client.get("/api/v1/prompts", params=params)
-        return self._handle_response(response)
+        return cast(dict[str, Any], self._get("/api/v1/prompts", params=params))
+
+    def iter_prompts(
+        self,
+        page_size: int = 100,
+        category: str | None = None,
+        tags: list[str] | None = None,
+        search: str | None = None,
+        sort: str = "created",
+    ) -> Iterator[dict[str, Any]]:
+        """Iterate over every matching prompt, following cursors page by page."""
+        cursor = None
+        while True:
+            result = self.list_prompts(
+                page_size=page_size,
+                category=category,
+                tags=tags,
+                search=search,
+                sort=sort,
+                cursor=cursor,
+                include_total=False,
+            )
+            yield from result["items"]
+            cursor = result.get("next_cursor")
+            if not cursor:
+                break
 
     def get_random(self, category: str | None = None) -> dict[str, Any]:
         """Get a random prompt."""
@@ -128,9 +254,11 @@ class APIClient:
         return self._handle_response(response)
 
     # Versions
-    def list_versions(self, slug: str) -> list[dict[str, Any]]:
+    def list_versions(self, slug: str, content: bool = True) -> list[dict[str, Any]]:
         """Get version history for a prompt."""
-        response = self.client.get(f"/api/v1/prompts/{slug}/versions")
+        response = self.client.get(
+            f"/api/v1/prompts/{slug}/versions", params={"content": str(content).lower()}
+        )
         return self._handle_response(response)
 
     def get_version(self, slug: str, version: int) -> dict[str, Any]:
@@ -148,17 +276,49 @@ class APIClient:
     # Stats
     def get_stats(self) -> dict[str, Any]:
         """Get usage statistics."""
-        response = self.client.get("/api/v1/stats")
-        return self._handle_response(response)
+        return cast(dict[str, Any], self._get("/api/v1/stats"))
 
     def get_categories(self) -> list[dict[str, Any]]:
         """Get all categories."""
-        response = self.client.get("/api/v1/categories")
-        return self._handle_response(response)
+        return cast(list[dict[str, Any]], self._get("/api/v1/categories"))
 
     def get_tags(self) -> list[dict[str, Any]]:
         """Get all tags."""
-        response = self.client.get("/api/v1/tags")
+        return cast(list[dict[str, Any]], self._get("/api/v1/tags"))
+
+    # Backup
+    def export_prompts(self, versions: bool = False) -> Iterator[bytes]:
+        """Stream the NDJSON export of every prompt as raw chunks.
+
+        The export is never buffered whole, so its size does not affect memory.
+        """
+        params = {"versions": str(versions).lower()}
+        with self.client.stream("GET", "/api/v1/export", params=params, timeout=None) as response:
+            if response.is_error:
+                response.read()
+                self._handle_response(response)
+            yield from response.iter_bytes()
+
+    def import_prompts(
+        self,
+        body: Iterable[bytes],
+        on_conflict: Literal["rename", "skip"] = "rename",
+        batch_size: int | None = None,
+    ) -> dict[str, Any]:
+        """Upload NDJSON prompts, streaming ``body`` chunk by chunk.
+
+        Returns the per-line results with ``created``/``skipped``/``failed`` totals.
+        """
+        params: dict[str, Any] = {"on_conflict": on_conflict}
+        if batch_size:
+            params["batch_size"] = batch_size
+        response = self.client.post(
+            "/api/v1/import",
+            content=body,
+            params=params,
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=None,
+        )
         return self._handle_response(response)
 
 
@@ -0,0 +1,138 @@
+"""Library export and import commands."""
+
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Annotated, Literal
+
+import typer
+from rich.markup import escape
+from rich.progress import BarColumn, DownloadColumn, Progress, TextColumn, TransferSpeedColumn
+
+from prompt_manager.cli.archive import Compression, open_archive
+from prompt_manager.cli.client import APIClient, APIError
+from prompt_manager.cli.output import (
+    console,
+    err_console,
+    format_json,
+    print_error,
+    print_success,
+    print_warning,
+)
+
+app = typer.Typer(help="Backup commands")
+
+IMPORT_CHUNK_SIZE = 64 * 1024
+IMPORT_ERRORS_SHOWN = 20
+
+
+@app.command("export")
+def export_prompts(
+    output: Annotated[Path, typer.Argument(help="File to write, or - for stdout")] = Path("-"),
+    versions: Annotated[
+        bool, typer.Option("--versions", help="Include each prompt's version history")
+    ] = False,
+    compress: Annotated[
+        Compression,
+        typer.Option("--compress", "-z", help="auto (from the extension), none, gzip or zstd"),
+    ] = "auto",
+) -> None:
+    """Export every prompt as newline-delimited JSON.
+
+    The export is streamed straight to the file, so any library size works.
+
+    Examples:
+        pm export prompts.ndjson
+        pm export backup.ndjson.gz --versions
+        pm export backup.ndjson.zst
+        pm export | gzip > prompts.ndjson.gz
+    """
+    to_stdout = str(output) == "-"
+    written = 0
+    try:
+        with APIClient() as client:
+            stream = sys.stdout.buffer if to_stdout else open_archive(output, "wb", compress)
+            try:
+                for chunk in client.export_prompts(versions=versions):
+                    stream.write(chunk)
+                    written += chunk.count(b"\n")
+            finally:
+                if not to_stdout:
+                    stream.close()
+    except (APIError, RuntimeError) as e:
+        print_error(str(e))
+        raise typer.Exit(1)
+
+    if not to_stdout:
+        print_success(f"Exported {written} prompts to {output}")
+
+
+@app.command("import")
+def import_prompts(
+    input_file: Annotated[
+        Path,
+        typer.Argument(help="NDJSON file, optionally .gz or .zst", exists=True, dir_okay=False),
+    ],
+    on_conflict: Annotated[
+        Literal["rename", "skip"],
+        typer.Option("--on-conflict", help="Rename prompts whose slug is taken, or skip them"),
+    ] = "rename",
+    compress: Annotated[
+        Compression,
+        typer.Option("--compress", "-z", help="auto (from the extension), none, gzip or zstd"),
+    ] = "auto",
+    batch_size: Annotated[
+        int | None, typer.Option("--batch-size", help="Prompts per server-side INSERT")
+    ] = None,
+    json_output: Annotated[
+        bool, typer.Option("--json", "-j", help="Output per-line results as JSON")
+    ] = False,
+) -> None:
+    """Import prompts from newline-delimited JSON, such as a `pm export` file.
+
+    The file is streamed to the server, which inserts and commits it in
+    batches. Exits with status 1 if any line failed.
+
+    Examples:
+        pm import prompts.ndjson
+        pm import backup.ndjson.gz --on-conflict skip
+    """
+    progress = Progress(
+        TextColumn("Uploading"),
+        BarColumn(),
+        DownloadColumn(),
+        TransferSpeedColumn(),
+        console=err_console,
+        transient=True,
+    )
+    try:
+        with APIClient() as client, open(input_file, "rb") as raw, progress:
+            task = progress.add_task("upload", total=input_file.stat().st_size)
+            stream = open_archive(input_file, "rb", compress, fileobj=raw)
+
+            def chunks() -> Iterator[bytes]:
+                while chunk := stream.read(IMPORT_CHUNK_SIZE):
+                    yield chunk
+                    progress.update(task, completed=raw.tell())
+
+            result = client.import_prompts(chunks(), on_conflict=on_conflict, batch_size=batch_size)
+    except (APIError, RuntimeError, OSError) as e:
+        print_error(escape(str(e)))
+        raise typer.Exit(1)
+
+    if json_output:
+        console.print(format_json(result))
+    else:
+        print_success(
+            f"Imported {result['created']} prompts "
+            f"({result['skipped']} skipped, {result['failed']} failed)"
+        )
+        problems = [row for row in result["results"] if row["status"] != "created"]
+        for row in problems[:IMPORT_ERRORS_SHOWN]:
+            label = f" ({row['slug']})" if row["slug"] else ""
+            print_warning(f"Line {row['line']}{label}: {escape(row['error'] or row['status'])}")
+        if len(problems) > IMPORT_ERRORS_SHOWN:
+            print_warning(f"... and {len(problems) - IMPORT_ERRORS_SHOWN} more")
+
+    if result["failed"]:
+        raise typer.Exit(1)
@@ -6,6 +6,7 @@ import typer
 
 from prompt_manager.cli.client import APIClient, NotFoundError
 from prompt_manager.cli.output import (
+    PROMPT_TABLE_FIELDS,
     console,
     format_json,
     format_yaml,
@@ -63,6 +64,7 @@ def list_prompts(
             category=category,
             tags=tag_list,
             sort=sort,
+            fields=None if json_output or yaml_output else PROMPT_TABLE_FIELDS,
         )
 
         prompts = result["items"]
@@ -88,6 +90,10 @@ def search_prompts(
     limit: Annotated[
         int, typer.Option("--limit", "-l", help="Max results")
     ] = 20,
+    sort: Annotated[
+        Literal["relevance", "recent", "popular", "updated", "created"],
+        typer.Option("--sort", "-s", help="Sort order"),
+    ] = "relevance",
     json_output: Annotated[
         bool, typer.Option("--json", "-j", help="Output as JSON")
     ] = False,
@@ -100,12 +106,16 @@ def search_prompts(
     Examples:
         pm search "code review"
         pm search python --limit 5
+        pm search python --sort popular
     """
     with APIClient() as client:
         result = client.list_prompts(
             page=1,
             page_size=limit,
             search=query,
+            sort=sort,
+            include_total=False,
+            fields=None if json_output or yaml_output else PROMPT_TABLE_FIELDS,
         )
 
         prompts = result["items"]
@@ -228,7 +238,8 @@ def show_history(
                     console.print()
                     console.print(ver["content"])
             else:
-                versions = client.list_versions(slug)
+                # The table does not show content, so skip downloading it
+                versions = client.list_versions(slug, content=json_output)
                 if json_output:
                     console.print(format_json(versions))
                 else:
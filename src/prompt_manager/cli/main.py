@@ -5,6 +5,7 @@ from typing import Optional
 import typer
 
 from prompt_manager.cli.commands import alias as alias_cmd
+from prompt_manager.cli.commands import backup as backup_cmd
 from prompt_manager.cli.commands import config as config_cmd
 from prompt_manager.cli.commands import prompt as prompt_cmd
 from prompt_manager.cli.commands import search as search_cmd
@@ -36,6 +37,10 @@ app.command("history")(search_cmd.show_history)
 app.command("restore")(search_cmd.restore_version)
 app.command("stats")(search_cmd.show_stats)
 
+# Add individual commands from backup module
+app.command("export")(backup_cmd.export_prompts)
+app.command("import")(backup_cmd.import_prompts)
+
 
 @app.command("serve")
 def serve(
@@ -64,16 +69,23 @@ def serve(
 def init_db() -> None:
     """Initialize the database.
 
-    Creates all tables if they don't exist.
+    Creates all tables if they don't exist and records the schema revision,
+    or checks that an existing database has been migrated.
 
     Examples:
         pm init-db
     """
     import asyncio
 
+    from prompt_manager.cli.output import print_error
+    from prompt_manager.core.database import SchemaOutOfDateError
     from prompt_manager.core.database import init_db as _init_db
 
-    asyncio.run(_init_db())
+    try:
+        asyncio.run(_init_db())
+    except SchemaOutOfDateError as e:
+        print_error(str(e))
+        raise typer.Exit(1)
     typer.echo("Database initialized successfully")
 
 
@@ -83,16 +83,21 @@ def print_table(
     console.print(table)
 
 
+PROMPT_TABLE_COLUMNS = [
+    ("slug", "Slug"),
+    ("title", "Title"),
+    ("category", "Category"),
+    ("tags", "Tags"),
+    ("usage_count", "Uses"),
+]
+
+# Fields to request from the API when prompts are only shown as a table
+PROMPT_TABLE_FIELDS = [key for key, _ in PROMPT_TABLE_COLUMNS]
+
+
 def print_prompt_table(prompts: list[dict[str, Any]]) -> None:
     """Print prompts in a table format."""
-    columns = [
-        ("slug", "Slug"),
-        ("title", "Title"),
-        ("category", "Category"),
-        ("tags", "Tags"),
-        ("usage_count", "Uses"),
-    ]
-    print_table(prompts, columns)
+    print_table(prompts, PROMPT_TABLE_COLUMNS)
 
 
 def print_version_table(versions: list[dict[str, Any]]) -> None:
@@ -1,21 +1,33 @@
 """Core business logic for prompt management."""
 
 from prompt_manager.core.config import settings
-from prompt_manager.core.models import Base, Prompt, PromptVersion
+from prompt_manager.core.models import (
+    Base,
+    Prompt,
+    PromptTag,
+    PromptUsageEvent,
+    PromptUsageRollup,
+    PromptVersion,
+)
 from prompt_manager.core.schemas import (
     PromptCreate,
     PromptRead,
     PromptUpdate,
     PromptVersionRead,
+    PromptVersionSummary,
 )
 
 __all__ = [
     "settings",
     "Base",
     "Prompt",
+    "PromptTag",
+    "PromptUsageEvent",
+    "PromptUsageRollup",
     "PromptVersion",
     "PromptCreate",
     "PromptRead",
     "PromptUpdate",
     "PromptVersionRead",
+    "PromptVersionSummary",
 ]
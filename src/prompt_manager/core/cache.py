@@ -0,0 +1,110 @@
+"""In-process caches shared across requests."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe LRU cache with optional per-entry time-to-live.
+
+    Bounded by entry count and, when ``max_bytes`` is set, by the total of the
+    sizes given to :meth:`set`. Keeps hit, miss and eviction counters so callers
+    can expose cache efficiency.
+    """
+
+    def __init__(
+        self, maxsize: int = 128, ttl: float | None = None, max_bytes: int | None = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[K, tuple[float, int, V]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> V | None:
+        """Return the cached value for ``key``, or None if absent or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, size, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self._bytes -= size
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, size: int = 0) -> None:
+        """Store ``value`` under ``key``, evicting least recently used entries.
+
+        Values larger than ``max_bytes`` on their own are not cached.
+        """
+        if self.maxsize <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._data[key] = (time.monotonic(), size, value)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size, _) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key: K) -> None:
+        """Remove ``key`` from the cache if present."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def items(self) -> list[tuple[K, V]]:
+        """Snapshot of the unexpired entries, least recently used first."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value)
+                for key, (stored_at, _, value) in self._data.items()
+                if self.ttl is None or now - stored_at <= self.ttl
+            ]
+
+    def clear(self) -> None:
+        """Remove every entry, keeping the counters."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of size and hit/miss/eviction counters."""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -19,19 +19,67 @@ class Settings(BaseSettings):
     # API Server
     api_key: str = "dev-secret-key"
     database_url: str = "sqlite+aiosqlite:///./prompts.db"
+    database_read_url: str = ""  # comma-separated read replicas of database_url
+    read_your_writes_window: float = 5.0  # seconds a writer keeps reading the primary
     host: str = "0.0.0.0"
     port: int = 8000
     allow_localhost_bypass: bool = True
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"
+    count_cache_ttl: float = 30.0  # seconds an estimated list total may be reused
+    stats_cache_ttl: float = 5.0  # seconds a stats snapshot may be reused
+    prompt_cache_size: int = 512  # serialized prompts cached by slug
+    prompt_cache_ttl: float = 60.0  # seconds a cached prompt may be served
+    invalidation_backend: Literal["auto", "postgres", "polling", "local"] = "auto"
+    invalidation_poll_interval: float = 1.0  # seconds, for the polling backend
+    template_cache_size: int = 1024  # compiled templates kept in memory
+    template_cache_max_bytes: int = 32 * 1024 * 1024  # total template source size
+    render_batch_max_jobs: int = 10_000  # jobs accepted by POST /render/batch
+    render_executor: Literal["thread", "process", "inline"] = "thread"
+    render_workers: int = 4
+    render_timeout: float = 5.0  # seconds per render
+    render_max_output: int = 1_000_000  # characters per rendered prompt
+    usage_flush_interval: float = 1.0  # seconds between buffered usage writes
+    usage_flush_max_events: int = 1000  # pending uses that force an early write
+    usage_rollup_interval: float = 300.0  # seconds between usage event rollups
+    import_batch_size: int = 1000  # prompts inserted per statement by POST /import
+    version_snapshot_interval: int = 20  # every Nth version is stored in full
+    version_cache_size: int = 256  # reconstructed version contents kept in memory
+
+    # SQLite storage profile, applied to every connection of a file database
+    sqlite_journal_mode: Literal["wal", "delete", "truncate", "persist"] = "wal"
+    sqlite_synchronous: Literal["off", "normal", "full", "extra"] = "normal"
+    sqlite_busy_timeout: int = 5000  # milliseconds to wait for a lock
+    sqlite_cache_size: int = 64 * 1024  # page cache per connection, in KiB
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # bytes of the file memory-mapped
+    sqlite_temp_store: Literal["default", "file", "memory"] = "memory"
+    sqlite_read_pool_size: int = 4  # read-only connections; writes use one connection
+    write_queue: Literal["auto", "on", "off"] = "auto"  # group commits; auto = SQLite files
+    write_group_window: float = 0.002  # seconds a group waits for more writes
+    write_group_max: int = 64  # writes committed together at most
+
+    # Connection pool of server databases (PostgreSQL), per worker process
+    db_pool_size: int = 5  # connections kept open
+    db_max_overflow: int = 10  # extra connections opened under load, closed when idle
+    db_pool_timeout: float = 30.0  # seconds a request waits for a free connection
+    db_pool_recycle: int = 1800  # seconds before a connection is replaced
+    db_pool_pre_ping: bool = True  # test connections on checkout
+    db_statement_cache_size: int = 100  # prepared statements cached per connection
+    db_statement_timeout_ms: int = 30_000  # server cancels longer statements; 0 = off
 
     # CLI
     api_url: str = "http://localhost:8000"
     default_format: Literal["plain", "json", "yaml", "table"] = "plain"
     editor: str = "vim"
+    client_cache: bool = True  # revalidate GET responses cached on disk with ETags
 
     # Paths
     config_dir: Path = Path.home() / ".config" / "prompt-manager"
 
+    @property
+    def database_read_urls(self) -> list[str]:
+        """Read replica URLs from ``database_read_url``."""
+        return [url.strip() for url in self.database_read_url.split(",") if url.strip()]
+
     @property
     def sync_database_url(self) -> str:
         """Get synchronous database URL for Alembic migrations."""
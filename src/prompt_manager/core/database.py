@@ -1,24 +1,245 @@
 """Database connection and session management."""
 
+import itertools
+import time
 from collections.abc import AsyncGenerator
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import (
+    Column,
+    Connection,
+    MetaData,
+    PrimaryKeyConstraint,
+    String,
+    Table,
+    event,
+    inspect,
+    select,
+)
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
 
 from prompt_manager.core.config import settings
-from prompt_manager.core.models import Base
+from prompt_manager.core.models import SCHEMA_REVISION, Base, Prompt
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=False,
-    future=True,
+# Alembic's bookkeeping table, stamped on databases that init_db creates
+alembic_version = Table(
+    "alembic_version",
+    MetaData(),
+    Column("version_num", String(32), nullable=False),
+    PrimaryKeyConstraint("version_num", name="alembic_version_pkc"),
 )
 
+
+class SchemaOutOfDateError(RuntimeError):
+    """The database was created by an older version and needs migrating."""
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def __init__(self, creator: Any, pool_size: int = 5, max_overflow: int = 10, **kw: Any):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kw)
+        self.capacity = pool_size + max_overflow if max_overflow >= 0 else None
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+        wait = time.perf_counter() - start
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        return connection
+
+    def stats(self) -> dict[str, Any]:
+        """Current occupancy and cumulative checkout wait of the pool."""
+        checked_out = self.checkedout()
+        return {
+            "capacity": self.capacity,
+            "checked_out": checked_out,
+            "idle": self.checkedin(),
+            "waiting": self.waiting,
+            "saturation": round(checked_out / self.capacity, 3) if self.capacity else None,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3)
+            if self.checkouts
+            else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+def is_sqlite_file(url: str) -> bool:
+    """Whether ``url`` points at an SQLite database file (not an in-memory one)."""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def sqlite_pragmas(read_only: bool = False) -> list[str]:
+    """PRAGMAs of the SQLite storage profile, in the order they are applied.
+
+    The journal mode is persistent in the file, so it is only set by the write
+    connection; read connections are additionally marked ``query_only``.
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous.upper()}",
+        f"PRAGMA cache_size = {-settings.sqlite_cache_size}",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_size}",
+        f"PRAGMA temp_store = {settings.sqlite_temp_store.upper()}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        pragmas.insert(1, f"PRAGMA journal_mode = {settings.sqlite_journal_mode.upper()}")
+    return pragmas
+
+
+def _apply_pragmas(engine: AsyncEngine, pragmas: list[str]) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def _begin_immediate(engine: AsyncEngine) -> None:
+    """Emit ``BEGIN IMMEDIATE`` for every transaction instead of the driver's BEGIN.
+
+    The sqlite3 driver only begins transactions before DML, which breaks
+    savepoints; taking the write lock up front also stops a transaction that
+    read first from failing with "database is locked" when it later writes.
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_driver_begin(dbapi_connection: Any, connection_record: Any) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def begin_immediate(conn: Any) -> None:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def server_connect_args(url: str) -> dict[str, Any]:
+    """Driver arguments applying the statement cache size and timeout (asyncpg only)."""
+    if make_url(url).get_driver_name() != "asyncpg":
+        return {}
+    connect_args: dict[str, Any] = {
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+    }
+    if settings.db_statement_timeout_ms > 0:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(settings.db_statement_timeout_ms),
+        }
+    return connect_args
+
+
+def _create_server_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        poolclass=MeteredPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=server_connect_args(url),
+    )
+
+
+def create_engines() -> tuple[AsyncEngine, AsyncEngine]:
+    """Create the write and read engines.
+
+    An SQLite file gets one write connection, so writers queue in the pool
+    instead of failing with "database is locked", and a separate pool of
+    read-only connections that WAL lets run alongside the writer. Other
+    databases share one engine for both; server databases are pooled as
+    configured by the ``PM_DB_*`` settings.
+    """
+    if make_url(settings.database_url).get_backend_name() != "sqlite":
+        engine = _create_server_engine(settings.database_url)
+        return engine, engine
+    if not is_sqlite_file(settings.database_url):
+        engine = create_async_engine(settings.database_url, echo=False, future=True)
+        return engine, engine
+
+    write_engine = create_async_engine(
+        settings.database_url,
+        echo=False,
+        future=True,
+        poolclass=MeteredPool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    _apply_pragmas(write_engine, sqlite_pragmas())
+    _begin_immediate(write_engine)
+    read_engine = create_async_engine(
+        settings.database_url,
+        echo=False,
+        future=True,
+        poolclass=MeteredPool,
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=0,
+    )
+    _apply_pragmas(read_engine, sqlite_pragmas(read_only=True))
+    return write_engine, read_engine
+
+
+def create_replica_engines() -> list[AsyncEngine]:
+    """Create an engine for each read replica in ``PM_DATABASE_READ_URL``."""
+    return [_create_server_engine(url) for url in settings.database_read_urls]
+
+
+engine, read_engine = create_engines()
+replica_engines = create_replica_engines()
+
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
 
+# Reads rotate over the replicas when there are any, else use read_engine
+read_session_makers = [
+    async_sessionmaker(read, class_=AsyncSession, expire_on_commit=False)
+    for read in replica_engines or [read_engine]
+]
+_read_rotation = itertools.cycle(read_session_makers)
+
+
+def pool_stats() -> dict[str, Any]:
+    """Occupancy and checkout wait of the connection pools, by role."""
+    pools = {"write": engine.sync_engine.pool}
+    if read_engine is not engine:
+        pools["read"] = read_engine.sync_engine.pool
+    for number, replica in enumerate(replica_engines, start=1):
+        pools[f"replica{number}"] = replica.sync_engine.pool
+    return {
+        role: pool.stats() for role, pool in pools.items() if isinstance(pool, MeteredPool)
+    }
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """Get an async database session."""
@@ -29,12 +250,72 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Get a session for queries that never write, on the next read replica if any."""
+    async with next(_read_rotation)() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 async def init_db() -> None:
-    """Initialize database tables."""
+    """Create the database tables, or check that an existing schema is current.
+
+    A new database is stamped with the current Alembic revision, so later
+    upgrades apply with ``alembic upgrade head``. Raises
+    :class:`SchemaOutOfDateError` before touching a database that has not been
+    migrated to the current revision.
+    """
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_init_schema)
+
+
+def _init_schema(connection: Connection) -> None:
+    inspector = inspect(connection)
+    if not inspector.has_table(Prompt.__tablename__):
+        Base.metadata.create_all(connection)
+        alembic_version.create(connection, checkfirst=True)
+        connection.execute(alembic_version.delete())
+        connection.execute(alembic_version.insert().values(version_num=SCHEMA_REVISION))
+        return
+
+    if inspector.has_table(alembic_version.name):
+        revision = connection.execute(select(alembic_version.c.version_num)).scalar()
+        if revision != SCHEMA_REVISION:
+            raise SchemaOutOfDateError(
+                f"Database schema is at revision {revision}, expected {SCHEMA_REVISION}; "
+                "run `alembic upgrade head`"
+            )
+    else:
+        # Created by ``pm init-db`` before databases were stamped
+        missing = [
+            f"{table.name}.{column.name}"
+            for table in Base.metadata.sorted_tables
+            if inspector.has_table(table.name)
+            for column in table.columns
+            if column.name not in {info["name"] for info in inspector.get_columns(table.name)}
+        ]
+        missing += [
+            table.name
+            for table in Base.metadata.sorted_tables
+            if not inspector.has_table(table.name)
+        ]
+        if missing:
+            raise SchemaOutOfDateError(
+                f"Database schema is missing {', '.join(missing)}; it was created by "
+                "`pm init-db` before migrations were tracked, so run `alembic stamp 001` "
+                "and then `alembic upgrade head`"
+            )
+        alembic_version.create(connection)
+        connection.execute(alembic_version.insert().values(version_num=SCHEMA_REVISION))
+    Base.metadata.create_all(connection)
 
 
 async def close_db() -> None:
     """Close database connections."""
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
@@ -0,0 +1,168 @@
+"""Executor that keeps CPU-bound template rendering off the event loop."""
+
+import asyncio
+import math
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Literal, TypeVar
+
+from prompt_manager.core.config import settings
+from prompt_manager.core.templates import TemplateEngine, TemplateInfo, TemplateRenderError
+
+# (content, content hash, variables) for one render
+RenderTask = tuple[str, str | None, dict[str, Any]]
+
+T = TypeVar("T")
+
+
+def _render_one(task: RenderTask, max_output: int, timeout: float) -> str:
+    content, digest, variables = task
+    return TemplateEngine().render(
+        content, variables, digest=digest, max_output=max_output, timeout=timeout
+    )
+
+
+def _render_many(
+    tasks: list[RenderTask], max_output: int, timeout: float
+) -> list[str | TemplateRenderError]:
+    """Render several tasks in one worker call, returning errors instead of raising.
+
+    Any exception a template raises, such as a TypeError from ``{{ x + 1 }}``
+    with a string ``x``, fails only its own task.
+    """
+    results: list[str | TemplateRenderError] = []
+    for task in tasks:
+        try:
+            results.append(_render_one(task, max_output, timeout))
+        except TemplateRenderError as e:
+            results.append(e)
+        except Exception as e:
+            results.append(TemplateRenderError(f"Render error: {type(e).__name__}: {e}"))
+    return results
+
+
+def _analyze_many(contents: list[str]) -> list[TemplateInfo]:
+    engine = TemplateEngine()
+    return [engine.analyze(content) for content in contents]
+
+
+class RenderExecutor:
+    """Runs template renders in a thread or process pool with per-render budgets.
+
+    Each render is limited to ``max_output`` characters and ``timeout`` seconds.
+    Threads share the compiled template cache; processes keep one cache each and
+    avoid contending for the GIL. ``inline`` renders on the calling thread.
+    """
+
+    def __init__(
+        self,
+        kind: Literal["thread", "process", "inline"] = "thread",
+        workers: int = 4,
+        timeout: float = 5.0,
+        max_output: int = 1_000_000,
+    ):
+        self.kind = kind
+        self.workers = workers
+        self.timeout = timeout
+        self.max_output = max_output
+        self._pool: Executor | None = None
+
+    @classmethod
+    def from_settings(cls) -> "RenderExecutor":
+        """Create an executor configured from application settings."""
+        return cls(
+            kind=settings.render_executor,
+            workers=settings.render_workers,
+            timeout=settings.render_timeout,
+            max_output=settings.render_max_output,
+        )
+
+    @property
+    def pool(self) -> Executor:
+        """Get or create the worker pool."""
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="pm-render"
+                )
+        return self._pool
+
+    async def render(
+        self, content: str, variables: dict[str, Any], digest: str | None = None
+    ) -> str:
+        """Render one template within the configured budgets."""
+        task: RenderTask = (content, digest, variables)
+        if self.kind == "inline":
+            return _render_one(task, self.max_output, self.timeout)
+        return await self._run(partial(_render_one, task, self.max_output, self.timeout))
+
+    async def render_many(self, tasks: list[RenderTask]) -> list[str | TemplateRenderError]:
+        """Render many templates, spreading them over the workers in chunks."""
+        if self.kind == "inline":
+            return _render_many(tasks, self.max_output, self.timeout)
+        if not tasks:
+            return []
+
+        size = math.ceil(len(tasks) / self.workers)
+        chunks = [tasks[i : i + size] for i in range(0, len(tasks), size)]
+        results = await asyncio.gather(*(self._render_chunk(chunk) for chunk in chunks))
+        return [result for chunk_results in results for result in chunk_results]
+
+    async def _render_chunk(self, chunk: list[RenderTask]) -> list[str | TemplateRenderError]:
+        """Render one chunk, failing only its own tasks if it overruns its budget."""
+        try:
+            return await self._run(
+                partial(_render_many, chunk, self.max_output, self.timeout),
+                budget=self.timeout * len(chunk),
+            )
+        except TemplateRenderError as e:
+            return [e] * len(chunk)
+
+    async def analyze_many(self, contents: list[str]) -> list[TemplateInfo]:
+        """Derive template metadata for many contents, spread over the workers.
+
+        Used by bulk imports so parsing thousands of templates does not hold
+        the event loop. Analysis only parses, so it is not subject to the
+        render budgets.
+        """
+        if self.kind == "inline":
+            return _analyze_many(contents)
+        if not contents:
+            return []
+
+        loop = asyncio.get_running_loop()
+        size = math.ceil(len(contents) / self.workers)
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(self.pool, _analyze_many, contents[i : i + size])
+                for i in range(0, len(contents), size)
+            )
+        )
+        return [info for chunk_results in results for info in chunk_results]
+
+    async def _run(self, func: Callable[[], T], budget: float | None = None) -> T:
+        """Run ``func`` in the pool, giving up once its time budget has passed.
+
+        Renders stop themselves at their deadline (see
+        :class:`~prompt_manager.core.templates.BudgetedEnvironment`); this only
+        releases the caller should a single call into native code outlast it.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, func)
+        try:
+            # Small grace period over the in-render checks
+            return await asyncio.wait_for(future, (budget or self.timeout) + 1.0)
+        except TimeoutError as e:
+            raise TemplateRenderError(f"Rendering took longer than {self.timeout} seconds") from e
+
+    def shutdown(self) -> None:
+        """Stop the worker pool without waiting for running renders."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+render_executor = RenderExecutor.from_settings()
@@ -0,0 +1,239 @@
+"""Cross-worker invalidation of in-memory caches.
+
+Every worker keeps its own caches, so a write handled by one worker must reach
+the others. The repository publishes the slugs it changed; each bus delivers
+them to local subscribers immediately and broadcasts them to other workers:
+
+* ``postgres`` uses ``LISTEN/NOTIFY`` on a dedicated asyncpg connection.
+* ``polling`` appends to the ``cache_invalidations`` table, which every worker
+  polls. It works with any database, including SQLite.
+* ``local`` only notifies the current process (single-worker deployments).
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from prompt_manager.core.config import settings
+from prompt_manager.core.models import CacheInvalidation
+
+logger = logging.getLogger(__name__)
+
+# pg_notify payloads are limited to 8000 bytes
+NOTIFY_MAX_PAYLOAD = 7000
+
+
+class InvalidationBus:
+    """Process-local bus; base class for the cross-worker implementations."""
+
+    def __init__(self) -> None:
+        self.origin = uuid.uuid4().hex
+        self._subscribers: list[Callable[[str], Any]] = []
+        self._engine: AsyncEngine | None = None
+        self._read_engine: AsyncEngine | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether invalidations are broadcast to other workers."""
+        return self._engine is not None
+
+    def subscribe(self, callback: Callable[[str], Any]) -> None:
+        """Call ``callback(slug)`` for every invalidated slug, local or remote."""
+        self._subscribers.append(callback)
+
+    async def start(self, engine: AsyncEngine, read_engine: AsyncEngine | None = None) -> None:
+        """Start broadcasting to and receiving from other workers.
+
+        Broadcasts are written with ``engine``; receiving only reads, so it uses
+        ``read_engine`` when given and stays off the SQLite write lock.
+        """
+        self._engine = engine
+        self._read_engine = read_engine or engine
+
+    async def stop(self) -> None:
+        """Stop broadcasting; local delivery continues."""
+        self._engine = None
+        self._read_engine = None
+
+    async def publish(self, slugs: Iterable[str]) -> None:
+        """Invalidate ``slugs`` in this worker and broadcast them to the others.
+
+        Broadcast failures are logged rather than raised, since the write that
+        caused them has already been committed.
+        """
+        unique = list(dict.fromkeys(slugs))
+        if not unique:
+            return
+        self.deliver(unique)
+        if not self.running:
+            return
+        try:
+            await self._broadcast(unique)
+        except Exception:
+            logger.exception("Failed to broadcast invalidation of %d prompts", len(unique))
+
+    def deliver(self, slugs: Iterable[str]) -> None:
+        """Pass invalidated slugs to the local subscribers."""
+        for slug in slugs:
+            for callback in self._subscribers:
+                callback(slug)
+
+    async def _broadcast(self, slugs: list[str]) -> None:
+        pass
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """Broadcasts invalidations with PostgreSQL ``LISTEN/NOTIFY`` (asyncpg only)."""
+
+    def __init__(self, channel: str = "prompt_manager_invalidate") -> None:
+        super().__init__()
+        self.channel = channel
+        self._listener: AsyncConnection | None = None
+
+    async def start(self, engine: AsyncEngine, read_engine: AsyncEngine | None = None) -> None:
+        self._listener = await engine.connect()
+        raw = await self._listener.get_raw_connection()
+        assert raw.driver_connection is not None
+        await raw.driver_connection.add_listener(self.channel, self._on_notify)
+        await super().start(engine, read_engine)
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            raw = await listener.get_raw_connection()
+            assert raw.driver_connection is not None
+            await raw.driver_connection.remove_listener(self.channel, self._on_notify)
+            await listener.close()
+
+    async def _broadcast(self, slugs: list[str]) -> None:
+        assert self._engine is not None
+        async with self._engine.begin() as conn:
+            for payload in self._payloads(slugs):
+                await conn.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": self.channel, "payload": payload},
+                )
+
+    def _payloads(self, slugs: list[str]) -> Iterable[str]:
+        """Split slugs into notification payloads that fit the size limit."""
+        batch: list[str] = []
+        size = 0
+        for slug in slugs:
+            if batch and size + len(slug) + 4 > NOTIFY_MAX_PAYLOAD:
+                yield json.dumps({"origin": self.origin, "slugs": batch})
+                batch, size = [], 0
+            batch.append(slug)
+            size += len(slug) + 4
+        if batch:
+            yield json.dumps({"origin": self.origin, "slugs": batch})
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        message = json.loads(payload)
+        if message["origin"] != self.origin:
+            self.deliver(message["slugs"])
+
+
+class PollingInvalidationBus(InvalidationBus):
+    """Broadcasts invalidations through a table that every worker polls.
+
+    Polls read through the read engine; only publishing and the occasional
+    prune write. Messages older than ``retention`` seconds are pruned, so a worker paused for
+    longer than that may miss invalidations until its cache TTLs expire.
+    """
+
+    def __init__(self, interval: float = 1.0, retention: float = 300.0) -> None:
+        super().__init__()
+        self.interval = interval
+        self.retention = retention
+        self._last_id = 0
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self, engine: AsyncEngine, read_engine: AsyncEngine | None = None) -> None:
+        async with (read_engine or engine).connect() as conn:
+            last_id = await conn.scalar(select(func.max(CacheInvalidation.id)))
+        self._last_id = last_id or 0
+        await super().start(engine, read_engine)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def poll(self) -> None:
+        """Deliver invalidations published by other workers since the last poll."""
+        if self._read_engine is None:
+            return
+        async with self._read_engine.connect() as conn:
+            result = await conn.execute(
+                select(CacheInvalidation.id, CacheInvalidation.origin, CacheInvalidation.slug)
+                .where(CacheInvalidation.id > self._last_id)
+                .order_by(CacheInvalidation.id)
+            )
+            rows = result.all()
+        if rows:
+            self._last_id = rows[-1].id
+            self.deliver(dict.fromkeys(row.slug for row in rows if row.origin != self.origin))
+
+    async def prune(self) -> None:
+        """Delete messages every worker has had time to see."""
+        if self._engine is None:
+            return
+        cutoff = datetime.now(UTC) - timedelta(seconds=self.retention)
+        async with self._engine.begin() as conn:
+            await conn.execute(
+                delete(CacheInvalidation).where(CacheInvalidation.created_at < cutoff)
+            )
+
+    async def _broadcast(self, slugs: list[str]) -> None:
+        assert self._engine is not None
+        now = datetime.now(UTC)
+        async with self._engine.begin() as conn:
+            await conn.execute(
+                insert(CacheInvalidation),
+                [{"origin": self.origin, "slug": slug, "created_at": now} for slug in slugs],
+            )
+
+    async def _run(self) -> None:
+        polls_per_prune = max(1, int(self.retention / self.interval / 10))
+        polls = 0
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+                polls += 1
+                if polls % polls_per_prune == 0:
+                    await self.prune()
+            except Exception:
+                logger.exception("Failed to poll cache invalidations")
+
+
+def create_invalidation_bus() -> InvalidationBus:
+    """Create the bus selected by ``PM_INVALIDATION_BACKEND``.
+
+    ``auto`` uses LISTEN/NOTIFY on asyncpg and table polling otherwise.
+    """
+    backend = settings.invalidation_backend
+    if backend == "auto":
+        backend = "postgres" if "+asyncpg" in settings.database_url else "polling"
+    if backend == "postgres":
+        return PostgresInvalidationBus()
+    if backend == "polling":
+        return PollingInvalidationBus(interval=settings.invalidation_poll_interval)
+    return InvalidationBus()
+
+
+invalidation_bus = create_invalidation_bus()
@@ -4,9 +4,28 @@ import uuid
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Connection,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+    event,
+    func,
+    insert,
+    select,
+    text,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
+# Alembic revision these models correspond to; update with every new migration
+SCHEMA_REVISION = "008"
+
 
 class Base(DeclarativeBase):
     """Base class for all models."""
@@ -24,17 +43,29 @@ class Prompt(Base):
     )
     slug: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
-    content: Mapped[str] = mapped_column(Text, nullable=False)
-    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Large text columns are deferred; queries that return them undefer the
+    # "text" group explicitly (see repository.WITH_TEXT)
+    content: Mapped[str] = mapped_column(Text, nullable=False, deferred=True, deferred_group="text")
+    description: Mapped[str | None] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_group="text"
+    )
     category: Mapped[str | None] = mapped_column(String(100), nullable=True, index=True)
     tags: Mapped[list[str]] = mapped_column(JSON, default=list)
     source_url: Mapped[str | None] = mapped_column(String(2000), nullable=True)
     is_template: Mapped[bool] = mapped_column(Boolean, default=False)
     template_vars: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
+    # Derived from content on write so reads and renders never re-parse it
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    template_variables: Mapped[list[str]] = mapped_column(JSON, default=list)
+    template_error: Mapped[str | None] = mapped_column(Text, nullable=True)
     usage_count: Mapped[int] = mapped_column(Integer, default=0)
     last_used_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
-    success_notes: Mapped[str | None] = mapped_column(Text, nullable=True)
-    failure_notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    success_notes: Mapped[str | None] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_group="text"
+    )
+    failure_notes: Mapped[str | None] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_group="text"
+    )
     related_slugs: Mapped[list[str]] = mapped_column(JSON, default=list)
     version: Mapped[int] = mapped_column(Integer, default=1)
     created_at: Mapped[datetime] = mapped_column(
@@ -50,9 +81,16 @@ class Prompt(Base):
 
 
 class PromptVersion(Base):
-    """Version history for prompts."""
+    """Version history for prompts.
+
+    Versions are stored as periodic full snapshots in ``content`` with a
+    ``delta`` against the previous version in between (see
+    :mod:`prompt_manager.core.versions`). The repository fills in ``content``
+    for delta rows when it loads them.
+    """
 
     __tablename__ = "prompt_versions"
+    __table_args__ = (Index("ix_prompt_versions_prompt_id_version", "prompt_id", "version"),)
 
     id: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
@@ -61,10 +99,198 @@ class PromptVersion(Base):
         String(36), ForeignKey("prompts.id", ondelete="CASCADE"), nullable=False
     )
     version: Mapped[int] = mapped_column(Integer, nullable=False)
-    content: Mapped[str] = mapped_column(Text, nullable=False)
+    content: Mapped[str | None] = mapped_column(Text, nullable=True)
+    delta: Mapped[str | None] = mapped_column(Text, nullable=True)
     changed_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
     )
     change_note: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
     prompt: Mapped["Prompt"] = relationship("Prompt", back_populates="versions")
+
+
+class PromptTag(Base):
+    """Normalized prompt/tag association, mirroring ``Prompt.tags`` for indexed lookups."""
+
+    __tablename__ = "prompt_tags"
+    __table_args__ = (Index("ix_prompt_tags_tag_prompt_id", "tag", "prompt_id"),)
+
+    prompt_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+
+class PromptUsageEvent(Base):
+    """Append-only log of prompt uses, compacted into :class:`PromptUsageRollup` rows.
+
+    Each row covers ``count`` uses recorded together. There is no foreign key so
+    that history, like the rollups, outlives deleted prompts.
+    """
+
+    __tablename__ = "prompt_usage_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    prompt_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    used_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+
+
+class PromptUsageRollup(Base):
+    """Usage per prompt per hour or day bucket, read by the usage time series."""
+
+    __tablename__ = "prompt_usage_rollups"
+
+    granularity: Mapped[str] = mapped_column(String(8), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    prompt_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class CacheInvalidation(Base):
+    """Invalidated slugs broadcast to other workers by the polling invalidation bus."""
+
+    __tablename__ = "cache_invalidations"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    origin: Mapped[str] = mapped_column(String(32), nullable=False)
+    slug: Mapped[str] = mapped_column(String(255), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class LibraryRevision(Base):
+    """Single-row counter bumped by every write; the ETag of lists and stats."""
+
+    __tablename__ = "library_revision"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    revision: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+@event.listens_for(LibraryRevision.__table__, "after_create")
+def seed_library_revision(target: Table, connection: Connection, **kw: Any) -> None:
+    """Insert the counter row into a newly created revision table."""
+    connection.execute(insert(target).values(id=1, revision=0))
+
+
+@event.listens_for(PromptTag.__table__, "after_create")
+def backfill_prompt_tags(target: Table, connection: Connection, **kw: Any) -> None:
+    """Populate a newly created tag table from the JSON tags of existing prompts."""
+    rows = [
+        {"prompt_id": prompt_id, "tag": tag}
+        for prompt_id, tags in connection.execute(select(Prompt.id, Prompt.tags))
+        for tag in dict.fromkeys(tags or [])
+    ]
+    if rows:
+        connection.execute(insert(target), rows)
+
+
+# Full-text search index over title, description and content. Also used by the
+# migration that adds it, so the DDL is defined only here.
+#
+# SQLite uses an external-content FTS5 table keyed by the prompts rowid and kept in
+# sync by triggers. Because ``prompts`` has no INTEGER PRIMARY KEY, a VACUUM may
+# renumber rowids behind the triggers' back and silently desync the index. Run
+# VACUUM with the server stopped: at startup the index is checked against the
+# table and rebuilt if its rowids no longer match (see ensure_search_index).
+# PostgreSQL uses a generated, weighted ``tsvector`` column with a GIN index.
+SQLITE_SEARCH_REBUILD = "INSERT INTO prompts_fts(prompts_fts) VALUES ('rebuild')"
+
+# Whether the rowids in the index (recorded in its docsize table) differ from the table's
+SQLITE_SEARCH_OUT_OF_SYNC = """
+    SELECT (SELECT count(*) FROM prompts) != (SELECT count(*) FROM prompts_fts_docsize)
+        OR EXISTS (
+            SELECT 1 FROM prompts_fts_docsize WHERE id NOT IN (SELECT rowid FROM prompts)
+        )
+"""
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE prompts_fts USING fts5(
+        title, description, content,
+        content='prompts', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER prompts_fts_ai AFTER INSERT ON prompts BEGIN
+        INSERT INTO prompts_fts(rowid, title, description, content)
+        VALUES (new.rowid, new.title, new.description, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER prompts_fts_ad AFTER DELETE ON prompts BEGIN
+        INSERT INTO prompts_fts(prompts_fts, rowid, title, description, content)
+        VALUES ('delete', old.rowid, old.title, old.description, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER prompts_fts_au AFTER UPDATE OF title, description, content ON prompts BEGIN
+        INSERT INTO prompts_fts(prompts_fts, rowid, title, description, content)
+        VALUES ('delete', old.rowid, old.title, old.description, old.content);
+        INSERT INTO prompts_fts(rowid, title, description, content)
+        VALUES (new.rowid, new.title, new.description, new.content);
+    END
+    """,
+    # Backfill the index from existing rows
+    SQLITE_SEARCH_REBUILD,
+]
+
+SQLITE_SEARCH_DROP = [
+    "DROP TRIGGER IF EXISTS prompts_fts_au",
+    "DROP TRIGGER IF EXISTS prompts_fts_ad",
+    "DROP TRIGGER IF EXISTS prompts_fts_ai",
+    "DROP TABLE IF EXISTS prompts_fts",
+]
+
+# A STORED generated column is computed for every existing row when it is added
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE prompts ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_prompts_search_vector ON prompts USING GIN (search_vector)",
+]
+
+POSTGRES_SEARCH_DROP = [
+    "DROP INDEX IF EXISTS ix_prompts_search_vector",
+    "ALTER TABLE prompts DROP COLUMN IF EXISTS search_vector",
+]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def ensure_search_index(target: Any, connection: Connection, **kw: Any) -> None:
+    """Create the dialect-specific full-text index if it does not exist yet.
+
+    Runs after every ``create_all`` so databases created before the index existed
+    are upgraded (and backfilled) on the next startup. An existing SQLite index
+    is rebuilt only if a VACUUM has renumbered the rowids it refers to.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'prompts_fts'")
+        ).first()
+        if not exists:
+            statements = SQLITE_SEARCH_DDL
+        elif connection.execute(text(SQLITE_SEARCH_OUT_OF_SYNC)).scalar():
+            statements = [SQLITE_SEARCH_REBUILD]
+        else:
+            statements = []
+        for statement in statements:
+            connection.execute(text(statement))
+    elif dialect == "postgresql":
+        for statement in POSTGRES_SEARCH_DDL:
+            connection.execute(text(statement))
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def drop_search_index(target: Any, connection: Connection, **kw: Any) -> None:
+    """Drop the SQLite FTS table, which is not part of the metadata."""
+    if connection.dialect.name == "sqlite":
+        for statement in SQLITE_SEARCH_DROP:
+            connection.execute(text(statement))
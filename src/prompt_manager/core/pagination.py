@@ -0,0 +1,117 @@
+"""Keyset (cursor) pagination for prompt listings."""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import ColumnElement, DateTime, String, and_, or_, type_coerce
+from sqlalchemy.orm import QueryableAttribute
+
+from prompt_manager.core.models import Prompt
+
+
+class InvalidCursorError(ValueError):
+    """Exception raised when a pagination cursor cannot be decoded."""
+
+    pass
+
+
+class SortKey:
+    """Ordering of a prompt listing, always descending with ``id`` as tiebreaker.
+
+    ``value_type`` is the JSON type of the key in cursors, which :meth:`decode`
+    checks so a crafted cursor cannot reach the database with the wrong type.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        expression: ColumnElement[Any],
+        value_type: type | tuple[type, ...],
+        nullable: bool = False,
+    ):
+        self.name = name
+        self.expression = expression
+        self.value_type = value_type
+        self.nullable = nullable
+
+    @classmethod
+    def for_sort(
+        cls, sort: str, dialect: str, rank: ColumnElement[float] | None = None
+    ) -> "SortKey":
+        """Build the sort key for a ``list_prompts`` sort order."""
+        if sort == "relevance" and rank is not None:
+            return cls("relevance", rank, (int, float))
+        if sort == "popular":
+            return cls("popular", Prompt.usage_count.expression, int)
+
+        # Timestamps are compared as stored text on SQLite, see _comparable
+        timestamp = str if dialect == "sqlite" else datetime
+        if sort == "recent":
+            column = _comparable(Prompt.last_used_at, dialect)
+            return cls("recent", column, timestamp, nullable=True)
+        if sort == "updated":
+            return cls("updated", _comparable(Prompt.updated_at, dialect), timestamp)
+        return cls("created", _comparable(Prompt.created_at, dialect), timestamp)
+
+    def order_by(self) -> list[ColumnElement[Any]]:
+        """ORDER BY clauses for this key."""
+        key = self.expression.desc()
+        if self.nullable:
+            key = key.nullslast()
+        return [key, Prompt.id.desc()]
+
+    def after(self, value: Any, prompt_id: str) -> ColumnElement[bool]:
+        """WHERE clause selecting rows that sort after ``(value, prompt_id)``."""
+        tiebreak = Prompt.id < prompt_id
+        if value is None:
+            # Only reachable for nullable keys, where NULLs sort last
+            return and_(self.expression.is_(None), tiebreak)
+
+        after = or_(self.expression < value, and_(self.expression == value, tiebreak))
+        if self.nullable:
+            after = or_(after, self.expression.is_(None))
+        return after
+
+    def encode(self, value: Any, prompt_id: str) -> str:
+        """Encode the position of a row as an opaque cursor."""
+        if isinstance(value, datetime):
+            value = {"dt": value.isoformat()}
+        payload = json.dumps([self.name, value, prompt_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> tuple[Any, str]:
+        """Decode a cursor produced by :meth:`encode` for the same sort order."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            name, value, prompt_id = json.loads(base64.urlsafe_b64decode(padded))
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+            raise InvalidCursorError("Malformed cursor") from e
+
+        if name != self.name or not isinstance(prompt_id, str):
+            raise InvalidCursorError(f"Cursor does not belong to the '{self.name}' sort order")
+        if isinstance(value, dict):
+            try:
+                value = datetime.fromisoformat(value["dt"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise InvalidCursorError("Malformed cursor") from e
+        if value is None and self.nullable:
+            return value, prompt_id
+        # bool is an int subclass but never a valid key
+        if isinstance(value, bool) or not isinstance(value, self.value_type):
+            raise InvalidCursorError("Malformed cursor")
+        return value, prompt_id
+
+
+def _comparable(column: QueryableAttribute[Any], dialect: str) -> ColumnElement[Any]:
+    """Expression whose values round-trip exactly through a cursor.
+
+    SQLite stores datetimes as text whose precision depends on how the row was
+    written, so compare the raw stored strings instead of re-rendered datetimes.
+    """
+    expression = column.expression
+    if dialect == "sqlite" and isinstance(expression.type, DateTime):
+        return type_coerce(expression, String)
+    return expression
@@ -1,34 +1,144 @@
 """Data access layer for prompt storage."""
 
+import uuid
+from collections import Counter
+from collections.abc import AsyncIterator, Collection, Iterable, Sequence
 from datetime import UTC, datetime
-from typing import Literal
+from operator import attrgetter
+from typing import Any, Literal, NamedTuple, cast
 
 from slugify import slugify
-from sqlalchemy import func, select
+from sqlalchemy import (
+    Select,
+    Table,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    text,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from prompt_manager.core.models import Prompt, PromptVersion
-from prompt_manager.core.schemas import PromptCreate, PromptUpdate
+from sqlalchemy.orm import defer, load_only, undefer_group
+from sqlalchemy.orm.attributes import set_committed_value
+
+from prompt_manager.core.cache import LRUCache
+from prompt_manager.core.config import settings
+from prompt_manager.core.invalidation import invalidation_bus
+from prompt_manager.core.models import (
+    Base,
+    LibraryRevision,
+    Prompt,
+    PromptTag,
+    PromptUsageEvent,
+    PromptUsageRollup,
+    PromptVersion,
+)
+from prompt_manager.core.pagination import SortKey
+from prompt_manager.core.schemas import (
+    PromptCreate,
+    PromptImport,
+    PromptUpdate,
+    PromptVersionImport,
+)
+from prompt_manager.core.search import apply_search
+from prompt_manager.core.versions import (
+    StoredVersion,
+    encode,
+    encode_history,
+    materialize,
+    reconstruct,
+)
+
+# Recent list counts per filter signature, used by the "estimated" total mode
+_count_cache: LRUCache[tuple[Any, ...], int] = LRUCache(
+    maxsize=256, ttl=settings.count_cache_ttl
+)
+
+
+# Latest stats snapshot, keyed by the write generation it was computed for
+_stats_cache: LRUCache[int, dict[str, Any]] = LRUCache(maxsize=1, ttl=settings.stats_cache_ttl)
+_stats_generation = 0
+
+# Columns loaded for the prompt lists in stats
+STATS_COLUMNS = (
+    Prompt.id,
+    Prompt.slug,
+    Prompt.title,
+    Prompt.category,
+    Prompt.usage_count,
+    Prompt.last_used_at,
+    Prompt.created_at,
+)
+STATS_LIST_SIZE = 5
+
+# Slug patterns matched per query when renaming colliding imports; SQLite
+# limits the depth of an OR chain
+SLUG_PATTERNS_PER_QUERY = 200
+
+# Loader option for the deferred "text" group (content, description and notes),
+# needed on every query whose prompts are serialized in full
+WITH_TEXT = undefer_group("text")
+
+
+def _invalidate_stats(*_: Any) -> None:
+    """Drop the stats snapshot after a write."""
+    global _stats_generation
+    _stats_generation += 1
+    _stats_cache.clear()
+
+
+# Prompt writes in other workers also change the stats
+invalidation_bus.subscribe(_invalidate_stats)
+
+
+class PromptPage(NamedTuple):
+    """A page of prompts from :meth:`PromptRepository.list_prompts`."""
+
+    items: list[Prompt]
+    total: int | None
+    next_cursor: str | None
 
 
 class PromptRepository:
-    """Repository for prompt CRUD operations."""
+    """Repository for prompt CRUD operations.
 
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    With ``defer_commit`` the write methods only flush, collecting the slugs
+    to invalidate in ``pending_slugs`` until :meth:`commit` is called; the
+    write queue uses this to commit many writes at once.
+    """
 
-    async def create(self, data: PromptCreate) -> Prompt:
-        """Create a new prompt."""
+    def __init__(self, session: AsyncSession, defer_commit: bool = False):
+        self.session = session
+        self.defer_commit = defer_commit
+        self.pending_slugs: list[str] = []
+
+    @property
+    def dialect(self) -> str:
+        """Name of the database dialect the session is bound to."""
+        return self.session.get_bind().dialect.name
+
+    async def create(
+        self, data: PromptCreate, derived: dict[str, Any] | None = None
+    ) -> Prompt:
+        """Create a new prompt.
+
+        ``derived`` holds column values computed from the content by the caller,
+        such as the template metadata.
+        """
         slug = data.slug or slugify(data.title)
 
         # Ensure unique slug
-        existing = await self.get_by_slug(slug)
-        if existing:
+        if await self._slug_exists(slug):
             base_slug = slug
             counter = 1
-            while existing:
+            while await self._slug_exists(slug):
                 slug = f"{base_slug}-{counter}"
-                existing = await self.get_by_slug(slug)
                 counter += 1
 
         prompt = Prompt(
@@ -44,10 +154,12 @@ class PromptRepository:
             success_notes=data.success_notes,
             failure_notes=data.failure_notes,
             related_slugs=data.related_slugs,
+            **(derived or {}),
         )
 
         self.session.add(prompt)
         await self.session.flush()
+        await self._set_tags(prompt.id, data.tags)
 
         # Create initial version
         version = PromptVersion(
@@ -57,29 +169,171 @@ class PromptRepository:
             change_note="Initial version",
         )
         self.session.add(version)
-        await self.session.commit()
-        await self.session.refresh(prompt)
+        await self._commit(prompt.slug)
+        await self._reload(prompt)
 
         return prompt
 
-    async def get_by_slug(self, slug: str) -> Prompt | None:
-        """Get a prompt by its slug."""
-        result = await self.session.execute(select(Prompt).where(Prompt.slug == slug))
+    async def bulk_create(
+        self,
+        items: list[tuple[PromptImport, dict[str, Any]]],
+        on_conflict: Literal["rename", "skip"] = "rename",
+    ) -> list[str | None]:
+        """Insert a batch of prompts with their versions and tags.
+
+        Each item is the prompt and its ``derived`` column values. Rows are
+        written with one multi-row INSERT per table and committed together.
+        Returns the slug each item was stored under, or None for items skipped
+        because their slug was taken.
+        """
+        if not items:
+            return []
+        slugs = await self._claim_slugs(
+            [data.slug or slugify(data.title) for data, _ in items], on_conflict
+        )
+        now = datetime.now(UTC)
+        prompts: list[dict[str, Any]] = []
+        versions: list[dict[str, Any]] = []
+        tags: list[dict[str, Any]] = []
+        for (data, derived), slug in zip(items, slugs, strict=True):
+            if slug is None:
+                continue
+            prompt_id = str(uuid.uuid4())
+            history = sorted(
+                data.versions
+                or [
+                    PromptVersionImport(
+                        version=1, content=data.content, change_note="Initial version"
+                    )
+                ],
+                key=lambda entry: entry.version,
+            )
+            prompts.append(
+                {
+                    "id": prompt_id,
+                    "slug": slug,
+                    **data.model_dump(exclude={"slug", "versions", "created_at", "updated_at"}),
+                    "version": max(entry.version for entry in history),
+                    "created_at": data.created_at or now,
+                    "updated_at": data.updated_at or data.created_at or now,
+                    **derived,
+                }
+            )
+            encoded = encode_history((entry.version, entry.content) for entry in history)
+            versions.extend(
+                {
+                    "id": str(uuid.uuid4()),
+                    "prompt_id": prompt_id,
+                    "version": entry.version,
+                    "content": content,
+                    "delta": delta,
+                    "changed_at": entry.changed_at or now,
+                    "change_note": entry.change_note,
+                }
+                for entry, (content, delta) in zip(history, encoded, strict=True)
+            )
+            tags.extend({"prompt_id": prompt_id, "tag": tag} for tag in dict.fromkeys(data.tags))
+
+        # Core table inserts skip the per-row ORM bookkeeping of bulk ORM inserts
+        for model, rows in ((Prompt, prompts), (PromptVersion, versions), (PromptTag, tags)):
+            if rows:
+                await self.session.execute(insert(cast(Table, model.__table__)), rows)
+        await self._commit(*(slug for slug in slugs if slug is not None))
+        return slugs
+
+    async def _claim_slugs(
+        self, wanted: list[str], on_conflict: Literal["rename", "skip"]
+    ) -> list[str | None]:
+        """Resolve slug collisions for a batch against the table and within itself.
+
+        Taken slugs are looked up in one query; renaming also fetches the
+        ``<slug>-N`` names already in use, so no slug is probed one at a time.
+        """
+        result = await self.session.execute(select(Prompt.slug).where(Prompt.slug.in_(set(wanted))))
+        taken = set(result.scalars())
+        if on_conflict == "rename":
+            clashing = sorted(
+                slug for slug, count in Counter(wanted).items() if count > 1 or slug in taken
+            )
+            for start in range(0, len(clashing), SLUG_PATTERNS_PER_QUERY):
+                chunk = clashing[start : start + SLUG_PATTERNS_PER_QUERY]
+                result = await self.session.execute(
+                    select(Prompt.slug).where(or_(*(Prompt.slug.like(f"{s}-%") for s in chunk)))
+                )
+                taken.update(result.scalars())
+
+        claimed: list[str | None] = []
+        for slug in wanted:
+            if slug in taken:
+                if on_conflict == "skip":
+                    claimed.append(None)
+                    continue
+                base, counter = slug, 1
+                while (slug := f"{base}-{counter}") in taken:
+                    counter += 1
+            taken.add(slug)
+            claimed.append(slug)
+        return claimed
+
+    async def commit(self) -> None:
+        """Commit deferred writes and invalidate caches."""
+        slugs, self.pending_slugs = self.pending_slugs, []
+        await self._commit_now(*slugs)
+
+    async def _slug_exists(self, slug: str) -> bool:
+        """Check whether a slug is taken without loading the prompt."""
+        result = await self.session.execute(select(Prompt.id).where(Prompt.slug == slug))
+        return result.first() is not None
+
+    async def _reload(self, prompt: Prompt) -> None:
+        """Refresh a prompt after commit, including its deferred text columns."""
+        await self.session.execute(
+            select(Prompt)
+            .where(Prompt.id == prompt.id)
+            .options(WITH_TEXT)
+            .execution_options(populate_existing=True)
+        )
+
+    async def get_by_slug(self, slug: str, with_text: bool = True) -> Prompt | None:
+        """Get a prompt by its slug.
+
+        With ``with_text=False`` the deferred text columns are not loaded and
+        must not be accessed; use it for lookups that only need metadata.
+        """
+        query = select(Prompt).where(Prompt.slug == slug)
+        if with_text:
+            query = query.options(WITH_TEXT)
+        result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_by_slugs(self, slugs: Iterable[str]) -> dict[str, Prompt]:
+        """Get several prompts by slug in one query, keyed by slug."""
+        result = await self.session.execute(
+            select(Prompt).where(Prompt.slug.in_(set(slugs))).options(WITH_TEXT)
+        )
+        return {prompt.slug: prompt for prompt in result.scalars().all()}
+
     async def get_by_id(self, prompt_id: str) -> Prompt | None:
         """Get a prompt by its ID."""
-        result = await self.session.execute(select(Prompt).where(Prompt.id == prompt_id))
+        result = await self.session.execute(
+            select(Prompt).where(Prompt.id == prompt_id).options(WITH_TEXT)
+        )
         return result.scalar_one_or_none()
 
-    async def update(self, slug: str, data: PromptUpdate) -> Prompt | None:
-        """Update an existing prompt."""
+    async def update(
+        self, slug: str, data: PromptUpdate, derived: dict[str, Any] | None = None
+    ) -> Prompt | None:
+        """Update an existing prompt, also setting any ``derived`` column values."""
         prompt = await self.get_by_slug(slug)
         if not prompt:
             return None
 
         update_data = data.model_dump(exclude_unset=True, exclude={"change_note"})
+        update_data.update(derived or {})
         content_changed = "content" in update_data and update_data["content"] != prompt.content
+        # Deltas are replayed on top of the stored history, not prompt.content,
+        # which an import or a direct database edit may have left different
+        previous_content = await self._latest_version_content(prompt) if content_changed else None
 
         for field, value in update_data.items():
             setattr(prompt, field, value)
@@ -87,28 +341,69 @@ class PromptRepository:
         # Create version if content changed
         if content_changed:
             prompt.version += 1
+            content, delta = encode(previous_content, update_data["content"], prompt.version)
             version = PromptVersion(
                 prompt_id=prompt.id,
                 version=prompt.version,
-                content=update_data["content"],
+                content=content,
+                delta=delta,
                 change_note=data.change_note,
             )
             self.session.add(version)
 
-        await self.session.commit()
-        await self.session.refresh(prompt)
+        if "tags" in update_data:
+            await self._set_tags(prompt.id, update_data["tags"] or [])
+
+        await self._commit(slug)
+        await self._reload(prompt)
         return prompt
 
     async def delete(self, slug: str) -> bool:
         """Delete a prompt by slug."""
-        prompt = await self.get_by_slug(slug)
+        prompt = await self.get_by_slug(slug, with_text=False)
         if not prompt:
             return False
 
+        await self.session.execute(delete(PromptTag).where(PromptTag.prompt_id == prompt.id))
         await self.session.delete(prompt)
-        await self.session.commit()
+        await self._commit(slug)
         return True
 
+    async def _commit(self, *slugs: str) -> None:
+        """Commit a write, or only flush it when commits are deferred."""
+        if self.defer_commit:
+            await self.session.flush()
+            self.pending_slugs.extend(slugs)
+            return
+        await self._commit_now(*slugs)
+
+    async def _commit_now(self, *slugs: str) -> None:
+        """Commit, then invalidate caches.
+
+        Writes that change prompts pass their ``slugs``, which are published to
+        every worker through the invalidation bus and also bump the library
+        revision. Usage-only writes pass none, so frequent usage flushes do not
+        contend on the revision row or change list ETags. The stats snapshot
+        is always dropped.
+        """
+        if slugs:
+            await self.session.execute(
+                update(LibraryRevision).values(revision=LibraryRevision.revision + 1)
+            )
+        await self.session.commit()
+        _invalidate_stats()
+        await invalidation_bus.publish(slugs)
+
+    async def _set_tags(self, prompt_id: str, tags: list[str]) -> None:
+        """Replace the normalized tag rows of a prompt."""
+        await self.session.execute(delete(PromptTag).where(PromptTag.prompt_id == prompt_id))
+        unique_tags = dict.fromkeys(tags)
+        if unique_tags:
+            await self.session.execute(
+                insert(PromptTag),
+                [{"prompt_id": prompt_id, "tag": tag} for tag in unique_tags],
+            )
+
     async def list_prompts(
         self,
         page: int = 1,
@@ -116,50 +411,108 @@ class PromptRepository:
         category: str | None = None,
         tags: list[str] | None = None,
         search: str | None = None,
-        sort: Literal["recent", "popular", "updated", "created"] = "created",
-    ) -> tuple[list[Prompt], int]:
-        """List prompts with filtering and pagination."""
-        query = select(Prompt)
+        sort: Literal["recent", "popular", "updated", "created", "relevance"] = "created",
+        cursor: str | None = None,
+        total_mode: Literal["exact", "estimated", "none"] = "exact",
+        fields: Collection[str] | None = None,
+    ) -> PromptPage:
+        """List prompts with filtering and pagination.
+
+        The ``relevance`` sort ranks search matches by BM25 and falls back to
+        ``created`` when there is no search query to rank against.
+
+        When ``cursor`` is given, ``page`` is ignored and the listing continues after
+        the row the cursor points at. Every page that has a successor returns a
+        ``next_cursor``, so callers can switch from page numbers to cursors at any point.
+
+        ``total_mode`` controls the row count: ``exact`` counts the filtered set,
+        ``estimated`` reuses a recently cached count for the same filters (or the
+        planner's row estimate for the unfiltered table on PostgreSQL), and ``none``
+        skips counting and returns a total of None.
+
+        ``fields`` restricts the loaded columns to those attributes (plus the
+        primary key); other attributes must not be accessed on the results.
+        Without it every column is loaded, including the deferred text columns.
+        """
+        query: Select[Any] = select(Prompt)
+        rank = None
 
         # Apply filters
         if category:
             query = query.where(Prompt.category == category)
 
         if tags:
-            # Filter prompts that have all specified tags
-            for tag in tags:
-                query = query.where(Prompt.tags.contains([tag]))
+            # Filter prompts that have all specified tags via the (tag, prompt_id) index
+            wanted = set(tags)
+            tagged = (
+                select(PromptTag.prompt_id)
+                .where(PromptTag.tag.in_(wanted))
+                .group_by(PromptTag.prompt_id)
+                .having(func.count() == len(wanted))
+            )
+            query = query.where(Prompt.id.in_(tagged))
 
         if search:
-            search_pattern = f"%{search}%"
-            query = query.where(
-                (Prompt.title.ilike(search_pattern))
-                | (Prompt.content.ilike(search_pattern))
-                | (Prompt.description.ilike(search_pattern))
-            )
+            query, rank = apply_search(query, search, self.dialect)
 
         # Count total
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.session.execute(count_query)
-        total = total_result.scalar() or 0
+        total = None
+        if total_mode == "estimated":
+            signature = (category, tuple(sorted(tags or [])), search)
+            total = await self._estimate_count(query, signature)
+        elif total_mode == "exact":
+            total = await self._count(query)
+
+        # Apply sorting, with id as tiebreaker so every row has a unique position
+        sort_key = SortKey.for_sort(sort, self.dialect, rank)
+        query = query.add_columns(sort_key.expression.label("sort_key"))
+        query = query.order_by(*sort_key.order_by())
+
+        # Apply pagination, fetching one extra row to detect a following page
+        if cursor:
+            query = query.where(sort_key.after(*sort_key.decode(cursor)))
+        else:
+            query = query.offset((page - 1) * page_size)
+        query = query.limit(page_size + 1)
+
+        if fields is not None:
+            query = query.options(load_only(*(getattr(Prompt, name) for name in fields)))
+        else:
+            query = query.options(WITH_TEXT)
 
-        # Apply sorting
-        if sort == "recent":
-            query = query.order_by(Prompt.last_used_at.desc().nullslast())
-        elif sort == "popular":
-            query = query.order_by(Prompt.usage_count.desc())
-        elif sort == "updated":
-            query = query.order_by(Prompt.updated_at.desc())
-        else:  # created
-            query = query.order_by(Prompt.created_at.desc())
+        result = await self.session.execute(query)
+        rows = list(result.all())
 
-        # Apply pagination
-        query = query.offset((page - 1) * page_size).limit(page_size)
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last_prompt, last_key = rows[-1]
+            next_cursor = sort_key.encode(last_key, last_prompt.id)
 
-        result = await self.session.execute(query)
-        prompts = list(result.scalars().all())
+        return PromptPage([prompt for prompt, _ in rows], total, next_cursor)
+
+    async def _count(self, query: Select[Any]) -> int:
+        """Count the rows a query would return."""
+        count_query = select(func.count()).select_from(query.subquery())
+        total_result = await self.session.execute(count_query)
+        return total_result.scalar() or 0
 
-        return prompts, total
+    async def _estimate_count(self, query: Select[Any], signature: tuple[Any, ...]) -> int:
+        """Approximate count, served from statistics or a short-lived cache."""
+        if self.dialect == "postgresql" and signature == (None, (), None):
+            estimate_result = await self.session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'prompts'")
+            )
+            estimate = estimate_result.scalar()
+            # reltuples is -1 (or 0) until the table has been analyzed
+            if estimate and estimate > 0:
+                return int(estimate)
+
+        total = _count_cache.get(signature)
+        if total is None:
+            total = await self._count(query)
+            _count_cache.set(signature, total)
+        return total
 
     async def increment_usage(self, slug: str) -> Prompt | None:
         """Increment usage count and update last_used_at."""
@@ -169,26 +522,184 @@ class PromptRepository:
 
         prompt.usage_count += 1
         prompt.last_used_at = datetime.now(UTC)
-        await self.session.commit()
-        await self.session.refresh(prompt)
+        self.session.add(PromptUsageEvent(prompt_id=prompt.id, used_at=prompt.last_used_at))
+        await self._commit()
+        await self._reload(prompt)
         return prompt
 
-    async def get_versions(self, slug: str) -> list[PromptVersion]:
-        """Get all versions of a prompt."""
-        prompt = await self.get_by_slug(slug)
+    async def add_usage(
+        self,
+        counts: dict[str, int],
+        used_at: datetime | None = None,
+        last_used: dict[str, datetime] | None = None,
+    ) -> None:
+        """Add usage counts to many prompts, keyed by id, in a single UPDATE.
+
+        ``last_used`` gives per-prompt timestamps; otherwise every prompt gets
+        ``used_at`` (default now). One usage event per prompt is logged alongside.
+        """
+        if not counts:
+            return
+        used_at = used_at or datetime.now(UTC)
+        if last_used:
+            last_used_at: Any = case(last_used, value=Prompt.id, else_=Prompt.last_used_at)
+        else:
+            last_used_at = used_at
+        await self.session.execute(
+            insert(PromptUsageEvent),
+            [
+                {
+                    "prompt_id": prompt_id,
+                    "used_at": (last_used or {}).get(prompt_id, used_at),
+                    "count": count,
+                }
+                for prompt_id, count in counts.items()
+            ],
+        )
+        await self.session.execute(
+            update(Prompt)
+            .where(Prompt.id.in_(counts))
+            .values(
+                usage_count=Prompt.usage_count + case(counts, value=Prompt.id, else_=0),
+                last_used_at=last_used_at,
+            )
+            .execution_options(synchronize_session="fetch")
+        )
+        await self._commit()
+
+    async def rollup_usage(self) -> int:
+        """Compact logged usage events into hourly and daily rollups.
+
+        Events are claimed by deleting them with ``RETURNING``, so when several
+        workers roll up at once each event is counted by exactly one of them.
+        Their sums are added to the rollup rows with ``INSERT ... ON CONFLICT DO
+        UPDATE`` in the same transaction, which neither loses a concurrent
+        increment nor fails on a row another worker just created. Returns the
+        number of events compacted.
+        """
+        result = await self.session.execute(
+            delete(PromptUsageEvent).returning(
+                PromptUsageEvent.prompt_id, PromptUsageEvent.used_at, PromptUsageEvent.count
+            )
+        )
+        events = result.all()
+        if not events:
+            await self.session.commit()
+            return 0
+
+        totals: dict[tuple[str, datetime, str], int] = {}
+        for prompt_id, used_at, count in events:
+            hour = used_at.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+            for key in (("hour", hour, prompt_id), ("day", hour.replace(hour=0), prompt_id)):
+                totals[key] = totals.get(key, 0) + count
+
+        upsert = self._insert(PromptUsageRollup)
+        await self.session.execute(
+            upsert.on_conflict_do_update(
+                index_elements=["granularity", "bucket", "prompt_id"],
+                set_={"count": PromptUsageRollup.count + upsert.excluded.count},
+            ),
+            [
+                {"granularity": granularity, "bucket": bucket, "prompt_id": prompt_id, "count": n}
+                for (granularity, bucket, prompt_id), n in totals.items()
+            ],
+        )
+        await self.session.commit()
+        return len(events)
+
+    def _insert(self, model: type[Base]) -> Any:
+        """Dialect-specific INSERT for ``model``, supporting ``ON CONFLICT``."""
+        if self.dialect == "postgresql":
+            return postgresql.insert(model)
+        return sqlite.insert(model)
+
+    async def get_usage_series(
+        self,
+        granularity: Literal["hour", "day"],
+        since: datetime,
+        prompt_id: str | None = None,
+    ) -> dict[datetime, int]:
+        """Usage per bucket from the rollups, optionally for a single prompt."""
+        query = (
+            select(PromptUsageRollup.bucket, func.sum(PromptUsageRollup.count))
+            .where(
+                PromptUsageRollup.granularity == granularity,
+                PromptUsageRollup.bucket >= since,
+            )
+            .group_by(PromptUsageRollup.bucket)
+        )
+        if prompt_id is not None:
+            query = query.where(PromptUsageRollup.prompt_id == prompt_id)
+        result = await self.session.execute(query)
+        return {bucket: count for bucket, count in result}
+
+    async def get_revision(self) -> int:
+        """Counter that changes whenever prompts are created, changed or deleted."""
+        result = await self.session.execute(select(LibraryRevision.revision))
+        return result.scalar() or 0
+
+    async def get_versions(self, slug: str, with_content: bool = True) -> list[PromptVersion]:
+        """Get all versions of a prompt, newest first.
+
+        Without ``with_content`` the stored text is not loaded and ``content``
+        must not be accessed.
+        """
+        prompt = await self.get_by_slug(slug, with_text=False)
         if not prompt:
             return []
 
-        result = await self.session.execute(
+        query = (
             select(PromptVersion)
             .where(PromptVersion.prompt_id == prompt.id)
-            .order_by(PromptVersion.version.desc())
+            .order_by(PromptVersion.version)
         )
-        return list(result.scalars().all())
+        if not with_content:
+            query = query.options(defer(PromptVersion.content), defer(PromptVersion.delta))
+        result = await self.session.execute(query)
+        versions = list(result.scalars().all())
+        if with_content:
+            self._materialize(prompt.id, versions)
+        return versions[::-1]
+
+    @staticmethod
+    def _materialize(prompt_id: str, versions: list[PromptVersion]) -> None:
+        """Fill in ``content`` of delta rows from a full history, oldest first."""
+        for version, content in zip(versions, materialize(prompt_id, versions), strict=True):
+            if version.content is None:
+                set_committed_value(version, "content", content)
+
+    async def iter_prompts(self, batch_size: int = 500) -> AsyncIterator[list[Prompt]]:
+        """Stream every prompt in batches, oldest first, with the text columns.
+
+        Rows come from a server-side cursor and are fetched ``batch_size`` at a
+        time, so memory use does not grow with the size of the library.
+        """
+        result = await self.session.stream_scalars(
+            select(Prompt)
+            .options(WITH_TEXT)
+            .order_by(Prompt.created_at, Prompt.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for batch in result.partitions():
+            yield list(batch)
+
+    async def get_versions_for(self, prompt_ids: Collection[str]) -> dict[str, list[PromptVersion]]:
+        """Get the versions of several prompts in one query, oldest first."""
+        versions: dict[str, list[PromptVersion]] = {prompt_id: [] for prompt_id in prompt_ids}
+        result = await self.session.execute(
+            select(PromptVersion)
+            .where(PromptVersion.prompt_id.in_(prompt_ids))
+            .order_by(PromptVersion.prompt_id, PromptVersion.version)
+        )
+        for version in result.scalars():
+            versions[version.prompt_id].append(version)
+        for prompt_id, history in versions.items():
+            self._materialize(prompt_id, history)
+        return versions
 
     async def get_version(self, slug: str, version: int) -> PromptVersion | None:
         """Get a specific version of a prompt."""
-        prompt = await self.get_by_slug(slug)
+        prompt = await self.get_by_slug(slug, with_text=False)
         if not prompt:
             return None
 
@@ -197,7 +708,47 @@ class PromptRepository:
                 PromptVersion.prompt_id == prompt.id, PromptVersion.version == version
             )
         )
-        return result.scalar_one_or_none()
+        record = result.scalar_one_or_none()
+        if record is not None and record.content is None:
+            set_committed_value(record, "content", await self._reconstruct(prompt.id, version))
+        return record
+
+    async def _reconstruct(self, prompt_id: str, version: int) -> str:
+        """Content of a delta version, from the nearest earlier snapshot."""
+        return reconstruct(prompt_id, await self._chain(prompt_id, version))
+
+    async def _latest_version_content(self, prompt: Prompt) -> str | None:
+        """Content of the newest stored version of ``prompt``, or None if it has none.
+
+        Unlike :meth:`_reconstruct` this does not use or fill the version
+        cache, since it runs inside a write that may still roll back.
+        """
+        chain = await self._chain(prompt.id, prompt.version)
+        if not chain or chain[-1].version != prompt.version:
+            return None
+        return materialize(prompt.id, chain)[-1]
+
+    async def _chain(self, prompt_id: str, version: int) -> Sequence[StoredVersion]:
+        """Stored rows from the nearest snapshot at or before ``version`` up to it."""
+        snapshot = (
+            select(func.max(PromptVersion.version))
+            .where(
+                PromptVersion.prompt_id == prompt_id,
+                PromptVersion.version <= version,
+                PromptVersion.content.isnot(None),
+            )
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            select(PromptVersion.version, PromptVersion.content, PromptVersion.delta)
+            .where(
+                PromptVersion.prompt_id == prompt_id,
+                PromptVersion.version >= snapshot,
+                PromptVersion.version <= version,
+            )
+            .order_by(PromptVersion.version)
+        )
+        return result.all()
 
     async def get_categories(self) -> list[tuple[str, int]]:
         """Get all categories with their prompt counts."""
@@ -211,65 +762,69 @@ class PromptRepository:
 
     async def get_tags(self) -> dict[str, int]:
         """Get all tags with their counts."""
-        result = await self.session.execute(select(Prompt.tags))
-        tag_counts: dict[str, int] = {}
-        for (tags,) in result.all():
-            for tag in tags:
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
-        return tag_counts
-
-    async def get_stats(self) -> dict:
-        """Get usage statistics."""
-        # Total prompts
-        total_result = await self.session.execute(select(func.count(Prompt.id)))
-        total_prompts = total_result.scalar() or 0
-
-        # Total usage
-        usage_result = await self.session.execute(select(func.sum(Prompt.usage_count)))
-        total_usage = usage_result.scalar() or 0
-
-        # Categories
-        categories = await self.get_categories()
-        total_categories = len(categories)
-
-        # Tags
-        tags = await self.get_tags()
-        total_tags = len(tags)
-
-        # Most used
-        most_used_result = await self.session.execute(
-            select(Prompt).order_by(Prompt.usage_count.desc()).limit(5)
+        result = await self.session.execute(
+            select(PromptTag.tag, func.count()).group_by(PromptTag.tag)
         )
-        most_used = list(most_used_result.scalars().all())
-
-        # Recently used
-        recently_used_result = await self.session.execute(
-            select(Prompt)
-            .where(Prompt.last_used_at.isnot(None))
-            .order_by(Prompt.last_used_at.desc())
-            .limit(5)
+        return {tag: count for tag, count in result.all()}
+
+    async def get_stats(self) -> dict[str, Any]:
+        """Get usage statistics, served from a short-lived in-memory snapshot.
+
+        Totals come from one aggregate query and the three top lists from one
+        UNION ALL over summary columns, so prompt content is never loaded. Any
+        write through a repository drops the snapshot.
+        """
+        generation = _stats_generation
+        stats = _stats_cache.get(generation)
+        if stats is None:
+            stats = await self._compute_stats()
+            # Stored under the generation it was computed for, so a snapshot that
+            # raced with a write is never served
+            _stats_cache.set(generation, stats)
+        return stats
+
+    async def _compute_stats(self) -> dict[str, Any]:
+        totals = await self.session.execute(
+            select(
+                func.count(Prompt.id),
+                func.coalesce(func.sum(Prompt.usage_count), 0),
+                func.count(func.distinct(Prompt.category)),
+                select(func.count(func.distinct(PromptTag.tag))).scalar_subquery(),
+            )
         )
-        recently_used = list(recently_used_result.scalars().all())
+        total_prompts, total_usage, total_categories, total_tags = totals.one()
 
-        # Recently added
-        recently_added_result = await self.session.execute(
-            select(Prompt).order_by(Prompt.created_at.desc()).limit(5)
-        )
-        recently_added = list(recently_added_result.scalars().all())
+        lists: dict[str, tuple[Any, list[Any]]] = {
+            "most_used": (Prompt.usage_count, []),
+            "recently_used": (Prompt.last_used_at, []),
+            "recently_added": (Prompt.created_at, []),
+        }
+        top = [
+            select(literal(name).label("list"), *STATS_COLUMNS)
+            .where(key.isnot(None))
+            .order_by(key.desc(), Prompt.id.desc())
+            .limit(STATS_LIST_SIZE)
+            .subquery()
+            for name, (key, _) in lists.items()
+        ]
+        for row in await self.session.execute(union_all(*(select(sq) for sq in top))):
+            lists[row.list][1].append(row)
+
+        # UNION ALL does not preserve each branch's order
+        for key, rows in lists.values():
+            rows.sort(key=attrgetter(key.key, "id"), reverse=True)
 
         return {
             "total_prompts": total_prompts,
             "total_categories": total_categories,
             "total_tags": total_tags,
             "total_usage": total_usage,
-            "most_used": most_used,
-            "recently_used": recently_used,
-            "recently_added": recently_added,
+            **{name: rows for name, (_, rows) in lists.items()},
         }
 
     async def get_random(self, category: str | None = None) -> Prompt | None:
         """Get a random prompt, optionally filtered by category."""
-        query = select(Prompt)
+        query = select(Prompt).options(WITH_TEXT)
         if category:
             query = query.where(Prompt.category == category)
         query = query.order_by(func.random()).limit(1)
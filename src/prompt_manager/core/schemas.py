@@ -1,9 +1,9 @@
 """Pydantic schemas for API validation and serialization."""
 
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class PromptBase(BaseModel):
@@ -28,6 +28,43 @@ class PromptCreate(PromptBase):
     slug: str | None = Field(None, min_length=1, max_length=255, pattern=r"^[a-z0-9-]+$")
 
 
+class PromptVersionImport(BaseModel):
+    """A version history entry in an import."""
+
+    version: int = Field(..., ge=1)
+    content: str = Field(..., min_length=1)
+    changed_at: datetime | None = None
+    change_note: str | None = Field(None, max_length=500)
+
+
+class PromptImport(PromptCreate):
+    """One NDJSON line of an import.
+
+    Lines of ``GET /export`` are accepted as-is: their ``versions`` restore the
+    history, and timestamps and usage are kept when present. ``id`` and the
+    derived template columns are assigned anew. The newest entry of
+    ``versions`` must hold ``content``.
+    """
+
+    versions: list[PromptVersionImport] | None = None
+    usage_count: int = Field(0, ge=0)
+    last_used_at: datetime | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    @model_validator(mode="after")
+    def check_history(self) -> "PromptImport":
+        """Reject histories that repeat a version or do not end at ``content``."""
+        if not self.versions:
+            return self
+        numbers = [entry.version for entry in self.versions]
+        if len(set(numbers)) != len(numbers):
+            raise ValueError("versions must have distinct version numbers")
+        if max(self.versions, key=lambda entry: entry.version).content != self.content:
+            raise ValueError("the newest entry of versions must have the prompt's content")
+        return self
+
+
 class PromptUpdate(BaseModel):
     """Schema for updating an existing prompt."""
 
@@ -52,6 +89,8 @@ class PromptRead(PromptBase):
 
     id: str
     slug: str
+    template_variables: list[str] = Field(default_factory=list)
+    content_hash: str | None = None
     usage_count: int
     last_used_at: datetime | None
     version: int
@@ -59,27 +98,35 @@ class PromptRead(PromptBase):
     updated_at: datetime
 
 
-class PromptVersionRead(BaseModel):
-    """Schema for reading a prompt version."""
+class PromptVersionSummary(BaseModel):
+    """Schema for a prompt version without its content."""
 
     model_config = ConfigDict(from_attributes=True)
 
     id: str
     prompt_id: str
     version: int
-    content: str
     changed_at: datetime
     change_note: str | None
 
 
+class PromptVersionRead(PromptVersionSummary):
+    """Schema for reading a prompt version."""
+
+    content: str
+
+
 class PromptList(BaseModel):
     """Schema for paginated prompt list."""
 
     items: list[PromptRead]
-    total: int
+    total: int | None = Field(..., description="Matching prompts, or null when not counted")
     page: int
     page_size: int
-    pages: int
+    pages: int | None
+    next_cursor: str | None = Field(
+        None, description="Cursor for the following page, or null on the last page"
+    )
 
 
 class CategoryCount(BaseModel):
@@ -96,6 +143,20 @@ class TagCount(BaseModel):
     count: int
 
 
+class PromptSummary(BaseModel):
+    """Schema for the prompt entries listed in statistics."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    slug: str
+    title: str
+    category: str | None
+    usage_count: int
+    last_used_at: datetime | None
+    created_at: datetime
+
+
 class Stats(BaseModel):
     """Schema for usage statistics."""
 
@@ -103,9 +164,25 @@ class Stats(BaseModel):
     total_categories: int
     total_tags: int
     total_usage: int
-    most_used: list[PromptRead]
-    recently_used: list[PromptRead]
-    recently_added: list[PromptRead]
+    most_used: list[PromptSummary]
+    recently_used: list[PromptSummary]
+    recently_added: list[PromptSummary]
+
+
+class UsageBucket(BaseModel):
+    """Uses within one hour or day."""
+
+    bucket: datetime
+    count: int
+
+
+class UsageSeries(BaseModel):
+    """Schema for a usage time series built from the hourly/daily rollups."""
+
+    granularity: Literal["hour", "day"]
+    slug: str | None = None
+    total: int
+    buckets: list[UsageBucket]
 
 
 class RenderRequest(BaseModel):
@@ -121,3 +198,62 @@ class RenderResponse(BaseModel):
     slug: str
     is_template: bool
     variables_used: dict[str, Any]
+
+
+class RenderJob(BaseModel):
+    """One prompt and variable set to render in a batch."""
+
+    slug: str
+    variables: dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchRenderRequest(BaseModel):
+    """Schema for a batch render request.
+
+    Provide explicit ``jobs``, or one ``slug`` with several ``variable_sets``, or both.
+    """
+
+    jobs: list[RenderJob] = Field(default_factory=list)
+    slug: str | None = None
+    variable_sets: list[dict[str, Any]] = Field(default_factory=list)
+
+    def expand(self) -> list[RenderJob]:
+        """All jobs in request order."""
+        jobs = list(self.jobs)
+        if self.slug is not None:
+            jobs.extend(RenderJob(slug=self.slug, variables=v) for v in self.variable_sets)
+        return jobs
+
+
+class RenderResult(BaseModel):
+    """Result of one batch render job: ``content`` on success, ``error`` otherwise."""
+
+    slug: str
+    content: str | None = None
+    error: str | None = None
+
+
+class BatchRenderResponse(BaseModel):
+    """Schema for a batch render response, with results in job order."""
+
+    results: list[RenderResult]
+    rendered: int
+    failed: int
+
+
+class ImportRowResult(BaseModel):
+    """Outcome of one import line; ``slug`` is the slug the prompt was stored under."""
+
+    line: int
+    status: Literal["created", "skipped", "failed"]
+    slug: str | None = None
+    error: str | None = None
+
+
+class ImportResult(BaseModel):
+    """Schema for a bulk import response, with results in line order."""
+
+    results: list[ImportRowResult]
+    created: int
+    skipped: int
+    failed: int
@@ -0,0 +1,64 @@
+"""Full-text search query building for the supported database dialects."""
+
+import re
+from typing import Any
+
+from sqlalchemy import ColumnElement, Select, column, func, literal_column, or_, table
+
+from prompt_manager.core.models import Prompt
+
+# Lightweight handle on the SQLite FTS5 table, which is created outside the metadata
+prompts_fts = table("prompts_fts", column("rowid"))
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# BM25 weights for title, description and content
+FIELD_WEIGHTS = (10.0, 5.0, 1.0)
+
+
+def search_terms(search: str) -> list[str]:
+    """Split a free-text query into index terms."""
+    return _TERM_PATTERN.findall(search)
+
+
+def apply_search(
+    query: Select[Any], search: str, dialect: str
+) -> tuple[Select[Any], ColumnElement[float] | None]:
+    """Restrict a prompt query to rows matching a full-text search.
+
+    Every term must match, and terms match as prefixes so partially typed words
+    still find results. Dialects without a native index fall back to ILIKE.
+
+    Returns the filtered query and a relevance score expression (higher is more
+    relevant), or None when the dialect cannot rank results.
+    """
+    terms = search_terms(search)
+
+    if terms and dialect == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        query = query.join(
+            prompts_fts, prompts_fts.c.rowid == literal_column("prompts.rowid")
+        ).where(literal_column("prompts_fts").op("MATCH")(match))
+        # bm25() is lower-is-better; weights follow the column order of the FTS table
+        rank: ColumnElement[float] = -func.bm25(literal_column("prompts_fts"), *FIELD_WEIGHTS)
+        return query, rank
+
+    if terms and dialect == "postgresql":
+        tsquery = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+        search_vector: ColumnElement[Any] = literal_column("prompts.search_vector")
+        query = query.where(search_vector.op("@@")(tsquery))
+        # Field weights are baked into the tsvector as A/B/C labels
+        rank = func.ts_rank_cd(search_vector, tsquery)
+        return query, rank
+
+    return query.where(_ilike_clause(search)), None
+
+
+def _ilike_clause(search: str) -> ColumnElement[bool]:
+    """Substring match used when no full-text index is available."""
+    pattern = f"%{search}%"
+    return or_(
+        Prompt.title.ilike(pattern),
+        Prompt.content.ilike(pattern),
+        Prompt.description.ilike(pattern),
+    )
@@ -1,113 +1,483 @@
 """Business logic layer for prompt management."""
 
-from typing import Any, Literal
+import hashlib
+from collections.abc import AsyncIterable, AsyncIterator, Collection
+from datetime import UTC, datetime, timedelta
+from typing import Any, Literal, NamedTuple, TypeVar
 
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from prompt_manager.core.cache import LRUCache
+from prompt_manager.core.config import settings
+from prompt_manager.core.executor import RenderTask, render_executor
+from prompt_manager.core.invalidation import invalidation_bus
 from prompt_manager.core.models import Prompt, PromptVersion
 from prompt_manager.core.repository import PromptRepository
-from prompt_manager.core.schemas import PromptCreate, PromptList, PromptRead, PromptUpdate, Stats
-from prompt_manager.core.templates import TemplateEngine
+from prompt_manager.core.schemas import (
+    ImportResult,
+    ImportRowResult,
+    PromptCreate,
+    PromptImport,
+    PromptList,
+    PromptRead,
+    PromptSummary,
+    PromptUpdate,
+    RenderJob,
+    RenderResult,
+    Stats,
+    UsageBucket,
+    UsageSeries,
+)
+from prompt_manager.core.templates import TemplateEngine, TemplateInfo, TemplateRenderError
+from prompt_manager.core.usage import usage_aggregator
+from prompt_manager.core.writer import WriteOp, write_queue
+
+T = TypeVar("T")
+
+
+class PromptListPage(NamedTuple):
+    """A page of prompts as ORM rows, with the :class:`PromptList` metadata."""
+
+    items: list[Prompt]
+    total: int | None
+    page: int
+    page_size: int
+    pages: int | None
+    next_cursor: str | None
+
+
+# Serialized prompts by slug for GET /prompts/{slug}. The repository publishes
+# every changed slug on the invalidation bus, which reaches all workers.
+prompt_cache: LRUCache[str, PromptRead] = LRUCache(
+    maxsize=settings.prompt_cache_size, ttl=settings.prompt_cache_ttl
+)
+# Bumped on every invalidation, so a read that raced with one is not cached
+_prompt_generation = 0
+
+
+def _invalidate_prompt(slug: str) -> None:
+    """Drop a written prompt from the prompt cache."""
+    global _prompt_generation
+    _prompt_generation += 1
+    prompt_cache.pop(slug)
+
+
+def _drop_flushed_usage(prompt_ids: Collection[str]) -> None:
+    """Drop cached prompts whose buffered usage was just written.
+
+    Their cached count predates the flush, and the usage overlay no longer
+    covers it, so serving them would show a lower count.
+    """
+    global _prompt_generation
+    _prompt_generation += 1
+    for slug, read in prompt_cache.items():
+        if read.id in prompt_ids:
+            prompt_cache.pop(slug)
+
+
+invalidation_bus.subscribe(_invalidate_prompt)
+usage_aggregator.subscribe(_drop_flushed_usage)
+
+# Slugs written within the read-your-writes window, in any worker. A replica
+# may not have the write yet, so prompts read from one are not cached while
+# their slug is here.
+_recent_writes: LRUCache[str, bool] = LRUCache(
+    maxsize=settings.prompt_cache_size, ttl=settings.read_your_writes_window
+)
+invalidation_bus.subscribe(lambda slug: _recent_writes.set(slug, True))
+
+
+def wrote_recently() -> bool:
+    """Whether any prompt was written, in any worker, within the read-your-writes window."""
+    return bool(_recent_writes.items())
 
 
 class PromptService:
-    """Service layer for prompt operations."""
+    """Service layer for prompt operations.
 
-    def __init__(self, session: AsyncSession):
+    Queries that never write go through ``reader``, bound to ``read_session``
+    when one other than ``session`` is given. Writes go through the write
+    queue while it runs and otherwise through ``repo``.
+    """
+
+    def __init__(self, session: AsyncSession, read_session: AsyncSession | None = None):
         self.repo = PromptRepository(session)
+        self.reader = (
+            PromptRepository(read_session)
+            if read_session is not None and read_session is not session
+            else self.repo
+        )
         self.template_engine = TemplateEngine()
 
+    async def _write(self, op: WriteOp[T]) -> T:
+        """Run a write through the write queue when it is running, else directly."""
+        if write_queue.running:
+            return await write_queue.submit(op)
+        return await op(self.repo)
+
     async def create_prompt(self, data: PromptCreate) -> Prompt:
-        """Create a new prompt, detecting if it's a template."""
+        """Create a new prompt, detecting if it's a template.
+
+        Template metadata is derived once here and stored with the prompt;
+        templates with syntax errors are rejected.
+        """
+        info = self._prepare_template(data)
+        return await self._write(lambda repo: repo.create(data, derived=info.columns()))
+
+    def _prepare_template(
+        self, data: PromptCreate, info: TemplateInfo | None = None
+    ) -> TemplateInfo:
+        """Analyze new content, filling in the template flag and variable schema.
+
+        Pass ``info`` when the content has already been analyzed.
+        """
+        info = info or self.template_engine.analyze(data.content)
+
         # Auto-detect template
         if not data.is_template:
-            data.is_template = self.template_engine.is_template(data.content)
+            data.is_template = info.is_template
+
+        if data.is_template:
+            self._check_template(info)
+
+            # Extract template variables if it's a template
+            if not data.template_vars:
+                data.template_vars = self._default_template_vars(info)
 
-        # Extract template variables if it's a template
-        if data.is_template and not data.template_vars:
-            variables = self.template_engine.extract_variables(data.content)
-            data.template_vars = {var: {"type": "string", "required": True} for var in variables}
+        return info
 
-        return await self.repo.create(data)
+    async def import_prompts(
+        self,
+        lines: AsyncIterable[bytes],
+        on_conflict: Literal["rename", "skip"] = "rename",
+        batch_size: int | None = None,
+    ) -> ImportResult:
+        """Create prompts from NDJSON lines, inserting and committing them in batches.
+
+        Lines that fail validation are reported and left out. Each batch is
+        committed as a write of its own, so no transaction stays open while the
+        next lines are read, and a failure keeps the batches before it.
+        Colliding slugs get a numeric suffix, as in :meth:`create_prompt`, or
+        are skipped with ``on_conflict="skip"``.
+        """
+        batch_size = batch_size or settings.import_batch_size
+        results: list[ImportRowResult] = []
+        batch: list[tuple[int, PromptImport]] = []
+
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                data = PromptImport.model_validate_json(line)
+            except ValidationError as e:
+                results.append(
+                    ImportRowResult(line=line_number, status="failed", error=_describe(e))
+                )
+                continue
+
+            batch.append((line_number, data))
+            if len(batch) >= batch_size:
+                results.extend(await self._import_batch(batch, on_conflict))
+                batch = []
+
+        if batch:
+            results.extend(await self._import_batch(batch, on_conflict))
+
+        results.sort(key=lambda result: result.line)
+        created = sum(result.status == "created" for result in results)
+        skipped = sum(result.status == "skipped" for result in results)
+        return ImportResult(
+            results=results,
+            created=created,
+            skipped=skipped,
+            failed=len(results) - created - skipped,
+        )
+
+    async def _import_batch(
+        self, batch: list[tuple[int, PromptImport]], on_conflict: Literal["rename", "skip"]
+    ) -> list[ImportRowResult]:
+        """Analyze the templates of a batch in the render pool, then insert it."""
+        infos = await render_executor.analyze_many([data.content for _, data in batch])
+        results: list[ImportRowResult] = []
+        valid: list[tuple[int, PromptImport, dict[str, Any]]] = []
+        for (line, data), info in zip(batch, infos, strict=True):
+            try:
+                self._prepare_template(data, info)
+            except TemplateRenderError as e:
+                results.append(ImportRowResult(line=line, status="failed", error=str(e)))
+                continue
+            valid.append((line, data, info.columns()))
+
+        items = [(data, derived) for _, data, derived in valid]
+        slugs = await self._write(lambda repo: repo.bulk_create(items, on_conflict))
+        results.extend(
+            ImportRowResult(line=line, status="created", slug=slug)
+            if slug is not None
+            else ImportRowResult(
+                line=line, status="skipped", slug=data.slug, error="Slug already exists"
+            )
+            for (line, data, _), slug in zip(valid, slugs, strict=True)
+        )
+        return results
 
     async def get_prompt(self, slug: str, increment_usage: bool = True) -> Prompt | None:
-        """Get a prompt by slug, optionally incrementing usage."""
+        """Get a prompt by slug, optionally incrementing usage.
+
+        While the usage aggregator runs, the increment is buffered and written
+        later, so the read does not open a write transaction.
+        """
+        if increment_usage and not usage_aggregator.running:
+            return await self._write(lambda repo: repo.increment_usage(slug))
+
+        prompt = await self.reader.get_by_slug(slug)
+        if prompt and usage_aggregator.running:
+            if increment_usage:
+                usage_aggregator.record(prompt.id)
+            usage_aggregator.apply(prompt)
+        return prompt
+
+    async def get_prompt_read(self, slug: str, increment_usage: bool = True) -> PromptRead | None:
+        """Get the serialized prompt for ``slug``, served from the prompt cache.
+
+        Cached entries are reused until the prompt is written (in any worker),
+        its buffered usage is flushed by this worker, or the TTL expires; pending
+        usage is overlaid on each hit. Usage flushed by other workers only shows
+        once the entry is refreshed. Without the usage aggregator, counting a use
+        still needs the database.
+        Prompts read from a replica within the read-your-writes window of a
+        write are served but not cached, since the replica may still be behind.
+        """
+        if increment_usage and not usage_aggregator.running:
+            prompt = await self._write(lambda repo: repo.increment_usage(slug))
+            if not prompt:
+                return None
+            read = PromptRead.model_validate(prompt)
+            prompt_cache.set(slug, read)
+            return read
+
+        cached = prompt_cache.get(slug)
+        if cached is None:
+            generation = _prompt_generation
+            prompt = await self.reader.get_by_slug(slug)
+            if not prompt:
+                return None
+            read = PromptRead.model_validate(prompt)
+            if generation == _prompt_generation and (
+                self.reader is self.repo or _recent_writes.get(slug) is None
+            ):
+                prompt_cache.set(slug, read)
+        else:
+            read = cached
+
         if increment_usage:
-            return await self.repo.increment_usage(slug)
-        return await self.repo.get_by_slug(slug)
+            usage_aggregator.record(read.id)
+        return usage_aggregator.apply_read(read)
+
+    @staticmethod
+    def prompt_etag(prompt: PromptRead) -> str:
+        """Weak ETag of a prompt that ignores the usage fields.
+
+        ``updated_at`` also moves when usage is recorded, so it is left out too;
+        fetching a prompt does not invalidate other clients' copies.
+        """
+        data = prompt.model_dump_json(exclude={"usage_count", "last_used_at", "updated_at"})
+        return f'W/"{hashlib.sha256(data.encode()).hexdigest()[:32]}"'
+
+    async def library_etag(self) -> str:
+        """ETag for lists, categories and tags, changing with every prompt write.
+
+        Like :meth:`prompt_etag` it does not follow usage, so lists that show
+        or sort by usage are tagged by their content instead.
+        """
+        return f'"r{await self.reader.get_revision()}"'
+
+    @staticmethod
+    def stats_etag(stats: Stats) -> str:
+        """Weak ETag of a statistics snapshot, which does follow usage."""
+        return f'W/"{hashlib.sha256(stats.model_dump_json().encode()).hexdigest()[:32]}"'
 
     async def update_prompt(self, slug: str, data: PromptUpdate) -> Prompt | None:
-        """Update a prompt."""
+        """Update a prompt, re-deriving template metadata if the content changes."""
+        derived = None
+
         # Auto-detect template if content is being updated
         if data.content is not None:
+            info = self.template_engine.analyze(data.content)
+            derived = info.columns()
+
             if data.is_template is None:
-                data.is_template = self.template_engine.is_template(data.content)
+                data.is_template = info.is_template
+
+            if data.is_template:
+                self._check_template(info)
+
+                if data.template_vars is None:
+                    data.template_vars = self._default_template_vars(info)
 
-            if data.is_template and data.template_vars is None:
-                variables = self.template_engine.extract_variables(data.content)
-                data.template_vars = {var: {"type": "string", "required": True} for var in variables}
+        return await self._write(lambda repo: repo.update(slug, data, derived=derived))
 
-        return await self.repo.update(slug, data)
+    @staticmethod
+    def _check_template(info: TemplateInfo) -> None:
+        """Reject content that does not parse when it was requested as a template.
+
+        Auto-detection never flags such content, so this only fails when the
+        caller set ``is_template`` explicitly.
+        """
+        if info.error:
+            raise TemplateRenderError(f"Invalid template: {info.error}")
+
+    @staticmethod
+    def _default_template_vars(info: TemplateInfo) -> dict[str, Any]:
+        """Variable schema used when none is provided."""
+        return {var: {"type": "string", "required": True} for var in info.variables}
 
     async def delete_prompt(self, slug: str) -> bool:
         """Delete a prompt."""
-        return await self.repo.delete(slug)
+        return await self._write(lambda repo: repo.delete(slug))
 
-    async def list_prompts(
+    async def page_prompts(
         self,
         page: int = 1,
         page_size: int = 20,
         category: str | None = None,
         tags: list[str] | None = None,
         search: str | None = None,
-        sort: Literal["recent", "popular", "updated", "created"] = "created",
-    ) -> PromptList:
-        """List prompts with filtering and pagination."""
-        prompts, total = await self.repo.list_prompts(
+        sort: Literal["recent", "popular", "updated", "created", "relevance"] = "created",
+        cursor: str | None = None,
+        total_mode: Literal["exact", "estimated", "none"] = "exact",
+        fields: Collection[str] | None = None,
+    ) -> PromptListPage:
+        """List prompts with filtering and pagination, leaving items as ORM rows.
+
+        Only ``fields`` are loaded when given; see :meth:`PromptRepository.list_prompts`.
+        """
+        prompts, total, next_cursor = await self.reader.list_prompts(
             page=page,
             page_size=page_size,
             category=category,
             tags=tags,
             search=search,
             sort=sort,
+            cursor=cursor,
+            total_mode=total_mode,
+            fields=fields,
         )
 
-        pages = (total + page_size - 1) // page_size if total > 0 else 1
+        pages = None
+        if total is not None:
+            pages = (total + page_size - 1) // page_size if total > 0 else 1
+
+        return PromptListPage(prompts, total, page, page_size, pages, next_cursor)
 
+    async def list_prompts(self, **filters: Any) -> PromptList:
+        """List prompts with filtering and pagination; see :meth:`page_prompts`."""
+        result = await self.page_prompts(**filters)
         return PromptList(
-            items=[PromptRead.model_validate(p) for p in prompts],
-            total=total,
-            page=page,
-            page_size=page_size,
-            pages=pages,
+            items=[PromptRead.model_validate(p) for p in result.items],
+            total=result.total,
+            page=result.page,
+            page_size=result.page_size,
+            pages=result.pages,
+            next_cursor=result.next_cursor,
         )
 
     async def render_prompt(
         self, slug: str, variables: dict[str, Any]
-    ) -> tuple[str, dict[str, Any]] | None:
-        """Render a prompt template with variables."""
+    ) -> tuple[Prompt, str] | None:
+        """Render a prompt template with variables, returning the prompt and output."""
         prompt = await self.get_prompt(slug, increment_usage=True)
         if not prompt:
             return None
 
-        rendered = self.template_engine.render(prompt.content, variables)
-        return rendered, variables
-
-    async def get_versions(self, slug: str) -> list[PromptVersion]:
-        """Get version history for a prompt."""
-        return await self.repo.get_versions(slug)
+        return prompt, await self.render(prompt, variables)
+
+    async def render_batch(self, jobs: list[RenderJob]) -> list[RenderResult]:
+        """Render many prompt/variable pairs, loading every prompt in one query.
+
+        Failures are reported per item rather than aborting the batch. Usage is
+        counted once per successful render, in a single (possibly buffered) update.
+        """
+        prompts = await self.reader.get_by_slugs({job.slug for job in jobs})
+        results: list[RenderResult | None] = [None] * len(jobs)
+        tasks: list[RenderTask] = []
+        task_jobs: list[int] = []
+
+        for i, job in enumerate(jobs):
+            prompt = prompts.get(job.slug)
+            if prompt is None:
+                results[i] = RenderResult(slug=job.slug, error=f"Prompt '{job.slug}' not found")
+            elif not prompt.is_template:
+                results[i] = RenderResult(slug=job.slug, content=prompt.content)
+            elif prompt.template_error:
+                error = f"Invalid template: {prompt.template_error}"
+                results[i] = RenderResult(slug=job.slug, error=error)
+            else:
+                tasks.append((prompt.content, prompt.content_hash, job.variables))
+                task_jobs.append(i)
+
+        # Only actual templates go to the render workers
+        for i, output in zip(task_jobs, await render_executor.render_many(tasks), strict=True):
+            if isinstance(output, TemplateRenderError):
+                results[i] = RenderResult(slug=jobs[i].slug, error=str(output))
+            else:
+                results[i] = RenderResult(slug=jobs[i].slug, content=output)
+
+        usage: dict[str, int] = {}
+        for job, result in zip(jobs, results, strict=True):
+            if result is not None and result.error is None:
+                prompt_id = prompts[job.slug].id
+                usage[prompt_id] = usage.get(prompt_id, 0) + 1
+
+        if usage_aggregator.running:
+            for prompt_id, count in usage.items():
+                usage_aggregator.record(prompt_id, count)
+        elif usage:
+            await self._write(lambda repo: repo.add_usage(usage))
+        return [result for result in results if result is not None]
+
+    async def render(self, prompt: Prompt, variables: dict[str, Any]) -> str:
+        """Render a loaded prompt on the render executor using its stored metadata."""
+        if not prompt.is_template:
+            return prompt.content
+        if prompt.template_error:
+            raise TemplateRenderError(f"Invalid template: {prompt.template_error}")
+        return await render_executor.render(prompt.content, variables, prompt.content_hash)
+
+    async def get_versions(self, slug: str, with_content: bool = True) -> list[PromptVersion]:
+        """Get version history for a prompt, optionally without each version's text."""
+        return await self.reader.get_versions(slug, with_content)
 
     async def get_version(self, slug: str, version: int) -> PromptVersion | None:
         """Get a specific version of a prompt."""
-        return await self.repo.get_version(slug, version)
+        return await self.reader.get_version(slug, version)
+
+    async def export_prompts(
+        self, include_versions: bool = False, batch_size: int = 500
+    ) -> AsyncIterator[tuple[Prompt, list[PromptVersion] | None]]:
+        """Stream every prompt, with its version history if ``include_versions``.
+
+        Prompts are read in batches of ``batch_size`` from a server-side cursor,
+        and each batch's versions are fetched with one query.
+        """
+        async for batch in self.reader.iter_prompts(batch_size):
+            if not include_versions:
+                for prompt in batch:
+                    yield prompt, None
+                continue
+            versions = await self.reader.get_versions_for([prompt.id for prompt in batch])
+            for prompt in batch:
+                yield prompt, versions[prompt.id]
 
     async def restore_version(self, slug: str, version: int) -> Prompt | None:
         """Restore a prompt to a previous version."""
-        version_record = await self.repo.get_version(slug, version)
+        version_record = await self.reader.get_version(slug, version)
         if not version_record:
             return None
 
-        return await self.repo.update(
+        return await self.update_prompt(
             slug,
             PromptUpdate(
                 content=version_record.content,
@@ -118,51 +488,104 @@ class PromptService:
     async def add_note(
         self, slug: str, success_note: str | None = None, failure_note: str | None = None
     ) -> Prompt | None:
-        """Add success or failure notes to a prompt."""
-        prompt = await self.repo.get_by_slug(slug)
-        if not prompt:
-            return None
+        """Add success or failure notes to a prompt.
 
-        update_data: dict[str, Any] = {}
+        The read and the update run as one write, so concurrent notes are not lost.
+        """
 
-        if success_note:
-            existing = prompt.success_notes or ""
-            update_data["success_notes"] = (
-                f"{existing}\n\n---\n\n{success_note}" if existing else success_note
-            )
+        async def append_notes(repo: PromptRepository) -> Prompt | None:
+            prompt = await repo.get_by_slug(slug)
+            if not prompt:
+                return None
 
-        if failure_note:
-            existing = prompt.failure_notes or ""
-            update_data["failure_notes"] = (
-                f"{existing}\n\n---\n\n{failure_note}" if existing else failure_note
-            )
+            update_data: dict[str, Any] = {}
 
-        if update_data:
-            return await self.repo.update(slug, PromptUpdate(**update_data))
+            if success_note:
+                existing = prompt.success_notes or ""
+                update_data["success_notes"] = (
+                    f"{existing}\n\n---\n\n{success_note}" if existing else success_note
+                )
 
-        return prompt
+            if failure_note:
+                existing = prompt.failure_notes or ""
+                update_data["failure_notes"] = (
+                    f"{existing}\n\n---\n\n{failure_note}" if existing else failure_note
+                )
+
+            if update_data:
+                return await repo.update(slug, PromptUpdate(**update_data))
+
+            return prompt
+
+        return await self._write(append_notes)
 
     async def get_categories(self) -> list[tuple[str, int]]:
         """Get all categories with counts."""
-        return await self.repo.get_categories()
+        return await self.reader.get_categories()
 
     async def get_tags(self) -> dict[str, int]:
         """Get all tags with counts."""
-        return await self.repo.get_tags()
+        return await self.reader.get_tags()
 
     async def get_stats(self) -> Stats:
         """Get usage statistics."""
-        stats_data = await self.repo.get_stats()
+        stats_data = await self.reader.get_stats()
         return Stats(
             total_prompts=stats_data["total_prompts"],
             total_categories=stats_data["total_categories"],
             total_tags=stats_data["total_tags"],
             total_usage=stats_data["total_usage"],
-            most_used=[PromptRead.model_validate(p) for p in stats_data["most_used"]],
-            recently_used=[PromptRead.model_validate(p) for p in stats_data["recently_used"]],
-            recently_added=[PromptRead.model_validate(p) for p in stats_data["recently_added"]],
+            most_used=[PromptSummary.model_validate(p) for p in stats_data["most_used"]],
+            recently_used=[PromptSummary.model_validate(p) for p in stats_data["recently_used"]],
+            recently_added=[PromptSummary.model_validate(p) for p in stats_data["recently_added"]],
+        )
+
+    async def get_usage_series(
+        self,
+        granularity: Literal["hour", "day"] = "day",
+        periods: int = 30,
+        slug: str | None = None,
+    ) -> UsageSeries | None:
+        """Usage over the last ``periods`` hours or days, including empty buckets.
+
+        Reads only the rollups, so uses since the last rollup are not included.
+        Returns None if ``slug`` is given but does not exist.
+        """
+        prompt_id = None
+        if slug is not None:
+            prompt = await self.reader.get_by_slug(slug, with_text=False)
+            if not prompt:
+                return None
+            prompt_id = prompt.id
+
+        step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+        current = datetime.now(UTC).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+        if granularity == "day":
+            current = current.replace(hour=0)
+        since = current - step * (periods - 1)
+
+        counts = await self.reader.get_usage_series(granularity, since, prompt_id)
+        buckets = [
+            UsageBucket(bucket=since + step * i, count=counts.get(since + step * i, 0))
+            for i in range(periods)
+        ]
+        return UsageSeries(
+            granularity=granularity,
+            slug=slug,
+            total=sum(bucket.count for bucket in buckets),
+            buckets=buckets,
         )
 
     async def get_random(self, category: str | None = None) -> Prompt | None:
         """Get a random prompt."""
-        return await self.repo.get_random(category)
+        return await self.reader.get_random(category)
+
+
+def _describe(error: ValidationError) -> str:
+    """One-line summary of a validation error for import results."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        if detail["loc"]
+        else detail["msg"]
+        for detail in error.errors()
+    )
@@ -1,55 +1,230 @@
 """Jinja2 template rendering for prompts."""
 
-import re
+import hashlib
+import time
+from collections.abc import Iterable, Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass
 from typing import Any
 
-from jinja2 import Environment, StrictUndefined, TemplateSyntaxError, UndefinedError
+from jinja2 import (
+    StrictUndefined,
+    Template,
+    TemplateSyntaxError,
+    UndefinedError,
+    meta,
+    nodes,
+)
+from jinja2.exceptions import SecurityError
+from jinja2.runtime import Context
+from jinja2.sandbox import SandboxedEnvironment
+
+from prompt_manager.core.cache import LRUCache
+from prompt_manager.core.config import settings
+
+# ``**`` results may not grow beyond this many bits
+MAX_POWER_BITS = 4096
+
+
+@dataclass(frozen=True)
+class _Budget:
+    """Limits of the render running in the current thread or task."""
+
+    deadline: float | None
+    timeout: float | None
+    max_output: int | None
+
+    def check(self) -> None:
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise TemplateRenderError(f"Rendering took longer than {self.timeout} seconds")
+
+
+_budget: ContextVar[_Budget | None] = ContextVar("render_budget", default=None)
+
+
+def _budget_steps(iterable: Iterable[Any]) -> Iterable[Any]:
+    """Wraps the iterable of every ``{% for %}`` loop to check the time budget each step."""
+    budget = _budget.get()
+    if budget is None or budget.deadline is None:
+        return iterable
+    return _checked(iterable, budget)
+
+
+def _checked(iterable: Iterable[Any], budget: _Budget) -> Iterator[Any]:
+    for item in iterable:
+        budget.check()
+        yield item
+
+
+class BudgetedEnvironment(SandboxedEnvironment):
+    """Sandboxed environment that enforces render budgets inside templates.
+
+    Output size and time are otherwise only checked between output chunks, so
+    a loop or macro that prints nothing could run forever. Here the deadline is
+    also checked on every loop step and function call, ``range`` is capped by
+    the sandbox, and ``*``/``**`` may not build oversized values.
+    """
+
+    intercepted_binops = frozenset(["*", "**"])
+
+    def _generate(
+        self,
+        source: nodes.Template,
+        name: str | None,
+        filename: str | None,
+        defer_init: bool = False,
+    ) -> str:
+        for loop in list(source.find_all(nodes.For)):
+            steps = nodes.ImportedName(f"{__name__}._budget_steps", lineno=loop.lineno)
+            loop.iter = nodes.Call(steps, [loop.iter], [], None, None, lineno=loop.lineno)
+            loop.iter.set_environment(self)
+        return super()._generate(source, name, filename, defer_init=defer_init)
+
+    def call(__self, __context: Context, __obj: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: N805
+        budget = _budget.get()
+        if budget is not None:
+            budget.check()
+        return super().call(__context, __obj, *args, **kwargs)
+
+    def call_binop(self, context: Context, operator: str, left: Any, right: Any) -> Any:
+        if operator == "**":
+            if (
+                isinstance(left, int)
+                and isinstance(right, int)
+                and abs(left) > 1
+                and abs(left).bit_length() * right > MAX_POWER_BITS
+            ):
+                raise TemplateRenderError(f"Power result exceeds {MAX_POWER_BITS} bits")
+            return left**right
+        budget = _budget.get()
+        if budget is not None and budget.max_output is not None:
+            for sequence, times in ((left, right), (right, left)):
+                if (
+                    isinstance(sequence, str | list | tuple)
+                    and isinstance(times, int)
+                    and len(sequence) * times > budget.max_output
+                ):
+                    raise TemplateRenderError(
+                        f"Rendered output exceeds {budget.max_output} characters"
+                    )
+        return left * right
+
+
+# Compiled templates are bound to the environment that compiled them, so every
+# engine shares one environment and one process-wide cache keyed by content hash.
+_environment = BudgetedEnvironment(
+    undefined=StrictUndefined,
+    autoescape=False,  # We're not generating HTML
+    keep_trailing_newline=True,
+)
+
+template_cache: LRUCache[str, Template] = LRUCache(
+    maxsize=settings.template_cache_size,
+    max_bytes=settings.template_cache_max_bytes,
+)
+
+
+def content_hash(content: str) -> str:
+    """Stable hash identifying a template source."""
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class TemplateInfo:
+    """Template metadata derived once from prompt content."""
+
+    is_template: bool
+    variables: list[str]
+    error: str | None
+    content_hash: str
+
+    def columns(self) -> dict[str, Any]:
+        """Values for the derived ``Prompt`` columns."""
+        return {
+            "content_hash": self.content_hash,
+            "template_variables": self.variables,
+            "template_error": self.error,
+        }
 
 
 class TemplateEngine:
     """Jinja2-based template engine for prompts."""
 
-    def __init__(self):
-        self.env = Environment(
-            undefined=StrictUndefined,
-            autoescape=False,  # We're not generating HTML
-            keep_trailing_newline=True,
-        )
+    def __init__(self) -> None:
+        self.env = _environment
+
+    def compile(self, content: str, digest: str | None = None) -> Template:
+        """Get the compiled template for ``content``, compiling it at most once.
+
+        Pass ``digest`` when the content hash is already known to skip rehashing.
+        """
+        key = digest or content_hash(content)
+        template = template_cache.get(key)
+        if template is None:
+            template = self.env.from_string(content)
+            template_cache.set(key, template, size=len(content))
+        return template
 
     def is_template(self, content: str) -> bool:
-        """Check if content contains Jinja2 template syntax."""
-        # Check for {{ }} variable syntax or {% %} block syntax
-        return bool(re.search(r"\{\{.*?\}\}|\{%.*?%\}", content))
+        """Check if content is Jinja2 template syntax that parses cleanly.
+
+        Stray delimiters in plain text, such as ``{#custom-id}`` or ``{%s}``,
+        make the content plain text rather than a broken template.
+        """
+        return self.analyze(content).is_template
 
     def extract_variables(self, content: str) -> list[str]:
-        """Extract variable names from a template."""
-        variables: set[str] = set()
+        """Extract the variables a template expects from its caller.
 
-        # Match {{ variable }} or {{ variable | filter }}
-        var_pattern = re.compile(r"\{\{\s*(\w+)(?:\s*\|.*?)?\s*\}\}")
-        variables.update(var_pattern.findall(content))
+        Uses the parsed AST, so locals from ``{% set %}``, loop targets and macro
+        arguments are excluded while attribute access and nested expressions are
+        reduced to their root variable.
+        """
+        try:
+            return sorted(meta.find_undeclared_variables(self.env.parse(content)))
+        except TemplateSyntaxError:
+            return []
 
-        # Match {% for item in items %} style loops
-        for_pattern = re.compile(r"\{%\s*for\s+\w+\s+in\s+(\w+)\s*%\}")
-        variables.update(for_pattern.findall(content))
+    def analyze(self, content: str) -> TemplateInfo:
+        """Derive the template metadata persisted alongside a prompt's content.
 
-        # Match {% if variable %} style conditions
-        if_pattern = re.compile(r"\{%\s*if\s+(\w+)(?:\s|\})")
-        variables.update(if_pattern.findall(content))
+        Content with a syntax error is not a template, but the error is kept
+        for callers that explicitly ask for one.
+        """
+        digest = content_hash(content)
+        try:
+            # Anything the lexer does not treat as literal data is template syntax
+            if all(token == "data" for _, token, _ in self.env.lex(content)):
+                return TemplateInfo(False, [], None, digest)
+            ast = self.env.parse(content)
+        except TemplateSyntaxError as e:
+            return TemplateInfo(False, [], f"Syntax error at line {e.lineno}: {e.message}", digest)
+        return TemplateInfo(True, sorted(meta.find_undeclared_variables(ast)), None, digest)
 
-        # Filter out Jinja2 builtins and common loop variables
-        builtins = {"loop", "true", "false", "none", "True", "False", "None"}
-        return sorted(variables - builtins)
+    def render(
+        self,
+        content: str,
+        variables: dict[str, Any],
+        digest: str | None = None,
+        max_output: int | None = None,
+        timeout: float | None = None,
+    ) -> str:
+        """Render a template with the given variables.
 
-    def render(self, content: str, variables: dict[str, Any]) -> str:
-        """Render a template with the given variables."""
+        ``max_output`` (characters) and ``timeout`` (seconds) abort runaway
+        templates; see :class:`BudgetedEnvironment` for where they are checked.
+        """
         try:
-            template = self.env.from_string(content)
-            return template.render(**variables)
+            template = self.compile(content, digest)
+            if max_output is None and timeout is None:
+                return template.render(**variables)
+            return _render_bounded(template, variables, max_output, timeout)
         except TemplateSyntaxError as e:
             raise TemplateRenderError(f"Template syntax error: {e.message}") from e
         except UndefinedError as e:
             raise TemplateRenderError(f"Missing variable: {e.message}") from e
+        except (SecurityError, OverflowError) as e:
+            raise TemplateRenderError(f"Template not allowed: {e}") from e
 
     def validate_template(self, content: str) -> tuple[bool, str | None]:
         """Validate template syntax without rendering."""
@@ -60,6 +235,30 @@ class TemplateEngine:
             return False, f"Syntax error at line {e.lineno}: {e.message}"
 
 
+def _render_bounded(
+    template: Template,
+    variables: dict[str, Any],
+    max_output: int | None,
+    timeout: float | None,
+) -> str:
+    """Render chunk by chunk, enforcing output-size and time budgets."""
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    budget = _Budget(deadline, timeout, max_output)
+    token = _budget.set(budget)
+    try:
+        chunks: list[str] = []
+        size = 0
+        for chunk in template.generate(**variables):
+            size += len(chunk)
+            if max_output is not None and size > max_output:
+                raise TemplateRenderError(f"Rendered output exceeds {max_output} characters")
+            budget.check()
+            chunks.append(chunk)
+        return "".join(chunks)
+    finally:
+        _budget.reset(token)
+
+
 class TemplateRenderError(Exception):
     """Exception raised when template rendering fails."""
 
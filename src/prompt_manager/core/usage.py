@@ -0,0 +1,173 @@
+"""Write-behind aggregation of prompt usage counts."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable, Collection
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from prompt_manager.core.config import settings
+from prompt_manager.core.models import Prompt
+from prompt_manager.core.repository import PromptRepository
+from prompt_manager.core.schemas import PromptRead
+
+logger = logging.getLogger(__name__)
+
+
+class UsageAggregator:
+    """Buffers usage increments in memory and writes them in batches.
+
+    Reads record usage here instead of committing their own UPDATE, so they
+    never take the database write lock. Pending counts are flushed with one
+    ``UPDATE ... CASE`` every ``interval`` seconds, as soon as ``max_events``
+    uses are pending, and when the aggregator stops. Uses still buffered when
+    the process crashes are lost.
+
+    Each flush also appends to the usage event log, which is compacted into
+    hourly and daily rollups every ``rollup_interval`` seconds. Callbacks
+    registered with :meth:`subscribe` are told which prompts a flush wrote.
+    """
+
+    def __init__(
+        self, interval: float = 1.0, max_events: int = 1000, rollup_interval: float = 300.0
+    ):
+        self.interval = interval
+        self.max_events = max_events
+        self.rollup_interval = rollup_interval
+        self._counts: dict[str, int] = {}
+        self._last_used: dict[str, datetime] = {}
+        # Usage being written by a flush, still shown until it is committed
+        self._flushing: dict[str, int] = {}
+        self._flushing_last_used: dict[str, datetime] = {}
+        self._subscribers: list[Callable[[Collection[str]], Any]] = []
+        self._events = 0
+        self._session_factory: Callable[[], AsyncSession] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+
+    @classmethod
+    def from_settings(cls) -> "UsageAggregator":
+        """Create an aggregator configured from application settings."""
+        return cls(
+            interval=settings.usage_flush_interval,
+            max_events=settings.usage_flush_max_events,
+            rollup_interval=settings.usage_rollup_interval,
+        )
+
+    @property
+    def running(self) -> bool:
+        """Whether a background flusher is accepting usage."""
+        return self._task is not None
+
+    def start(self, session_factory: Callable[[], AsyncSession]) -> None:
+        """Start flushing in the background using sessions from ``session_factory``."""
+        if self._task is not None:
+            return
+        self._session_factory = session_factory
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flusher and write anything still pending."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        self._stopping = True
+        self._wakeup.set()
+        await task
+
+    def subscribe(self, callback: Callable[[Collection[str]], Any]) -> None:
+        """Call ``callback(prompt_ids)`` after each flush that wrote usage."""
+        self._subscribers.append(callback)
+
+    def record(self, prompt_id: str, count: int = 1, used_at: datetime | None = None) -> None:
+        """Buffer ``count`` uses of a prompt."""
+        self._counts[prompt_id] = self._counts.get(prompt_id, 0) + count
+        self._last_used[prompt_id] = used_at or datetime.now(UTC)
+        self._events += count
+        if self._events >= self.max_events:
+            self._wakeup.set()
+
+    def pending(self, prompt_id: str) -> tuple[int, datetime | None]:
+        """Uses of a prompt not yet committed, and the time of the latest one."""
+        count = self._counts.get(prompt_id, 0) + self._flushing.get(prompt_id, 0)
+        return count, self._last_used.get(prompt_id) or self._flushing_last_used.get(prompt_id)
+
+    def apply(self, prompt: Prompt) -> Prompt:
+        """Show pending usage on a loaded prompt without marking it dirty."""
+        count, last_used = self.pending(prompt.id)
+        if count:
+            set_committed_value(prompt, "usage_count", prompt.usage_count + count)
+            set_committed_value(prompt, "last_used_at", last_used)
+        return prompt
+
+    def apply_read(self, read: PromptRead) -> PromptRead:
+        """Copy of a serialized prompt with pending usage added."""
+        count, last_used = self.pending(read.id)
+        if not count:
+            return read
+        return read.model_copy(
+            update={"usage_count": read.usage_count + count, "last_used_at": last_used}
+        )
+
+    async def flush(self) -> None:
+        """Write all pending usage in a single batched UPDATE."""
+        if not self._counts or self._session_factory is None:
+            return
+
+        counts, self._counts = self._counts, {}
+        last_used, self._last_used = self._last_used, {}
+        self._flushing, self._flushing_last_used = counts, last_used
+        self._events = 0
+
+        try:
+            async with self._session_factory() as session:
+                await PromptRepository(session).add_usage(counts, last_used=last_used)
+        except Exception:
+            logger.exception("Failed to flush usage for %d prompts", len(counts))
+            # Keep the counts so the next flush retries them
+            for prompt_id, count in counts.items():
+                self._counts[prompt_id] = self._counts.get(prompt_id, 0) + count
+                self._last_used.setdefault(prompt_id, last_used[prompt_id])
+                self._events += count
+            return
+        finally:
+            self._flushing, self._flushing_last_used = {}, {}
+
+        for callback in self._subscribers:
+            callback(counts.keys())
+
+    async def rollup(self) -> None:
+        """Compact the usage event log into hourly and daily rollups."""
+        if self._session_factory is None:
+            return
+        try:
+            async with self._session_factory() as session:
+                await PromptRepository(session).rollup_usage()
+        except Exception:
+            logger.exception("Failed to roll up usage events")
+
+    async def _run(self) -> None:
+        # Flushes are never cancelled mid-write; stop() wakes the loop instead
+        last_rollup = time.monotonic()
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+            if time.monotonic() - last_rollup >= self.rollup_interval:
+                await self.rollup()
+                last_rollup = time.monotonic()
+        await self.flush()
+        await self.rollup()
+
+
+usage_aggregator = UsageAggregator.from_settings()
@@ -0,0 +1,132 @@
+"""Delta encoding of prompt version history.
+
+Every ``PM_VERSION_SNAPSHOT_INTERVAL``-th version, and any version whose delta
+would not be smaller than its text, is stored in full. The versions in between
+store a line-based edit script against the previous version, so reading one
+applies at most one interval's worth of deltas to the nearest snapshot.
+
+An edit script is a JSON array: a positive integer copies that many lines of
+the previous version, a negative integer skips that many, and a string is
+inserted as-is.
+"""
+
+import json
+from collections.abc import Iterable, Sequence
+from difflib import SequenceMatcher
+from typing import Protocol
+
+from prompt_manager.core.cache import LRUCache
+from prompt_manager.core.config import settings
+
+# Reconstructed contents by (prompt_id, version); versions never change once written
+version_cache: LRUCache[tuple[str, int], str] = LRUCache(maxsize=settings.version_cache_size)
+
+
+class StoredVersion(Protocol):
+    """The stored columns of a version row."""
+
+    @property
+    def version(self) -> int: ...
+
+    @property
+    def content(self) -> str | None: ...
+
+    @property
+    def delta(self) -> str | None: ...
+
+
+def diff(old: str, new: str) -> str:
+    """Edit script turning ``old`` into ``new``."""
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    script: list[int | str] = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            script.append(i2 - i1)
+            continue
+        if i2 > i1:
+            script.append(i1 - i2)
+        if j2 > j1:
+            script.append("".join(b[j1:j2]))
+    return json.dumps(script, ensure_ascii=False, separators=(",", ":"))
+
+
+def patch(old: str, delta: str) -> str:
+    """Apply an edit script from :func:`diff` to ``old``."""
+    lines = old.splitlines(keepends=True)
+    parts: list[str] = []
+    position = 0
+    for step in json.loads(delta):
+        if isinstance(step, str):
+            parts.append(step)
+        elif step > 0:
+            parts.extend(lines[position : position + step])
+            position += step
+        else:
+            position -= step
+    return "".join(parts)
+
+
+def encode(previous: str | None, content: str, version: int) -> tuple[str | None, str | None]:
+    """The ``(content, delta)`` columns to store for ``version``.
+
+    ``previous`` is the content of the version before it, or None if there is
+    none, in which case the version is stored in full.
+    """
+    if previous is None or (version - 1) % settings.version_snapshot_interval == 0:
+        return content, None
+    delta = diff(previous, content)
+    if len(delta) >= len(content):
+        return content, None
+    return None, delta
+
+
+def encode_history(history: Iterable[tuple[int, str]]) -> list[tuple[str | None, str | None]]:
+    """Encode ``(version, content)`` pairs, given oldest first."""
+    encoded = []
+    previous = None
+    for version, content in history:
+        encoded.append(encode(previous, content, version))
+        previous = content
+    return encoded
+
+
+def materialize(prompt_id: str, rows: Sequence[StoredVersion]) -> list[str]:
+    """Contents of consecutive versions of a prompt, given oldest first from a snapshot."""
+    contents: list[str] = []
+    for row in rows:
+        if row.content is not None:
+            contents.append(row.content)
+            continue
+        if not contents or row.delta is None:
+            raise ValueError(f"Version {row.version} of prompt {prompt_id} has no base")
+        contents.append(patch(contents[-1], row.delta))
+    return contents
+
+
+def reconstruct(prompt_id: str, chain: Sequence[StoredVersion]) -> str:
+    """Content of the last version in ``chain``, which must start at a snapshot.
+
+    Deltas are applied from the newest version in the chain that is stored in
+    full or cached, and the result is cached.
+    """
+    start = 0
+    base: str | None = None
+    for index in range(len(chain) - 1, -1, -1):
+        row = chain[index]
+        base = row.content
+        if base is None:
+            base = version_cache.get((prompt_id, row.version))
+        if base is not None:
+            start = index
+            break
+    if base is None:
+        raise ValueError(f"Version {chain[-1].version} of prompt {prompt_id} has no base")
+
+    content = base
+    for row in chain[start + 1 :]:
+        assert row.delta is not None
+        content = patch(content, row.delta)
+    if start < len(chain) - 1:
+        version_cache.set((prompt_id, chain[-1].version), content, len(content))
+    return content
@@ -0,0 +1,146 @@
+"""Single-writer queue that group-commits concurrent writes."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from prompt_manager.core.config import settings
+from prompt_manager.core.database import is_sqlite_file
+from prompt_manager.core.repository import PromptRepository
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# A write operation runs against a repository whose commits are deferred
+WriteOp = Callable[[PromptRepository], Awaitable[T]]
+
+
+class WriteQueue:
+    """Runs write operations on one task, committing each group of them once.
+
+    Operations queued within ``window`` seconds of the first one (up to
+    ``max_group`` of them) share a transaction and a single commit, so
+    concurrent writers pay for one fsync instead of one each and never contend
+    for the database lock. Each operation runs in its own savepoint: one that
+    raises is rolled back alone and its caller gets the exception, while the
+    rest of the group still commits.
+    """
+
+    def __init__(self, window: float = 0.002, max_group: int = 64, enabled: bool = True):
+        self.window = window
+        self.max_group = max_group
+        self.enabled = enabled
+        self._queue: asyncio.Queue[tuple[WriteOp[Any], asyncio.Future[Any]]] | None = None
+        self._session_factory: Callable[[], AsyncSession] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @classmethod
+    def from_settings(cls) -> "WriteQueue":
+        """Create a queue configured from application settings.
+
+        ``auto`` enables it for SQLite files, where writers share one connection.
+        """
+        mode = settings.write_queue
+        enabled = is_sqlite_file(settings.database_url) if mode == "auto" else mode == "on"
+        return cls(
+            window=settings.write_group_window,
+            max_group=settings.write_group_max,
+            enabled=enabled,
+        )
+
+    @property
+    def running(self) -> bool:
+        """Whether writes should be submitted to the queue."""
+        return self._task is not None
+
+    def start(self, session_factory: Callable[[], AsyncSession]) -> None:
+        """Start the writer task using sessions from ``session_factory``."""
+        if self._task is not None or not self.enabled:
+            return
+        self._session_factory = session_factory
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Finish the queued writes and stop the writer task."""
+        if self._task is None or self._queue is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.join()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def submit(self, op: WriteOp[T]) -> T:
+        """Queue ``op`` and wait for the commit of the group it joins."""
+        if self._queue is None or self._task is None:
+            raise RuntimeError("Write queue is not running")
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((op, future))
+        return await future
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(group) < self.max_group:
+                try:
+                    group.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    group.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except TimeoutError:
+                    break
+            try:
+                await self._commit_group(group)
+            except Exception as e:
+                logger.exception("Failed to commit a group of %d writes", len(group))
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in group:
+                    self._queue.task_done()
+
+    async def _commit_group(self, group: list[tuple[WriteOp[Any], asyncio.Future[Any]]]) -> None:
+        assert self._session_factory is not None
+        outcomes: list[tuple[asyncio.Future[Any], Any, BaseException | None]] = []
+        async with self._session_factory() as session:
+            repo = PromptRepository(session, defer_commit=True)
+            for op, future in group:
+                if future.cancelled():
+                    continue
+                pending = len(repo.pending_slugs)
+                try:
+                    async with session.begin_nested():
+                        result = await op(repo)
+                except Exception as e:
+                    del repo.pending_slugs[pending:]
+                    outcomes.append((future, None, e))
+                else:
+                    outcomes.append((future, result, None))
+            await repo.commit()
+
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+write_queue = WriteQueue.from_settings()
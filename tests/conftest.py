@@ -10,8 +10,9 @@ from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from prompt_manager.api.main import app
-from prompt_manager.core.database import get_session
+from prompt_manager.core.database import get_read_session, get_session
 from prompt_manager.core.models import Base
+from prompt_manager.core.service import _recent_writes, prompt_cache
 
 # Test database URL
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -25,6 +26,13 @@ def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def clear_caches() -> None:
+    """Start every test without prompts cached by an earlier test's database."""
+    prompt_cache.clear()
+    _recent_writes.clear()
+
+
 @pytest_asyncio.fixture
 async def test_engine():
     """Create test database engine."""
@@ -55,6 +63,7 @@ async def client(test_session: AsyncSession) -> AsyncGenerator[AsyncClient, None
         yield test_session
 
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
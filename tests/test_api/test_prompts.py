@@ -1,9 +1,33 @@
 """Tests for prompt API endpoints."""
 
+import json
+import time
+from collections.abc import AsyncIterator
 from typing import Any
 
 import pytest
-from httpx import AsyncClient
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from prompt_manager.api import deps
+from prompt_manager.api.consistency import (
+    PRIMARY_COOKIE,
+    ReadYourWritesMiddleware,
+    reads_from_primary,
+)
+from prompt_manager.api.main import app
+from prompt_manager.core import service
+from prompt_manager.core.database import get_read_session, get_session
+from prompt_manager.core.models import Base
+from prompt_manager.core.repository import PromptRepository
+from prompt_manager.core.schemas import PromptCreate
+from prompt_manager.core.service import PromptService
 
 
 class TestPromptEndpoints:
@@ -36,6 +60,43 @@ class TestPromptEndpoints:
         assert "name" in data["template_vars"]
         assert "place" in data["template_vars"]
 
+    @pytest.mark.asyncio
+    async def test_create_prompt_invalid_template(self, client: AsyncClient) -> None:
+        """Test that templates with syntax errors are rejected at write time."""
+        response = await client.post(
+            "/api/v1/prompts",
+            json={"title": "Broken", "content": "Hello {{ name }", "is_template": True},
+        )
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_create_prompt_stray_delimiters(self, client: AsyncClient) -> None:
+        """Test that plain text with template-like delimiters is stored as plain text."""
+        response = await client.post(
+            "/api/v1/prompts",
+            json={"title": "Markdown", "content": "## Heading {#custom-id}\nx = {%s}"},
+        )
+        assert response.status_code == 201
+        assert response.json()["is_template"] is False
+
+    @pytest.mark.asyncio
+    async def test_render_prompt(
+        self, client: AsyncClient, sample_template_data: dict[str, Any]
+    ) -> None:
+        """Test rendering a stored template."""
+        await client.post("/api/v1/prompts", json=sample_template_data)
+
+        response = await client.request(
+            "GET",
+            f"/api/v1/prompts/{sample_template_data['slug']}/render",
+            json={"name": "Ada", "place": "London"},
+        )
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["content"] == "Hello Ada, welcome to London!"
+        assert data["is_template"] is True
+
     @pytest.mark.asyncio
     async def test_get_prompt(
         self, client: AsyncClient, sample_prompt_data: dict[str, Any]
@@ -74,6 +135,117 @@ class TestPromptEndpoints:
         response = await client.get("/api/v1/prompts/non-existent")
         assert response.status_code == 404
 
+    @pytest.mark.asyncio
+    async def test_get_prompt_cached(
+        self, client: AsyncClient, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test that repeated reads hit the prompt cache and writes invalidate it."""
+        await client.post("/api/v1/prompts", json=sample_prompt_data)
+        slug = sample_prompt_data["slug"]
+        url = f"/api/v1/prompts/{slug}"
+        params = {"increment_usage": "false"}
+
+        await client.get(url, params=params)
+        before = (await client.get("/api/v1/metrics")).json()["caches"]["prompts"]
+        await client.get(url, params=params)
+        after = (await client.get("/api/v1/metrics")).json()["caches"]["prompts"]
+        assert after["hits"] == before["hits"] + 1
+
+        await client.put(url, json={"title": "Changed"})
+        assert (await client.get(url, params=params)).json()["title"] == "Changed"
+
+        await client.delete(url)
+        assert (await client.get(url, params=params)).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_get_prompt_not_modified(
+        self, client: AsyncClient, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test conditional GETs of a prompt and of the prompt list."""
+        await client.post("/api/v1/prompts", json=sample_prompt_data)
+        url = f"/api/v1/prompts/{sample_prompt_data['slug']}"
+
+        etag = (await client.get(url)).headers["ETag"]
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+        list_etag = (await client.get("/api/v1/prompts")).headers["ETag"]
+        assert (
+            await client.get("/api/v1/prompts", headers={"If-None-Match": list_etag})
+        ).status_code == 304
+
+        await client.put(url, json={"title": "Changed"})
+        assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 200
+        assert (
+            await client.get("/api/v1/prompts", headers={"If-None-Match": list_etag})
+        ).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_list_etag_follows_usage(
+        self, client: AsyncClient, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test that lists showing or sorted by usage are revalidated after prompts are used."""
+        await client.post("/api/v1/prompts", json=sample_prompt_data)
+        await client.post("/api/v1/prompts", json={"title": "Other", "content": "Other"})
+        popular = {"sort": "popular"}
+        etag = (await client.get("/api/v1/prompts", params=popular)).headers["ETag"]
+        headers = {"If-None-Match": etag}
+        assert (
+            await client.get("/api/v1/prompts", params=popular, headers=headers)
+        ).status_code == 304
+
+        for _ in range(3):
+            await client.get(f"/api/v1/prompts/{sample_prompt_data['slug']}")
+        response = await client.get("/api/v1/prompts", params=popular, headers=headers)
+        assert response.status_code == 200
+        first = response.json()["items"][0]
+        assert first["slug"] == sample_prompt_data["slug"]
+        assert first["usage_count"] == 3
+
+        # Without usage fields or a usage order the revision still decides
+        params = {"fields": "slug,title"}
+        etag = (await client.get("/api/v1/prompts", params=params)).headers["ETag"]
+        await client.get(f"/api/v1/prompts/{sample_prompt_data['slug']}")
+        assert (
+            await client.get("/api/v1/prompts", params=params, headers={"If-None-Match": etag})
+        ).status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_list_items_match_prompt_read(
+        self, client: AsyncClient, sample_template_data: dict[str, Any]
+    ) -> None:
+        """Test that the fast list serialization matches the PromptRead output."""
+        await client.post("/api/v1/prompts", json=sample_template_data)
+        url = f"/api/v1/prompts/{sample_template_data['slug']}"
+        prompt = (await client.get(url, params={"increment_usage": "false"})).json()
+
+        listed = (await client.get("/api/v1/prompts")).json()
+        assert listed["items"] == [prompt]
+
+    @pytest.mark.asyncio
+    async def test_list_sparse_fields(
+        self, client: AsyncClient, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test that fields/exclude limit the returned item fields."""
+        await client.post("/api/v1/prompts", json=sample_prompt_data)
+
+        response = await client.get("/api/v1/prompts", params={"fields": "title,usage_count"})
+        assert response.status_code == 200
+        assert response.json()["items"] == [
+            {"slug": "test-prompt", "title": "Test Prompt", "usage_count": 0}
+        ]
+
+        response = await client.get(
+            "/api/v1/prompts", params={"exclude": "content,success_notes,failure_notes"}
+        )
+        item = response.json()["items"][0]
+        assert "content" not in item
+        assert item["description"] == sample_prompt_data["description"]
+
+        response = await client.get("/api/v1/prompts", params={"fields": "nope"})
+        assert response.status_code == 400
+
     @pytest.mark.asyncio
     async def test_update_prompt(
         self, client: AsyncClient, sample_prompt_data: dict[str, Any]
@@ -185,6 +357,69 @@ class TestPromptEndpoints:
         assert data["total"] == 1
         assert data["items"][0]["title"] == "Hello World"
 
+    @pytest.mark.asyncio
+    async def test_list_prompts_search_relevance(self, client: AsyncClient) -> None:
+        """Test ranking search results by relevance."""
+        await client.post(
+            "/api/v1/prompts",
+            json={"title": "Hello World", "content": "greeting"},
+        )
+        await client.post(
+            "/api/v1/prompts",
+            json={"title": "Greeting", "content": "Say hello politely"},
+        )
+
+        response = await client.get(
+            "/api/v1/prompts", params={"q": "hello", "sort": "relevance", "page_size": 1}
+        )
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["total"] == 2
+        assert data["items"][0]["title"] == "Hello World"
+
+    @pytest.mark.asyncio
+    async def test_list_prompts_cursor(self, client: AsyncClient) -> None:
+        """Test paging through prompts with next_cursor."""
+        for i in range(3):
+            await client.post("/api/v1/prompts", json={"title": f"P {i}", "content": "c"})
+
+        first = (await client.get("/api/v1/prompts", params={"page_size": 2})).json()
+        assert len(first["items"]) == 2
+        assert first["next_cursor"]
+
+        response = await client.get(
+            "/api/v1/prompts", params={"page_size": 2, "cursor": first["next_cursor"]}
+        )
+        assert response.status_code == 200
+
+        second = response.json()
+        assert len(second["items"]) == 1
+        assert second["next_cursor"] is None
+        slugs = {item["slug"] for item in first["items"] + second["items"]}
+        assert len(slugs) == 3
+
+    @pytest.mark.asyncio
+    async def test_list_prompts_without_total(
+        self, client: AsyncClient, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test skipping the total count."""
+        await client.post("/api/v1/prompts", json=sample_prompt_data)
+
+        response = await client.get("/api/v1/prompts", params={"include_total": "false"})
+        assert response.status_code == 200
+
+        data = response.json()
+        assert len(data["items"]) == 1
+        assert data["total"] is None
+        assert data["pages"] is None
+
+    @pytest.mark.asyncio
+    async def test_list_prompts_invalid_cursor(self, client: AsyncClient) -> None:
+        """Test that a malformed cursor is a client error."""
+        response = await client.get("/api/v1/prompts", params={"cursor": "garbage"})
+        assert response.status_code == 400
+
     @pytest.mark.asyncio
     async def test_list_versions(
         self, client: AsyncClient, sample_prompt_data: dict[str, Any]
@@ -207,6 +442,14 @@ class TestPromptEndpoints:
         assert len(versions) == 2
         assert versions[0]["version"] == 2
         assert versions[1]["version"] == 1
+        assert versions[0]["content"] == "Version 2"
+
+        response = await client.get(
+            f"/api/v1/prompts/{sample_prompt_data['slug']}/versions",
+            params={"content": "false"},
+        )
+        assert [v["version"] for v in response.json()] == [2, 1]
+        assert all("content" not in v for v in response.json())
 
     @pytest.mark.asyncio
     async def test_get_version(
@@ -232,6 +475,19 @@ class TestPromptEndpoints:
 class TestStatsEndpoints:
     """Tests for stats endpoints."""
 
+    @pytest.mark.asyncio
+    async def test_stats_etag_follows_usage(
+        self, client: AsyncClient, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test that stats are revalidated by content, since usage keeps the revision."""
+        await client.post("/api/v1/prompts", json=sample_prompt_data)
+        etag = (await client.get("/api/v1/stats")).headers["ETag"]
+        headers = {"If-None-Match": etag}
+        assert (await client.get("/api/v1/stats", headers=headers)).status_code == 304
+
+        await client.get(f"/api/v1/prompts/{sample_prompt_data['slug']}")
+        assert (await client.get("/api/v1/stats", headers=headers)).status_code == 200
+
     @pytest.mark.asyncio
     async def test_get_stats(self, client: AsyncClient) -> None:
         """Test getting statistics."""
@@ -263,6 +519,29 @@ class TestStatsEndpoints:
         assert data["total_categories"] == 2
         assert data["total_tags"] == 2
 
+    @pytest.mark.asyncio
+    async def test_get_usage_series(
+        self, client: AsyncClient, test_session: AsyncSession, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test daily usage buckets built from the rollups."""
+        await client.post("/api/v1/prompts", json=sample_prompt_data)
+        slug = sample_prompt_data["slug"]
+        await client.get(f"/api/v1/prompts/{slug}")
+        await client.get(f"/api/v1/prompts/{slug}")
+        await PromptRepository(test_session).rollup_usage()
+
+        response = await client.get("/api/v1/stats/usage", params={"periods": 7, "slug": slug})
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["granularity"] == "day"
+        assert data["total"] == 2
+        assert len(data["buckets"]) == 7
+        assert data["buckets"][-1]["count"] == 2
+
+        response = await client.get("/api/v1/stats/usage", params={"slug": "missing"})
+        assert response.status_code == 404
+
     @pytest.mark.asyncio
     async def test_get_categories(self, client: AsyncClient) -> None:
         """Test getting categories."""
@@ -307,3 +586,249 @@ class TestStatsEndpoints:
         python_tag = next((t for t in tags if t["tag"] == "python"), None)
         assert python_tag is not None
         assert python_tag["count"] == 2
+
+
+class TestRenderEndpoints:
+    """Tests for batch rendering."""
+
+    @pytest.mark.asyncio
+    async def test_render_batch(
+        self, client: AsyncClient, sample_template_data: dict[str, Any]
+    ) -> None:
+        """Test rendering several jobs with per-item errors."""
+        await client.post("/api/v1/prompts", json=sample_template_data)
+        slug = sample_template_data["slug"]
+
+        response = await client.post(
+            "/api/v1/render/batch",
+            json={
+                "jobs": [
+                    {"slug": slug, "variables": {"name": "Ada", "place": "London"}},
+                    {"slug": "missing"},
+                ],
+                "slug": slug,
+                "variable_sets": [{"name": "Bob", "place": "Paris"}, {"name": "Eve"}],
+            },
+        )
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["rendered"] == 2
+        assert data["failed"] == 2
+        results = data["results"]
+        assert results[0]["content"] == "Hello Ada, welcome to London!"
+        assert "not found" in results[1]["error"]
+        assert results[2]["content"] == "Hello Bob, welcome to Paris!"
+        assert results[3]["content"] is None
+        assert "place" in results[3]["error"]
+
+        prompt = await client.get(f"/api/v1/prompts/{slug}", params={"increment_usage": "false"})
+        assert prompt.json()["usage_count"] == 2
+
+
+class TestBackupEndpoints:
+    """Tests for /api/v1/export."""
+
+    @pytest.mark.asyncio
+    async def test_export_ndjson(
+        self, client: AsyncClient, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test streaming every prompt as one JSON object per line."""
+        for i in range(3):
+            await client.post(
+                "/api/v1/prompts", json={**sample_prompt_data, "slug": f"prompt-{i}"}
+            )
+        await client.put("/api/v1/prompts/prompt-0", json={"content": "Version 2"})
+
+        response = await client.get("/api/v1/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        records = sorted(
+            (json.loads(line) for line in response.text.splitlines()), key=lambda r: r["slug"]
+        )
+        assert [r["slug"] for r in records] == ["prompt-0", "prompt-1", "prompt-2"]
+        assert records[0]["content"] == "Version 2"
+        assert "versions" not in records[0]
+
+        listed = await client.get("/api/v1/prompts/prompt-1", params={"increment_usage": "false"})
+        assert records[1] == listed.json()
+
+        response = await client.get("/api/v1/export", params={"versions": "true"})
+        records = sorted(
+            (json.loads(line) for line in response.text.splitlines()), key=lambda r: r["slug"]
+        )
+        assert [v["content"] for v in records[0]["versions"]] == [
+            sample_prompt_data["content"],
+            "Version 2",
+        ]
+        assert len(records[2]["versions"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_import_ndjson(self, client: AsyncClient) -> None:
+        """Test importing NDJSON with slug collisions and per-line errors."""
+        await client.post("/api/v1/prompts", json={"slug": "taken", "title": "T", "content": "x"})
+        lines = [
+            {"slug": "taken", "title": "Renamed", "content": "Hello {{ name }}"},
+            {"title": "Auto Slug", "content": "plain", "tags": ["a", "a", "b"]},
+            {"slug": "taken", "title": "Renamed again", "content": "y"},
+            {"slug": "Bad Slug", "title": "Bad", "content": "z"},
+            {"slug": "broken", "title": "Broken", "content": "{% if %}", "is_template": True},
+            {"title": "Stale", "content": "new", "versions": [{"version": 1, "content": "old"}]},
+        ]
+        body = "\n".join(json.dumps(line) for line in lines) + "\n\nnot json\n"
+
+        response = await client.post(
+            "/api/v1/import", content=body.encode(), params={"batch_size": 2}
+        )
+        assert response.status_code == 200
+
+        data = response.json()
+        assert (data["created"], data["skipped"], data["failed"]) == (3, 0, 4)
+        results = data["results"]
+        assert [r["line"] for r in results] == [1, 2, 3, 4, 5, 6, 8]
+        assert [r["slug"] for r in results[:3]] == ["taken-1", "auto-slug", "taken-2"]
+        assert "slug" in results[3]["error"]
+        assert "Invalid template" in results[4]["error"]
+        assert "newest entry of versions" in results[5]["error"]
+        assert "JSON" in results[6]["error"]
+
+        prompt = (await client.get("/api/v1/prompts/taken-1")).json()
+        assert prompt["is_template"] is True
+        assert prompt["template_variables"] == ["name"]
+        assert prompt["version"] == 1
+        tagged = await client.get("/api/v1/prompts", params={"tags": "a,b"})
+        assert [p["slug"] for p in tagged.json()["items"]] == ["auto-slug"]
+
+        response = await client.post(
+            "/api/v1/import", content=json.dumps(lines[0]), params={"on_conflict": "skip"}
+        )
+        assert response.json()["results"] == [
+            {"line": 1, "status": "skipped", "slug": "taken", "error": "Slug already exists"}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_export_import_round_trip(
+        self, client: AsyncClient, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test that an export with history imports back into an empty library."""
+        await client.post("/api/v1/prompts", json=sample_prompt_data)
+        slug = sample_prompt_data["slug"]
+        await client.put(f"/api/v1/prompts/{slug}", json={"content": "Version 2"})
+        await client.get(f"/api/v1/prompts/{slug}")
+        exported = (await client.get("/api/v1/export", params={"versions": "true"})).content
+        original = json.loads(exported)
+        await client.delete(f"/api/v1/prompts/{slug}")
+
+        response = await client.post("/api/v1/import", content=exported)
+        assert response.json()["created"] == 1
+
+        params = {"increment_usage": "false"}
+        prompt = (await client.get(f"/api/v1/prompts/{slug}", params=params)).json()
+        assert prompt["content"] == "Version 2"
+        assert prompt["version"] == 2
+        for field in ("created_at", "updated_at", "usage_count", "last_used_at"):
+            assert prompt[field] == original[field]
+        assert prompt["usage_count"] == 1
+        versions = (await client.get(f"/api/v1/prompts/{slug}/versions")).json()
+        assert [v["content"] for v in versions] == ["Version 2", sample_prompt_data["content"]]
+
+
+    @pytest.mark.asyncio
+    async def test_import_commits_each_batch(self, test_engine: AsyncEngine) -> None:
+        """Test that no transaction is held open while the next lines are read."""
+        sessions = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        async with sessions() as session:
+
+            async def lines() -> AsyncIterator[bytes]:
+                for number in range(3):
+                    assert not session.in_transaction()
+                    yield json.dumps({"title": f"Prompt {number}", "content": "x"}).encode()
+
+            result = await PromptService(session).import_prompts(lines(), batch_size=1)
+            assert result.created == 3
+
+
+class TestReadReplicas:
+    """Tests for read-your-writes routing."""
+
+    @pytest.mark.asyncio
+    async def test_writes_pin_reads_to_primary(self) -> None:
+        """Test that a successful write pins the client's reads to the primary."""
+        app = FastAPI()
+        app.add_middleware(ReadYourWritesMiddleware, window=5)
+
+        @app.post("/write")
+        async def write() -> dict[str, Any]:
+            return {}
+
+        @app.get("/read")
+        async def read(request: Request) -> dict[str, bool]:
+            return {"primary": reads_from_primary(request)}
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+            assert (await c.get("/read")).json() == {"primary": False}
+            await c.post("/write")
+            assert (await c.get("/read")).json() == {"primary": True}
+
+            c.cookies.set(PRIMARY_COOKIE, str(time.time() - 1))
+            assert (await c.get("/read")).json() == {"primary": False}
+
+    @pytest.mark.asyncio
+    async def test_cookieless_client_reads_its_write(
+        self,
+        test_session: AsyncSession,
+        sample_prompt_data: dict[str, Any],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a client without a cookie jar reads from the primary after a write."""
+        # The replica has the schema but never receives the write
+        lagging = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with lagging.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        monkeypatch.setattr(deps, "replica_engines", [lagging])
+
+        async def primary() -> AsyncIterator[AsyncSession]:
+            yield test_session
+
+        async def replica() -> AsyncIterator[AsyncSession]:
+            async with AsyncSession(lagging) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = primary
+        app.dependency_overrides[get_read_session] = replica
+        slug = sample_prompt_data["slug"]
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://t") as c:
+                assert (await c.post("/api/v1/prompts", json=sample_prompt_data)).is_success
+                c.cookies.clear()
+                params = {"increment_usage": "false"}
+                assert (await c.get(f"/api/v1/prompts/{slug}", params=params)).status_code == 200
+
+                # Once the window has passed, reads go to the lagging replica
+                service._recent_writes.clear()
+                service.prompt_cache.clear()
+                assert (await c.get(f"/api/v1/prompts/{slug}", params=params)).status_code == 404
+        finally:
+            app.dependency_overrides.clear()
+            await lagging.dispose()
+
+    @pytest.mark.asyncio
+    async def test_recent_write_not_cached_from_replica(
+        self, test_engine: AsyncEngine, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test that a replica read right after a write does not fill the cache."""
+        sessions = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        async with sessions() as session, sessions() as replica:
+            await PromptService(session).create_prompt(PromptCreate(**sample_prompt_data))
+            slug = sample_prompt_data["slug"]
+            service._recent_writes.set(slug, True)
+            try:
+                from_replica = PromptService(session, replica)
+                assert await from_replica.get_prompt_read(slug, increment_usage=False)
+                assert service.prompt_cache.get(slug) is None
+
+                from_primary = PromptService(session, session)
+                assert await from_primary.get_prompt_read(slug, increment_usage=False)
+                assert service.prompt_cache.get(slug) is not None
+            finally:
+                service._recent_writes.clear()
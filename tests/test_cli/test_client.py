@@ -0,0 +1,61 @@
+"""Tests for the API client."""
+
+import gzip
+from pathlib import Path
+
+import httpx
+import pytest
+
+from prompt_manager.cli.archive import open_archive
+from prompt_manager.cli.client import APIClient, ResponseCache
+from prompt_manager.core.config import settings
+
+
+class TestAPIClient:
+    """Tests for APIClient."""
+
+    def test_get_prompt_revalidates_cached_copy(self, tmp_path: Path) -> None:
+        """Test that a cached prompt is reused when the server answers 304."""
+        requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304, headers={"ETag": '"v1"'})
+            return httpx.Response(200, json={"slug": "p"}, headers={"ETag": '"v1"'})
+
+        client = APIClient(base_url="http://test", cache=ResponseCache(tmp_path))
+        client._client = httpx.Client(
+            base_url="http://test", transport=httpx.MockTransport(handler)
+        )
+        with client:
+            assert client.get_prompt("p") == {"slug": "p"}
+            assert client.get_prompt("p") == {"slug": "p"}
+
+        assert "If-None-Match" not in requests[0].headers
+        assert requests[1].headers["If-None-Match"] == '"v1"'
+
+    def test_cache_can_be_disabled(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that cache=False skips the default disk cache."""
+        monkeypatch.setattr(settings, "config_dir", tmp_path)
+        assert APIClient(base_url="http://test").cache is not None
+        assert APIClient(base_url="http://test", cache=False).cache is None
+
+    def test_export_writes_compressed_stream(self, tmp_path: Path) -> None:
+        """Test that the export stream is written through gzip as it arrives."""
+        body = b'{"slug": "a"}\n{"slug": "b"}\n'
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.url.params["versions"] == "true"
+            return httpx.Response(200, content=body)
+
+        client = APIClient(base_url="http://test", cache=False)
+        client._client = httpx.Client(
+            base_url="http://test", transport=httpx.MockTransport(handler)
+        )
+        path = tmp_path / "prompts.ndjson.gz"
+        with client, open_archive(path, "wb") as out:
+            for chunk in client.export_prompts(versions=True):
+                out.write(chunk)
+
+        assert gzip.decompress(path.read_bytes()) == body
@@ -0,0 +1,60 @@
+"""Tests for in-process caches."""
+
+from prompt_manager.core.cache import LRUCache
+
+
+class TestLRUCache:
+    """Tests for LRUCache."""
+
+    def test_get_and_set(self) -> None:
+        """Test storing and retrieving values with hit/miss counters."""
+        cache: LRUCache[str, int] = LRUCache(maxsize=2)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test that the least recently used entry is evicted first."""
+        cache: LRUCache[str, int] = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_byte_limit(self) -> None:
+        """Test eviction by total size and skipping oversized values."""
+        cache: LRUCache[str, str] = LRUCache(maxsize=10, max_bytes=10)
+        cache.set("a", "x", size=6)
+        cache.set("b", "y", size=6)
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 6
+
+        cache.set("huge", "z", size=11)
+        assert cache.get("huge") is None
+        assert cache.get("b") == "y"
+
+    def test_ttl_expiry(self) -> None:
+        """Test that expired entries are treated as misses."""
+        cache: LRUCache[str, int] = LRUCache(ttl=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_items(self) -> None:
+        """Test listing live entries in LRU order."""
+        cache: LRUCache[str, int] = LRUCache(maxsize=3)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        assert cache.items() == [("b", 2), ("a", 1)]
+
+        expired: LRUCache[str, int] = LRUCache(ttl=0)
+        expired.set("a", 1)
+        assert expired.items() == []
@@ -0,0 +1,148 @@
+"""Tests for database engine setup."""
+
+from pathlib import Path
+
+import pytest
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from prompt_manager.core import database
+from prompt_manager.core.config import settings
+from prompt_manager.core.models import SCHEMA_REVISION
+
+
+class TestSQLiteProfile:
+    """Tests for the SQLite storage profile."""
+
+    def test_is_sqlite_file(self) -> None:
+        """Test that only file databases get the profile."""
+        assert database.is_sqlite_file("sqlite+aiosqlite:///./prompts.db")
+        assert not database.is_sqlite_file("sqlite+aiosqlite:///:memory:")
+        assert not database.is_sqlite_file("postgresql+asyncpg://u:p@db/prompts")
+
+    @pytest.mark.asyncio
+    async def test_read_engine_alongside_writer(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that readers are not blocked by an open write transaction."""
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/pm.db")
+        write_engine, read_engine = database.create_engines()
+        try:
+            async with write_engine.begin() as conn:
+                assert await conn.scalar(text("PRAGMA journal_mode")) == "wal"
+                assert await conn.scalar(text("PRAGMA synchronous")) == 1  # NORMAL
+                await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+
+            async with write_engine.begin() as writer:
+                await writer.execute(text("INSERT INTO t VALUES (1)"))
+                async with read_engine.connect() as reader:
+                    assert await reader.scalar(text("SELECT count(*) FROM t")) == 0
+                    with pytest.raises(OperationalError, match="readonly"):
+                        await reader.execute(text("INSERT INTO t VALUES (2)"))
+
+            async with read_engine.connect() as reader:
+                assert await reader.scalar(text("SELECT count(*) FROM t")) == 1
+        finally:
+            await write_engine.dispose()
+            await read_engine.dispose()
+
+
+class TestServerPool:
+    """Tests for connection pool settings and metrics."""
+
+    def test_asyncpg_connect_args(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the statement cache and timeout reach asyncpg."""
+        monkeypatch.setattr(settings, "db_statement_cache_size", 50)
+        monkeypatch.setattr(settings, "db_statement_timeout_ms", 2000)
+        assert database.server_connect_args("postgresql+asyncpg://u:p@db/prompts") == {
+            "prepared_statement_cache_size": 50,
+            "server_settings": {"statement_timeout": "2000"},
+        }
+        monkeypatch.setattr(settings, "db_statement_timeout_ms", 0)
+        assert "server_settings" not in database.server_connect_args(
+            "postgresql+asyncpg://u:p@db/prompts"
+        )
+        assert database.server_connect_args("mysql+aiomysql://u:p@db/prompts") == {}
+
+    @pytest.mark.asyncio
+    async def test_pool_stats(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that checkouts, saturation and timeouts are counted."""
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/pm.db")
+        write_engine, read_engine = database.create_engines()
+        pool = write_engine.sync_engine.pool
+        assert isinstance(pool, database.MeteredPool)
+        pool._timeout = 0.05
+        try:
+            async with write_engine.connect():
+                stats = pool.stats()
+                assert stats["checked_out"] == 1
+                assert stats["saturation"] == 1.0
+                with pytest.raises(PoolTimeoutError):
+                    async with write_engine.connect():
+                        pass
+
+            stats = pool.stats()
+            assert stats["checked_out"] == 0
+            assert stats["checkouts"] == 1
+            assert stats["timeouts"] == 1
+            assert stats["waiting"] == 0
+        finally:
+            await write_engine.dispose()
+            await read_engine.dispose()
+
+
+class TestSchema:
+    """Tests for creating and checking the schema at startup."""
+
+    def test_schema_revision_is_alembic_head(self) -> None:
+        """Test that the revision stamped by init_db is the latest migration."""
+        alembic_dir = Path(__file__).parents[2] / "alembic"
+        assert ScriptDirectory(str(alembic_dir)).get_current_head() == SCHEMA_REVISION
+
+    @pytest.mark.asyncio
+    async def test_init_db_stamps_new_database(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a created database records its revision and passes the check."""
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/pm.db")
+        write_engine, read_engine = database.create_engines()
+        monkeypatch.setattr(database, "engine", write_engine)
+        try:
+            await database.init_db()
+            await database.init_db()
+            async with write_engine.connect() as conn:
+                versions = await conn.execute(text("SELECT version_num FROM alembic_version"))
+                assert versions.scalars().all() == [SCHEMA_REVISION]
+        finally:
+            await write_engine.dispose()
+            await read_engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_init_db_rejects_unmigrated_database(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that an unstamped database from an older init-db fails clearly, untouched."""
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/pm.db")
+        write_engine, read_engine = database.create_engines()
+        monkeypatch.setattr(database, "engine", write_engine)
+        try:
+            async with write_engine.begin() as conn:
+                await conn.execute(
+                    text("CREATE TABLE prompts (id VARCHAR(36) PRIMARY KEY, slug VARCHAR(255))")
+                )
+            with pytest.raises(database.SchemaOutOfDateError, match="alembic stamp 001"):
+                await database.init_db()
+            async with write_engine.connect() as conn:
+                tables = await conn.run_sync(lambda sync: inspect(sync).get_table_names())
+            assert tables == ["prompts"]
+
+            async with write_engine.begin() as conn:
+                await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32))"))
+                await conn.execute(text("INSERT INTO alembic_version VALUES ('005')"))
+            with pytest.raises(database.SchemaOutOfDateError, match="revision 005"):
+                await database.init_db()
+        finally:
+            await write_engine.dispose()
+            await read_engine.dispose()
@@ -0,0 +1,78 @@
+"""Tests for cross-worker cache invalidation."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from prompt_manager.core import database
+from prompt_manager.core.config import settings
+from prompt_manager.core.invalidation import InvalidationBus, PollingInvalidationBus
+from prompt_manager.core.models import Base
+
+
+class TestInvalidationBus:
+    """Tests for the invalidation buses."""
+
+    @pytest.mark.asyncio
+    async def test_local_delivery(self) -> None:
+        """Test that publishing notifies local subscribers once per slug."""
+        bus = InvalidationBus()
+        received: list[str] = []
+        bus.subscribe(received.append)
+
+        await bus.publish(["a", "b", "a"])
+        assert received == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_polling_reaches_other_workers(self, test_engine: AsyncEngine) -> None:
+        """Test that a slug published by one worker is delivered to another."""
+        writer, reader = PollingInvalidationBus(interval=60), PollingInvalidationBus(interval=60)
+        written: list[str] = []
+        read: list[str] = []
+        writer.subscribe(written.append)
+        reader.subscribe(read.append)
+
+        await writer.start(test_engine)
+        await reader.start(test_engine)
+        try:
+            await writer.publish(["a", "b"])
+            await reader.poll()
+            await writer.poll()
+        finally:
+            await writer.stop()
+            await reader.stop()
+
+        assert read == ["a", "b"]
+        # The publisher invalidated its own caches immediately and skips its echo
+        assert written == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_polling_reads_alongside_writer(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that polling SQLite uses the read engine, not the single write connection."""
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/pm.db")
+        write_engine, read_engine = database.create_engines()
+        async with write_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        publisher, poller = PollingInvalidationBus(interval=60), PollingInvalidationBus(interval=60)
+        received: list[str] = []
+        poller.subscribe(received.append)
+        await publisher.start(write_engine, read_engine)
+        await poller.start(write_engine, read_engine)
+        try:
+            await publisher.publish(["a"])
+            # A group commit holds the only write connection and the write lock
+            async with write_engine.begin() as writer:
+                await writer.execute(text("DELETE FROM library_revision WHERE 0"))
+                await asyncio.wait_for(poller.poll(), 2)
+        finally:
+            await publisher.stop()
+            await poller.stop()
+            await write_engine.dispose()
+            await read_engine.dispose()
+
+        assert received == ["a"]
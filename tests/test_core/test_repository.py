@@ -1,12 +1,27 @@
 """Tests for repository layer."""
 
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Any
 
 import pytest
 import pytest_asyncio
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from prompt_manager.core.repository import PromptRepository
+from sqlalchemy import event, select, text, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from prompt_manager.core.config import settings
+from prompt_manager.core.models import Base, Prompt, PromptTag, PromptVersion
+from prompt_manager.core.pagination import InvalidCursorError
+from prompt_manager.core.repository import PromptRepository, _count_cache
 from prompt_manager.core.schemas import PromptCreate, PromptUpdate
 
 
@@ -67,6 +82,31 @@ class TestPromptRepository:
         assert prompt is not None
         assert prompt.id == created.id
 
+    @pytest.mark.asyncio
+    async def test_text_columns_deferred(
+        self, repo: PromptRepository, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Metadata lookups leave the text columns unloaded; full lookups load them."""
+        await repo.create(PromptCreate(**sample_prompt_data))
+        slug = sample_prompt_data["slug"]
+
+        repo.session.expunge_all()
+        prompt = await repo.get_by_slug(slug, with_text=False)
+        assert prompt is not None
+        unloaded = sa_inspect(prompt).unloaded
+        assert {"content", "description", "success_notes", "failure_notes"} <= unloaded
+        assert "title" not in unloaded
+
+        repo.session.expunge_all()
+        prompt = await repo.get_by_slug(slug)
+        assert prompt is not None
+        assert "content" not in sa_inspect(prompt).unloaded
+        assert prompt.content == sample_prompt_data["content"]
+
+        repo.session.expunge_all()
+        page = await repo.list_prompts()
+        assert page.items[0].content == sample_prompt_data["content"]
+
     @pytest.mark.asyncio
     async def test_get_by_slug_not_found(self, repo: PromptRepository) -> None:
         """Test getting a non-existent prompt."""
@@ -139,7 +179,7 @@ class TestPromptRepository:
             )
             await repo.create(data)
 
-        prompts, total = await repo.list_prompts(page=1, page_size=10)
+        prompts, total, _ = await repo.list_prompts(page=1, page_size=10)
         assert total == 5
         assert len(prompts) == 5
 
@@ -158,7 +198,7 @@ class TestPromptRepository:
             )
             await repo.create(data)
 
-        prompts, total = await repo.list_prompts(category="code")
+        prompts, total, _ = await repo.list_prompts(category="code")
         assert total == 2
         assert all(p.category == "code" for p in prompts)
 
@@ -180,10 +220,157 @@ class TestPromptRepository:
             )
         )
 
-        prompts, total = await repo.list_prompts(search="hello")
+        prompts, total, _ = await repo.list_prompts(search="hello")
         assert total == 1
         assert prompts[0].slug == "hello-world"
 
+    @pytest.mark.asyncio
+    async def test_list_prompts_search_content_prefix(self, repo: PromptRepository) -> None:
+        """Test that search matches word prefixes in any indexed field."""
+        await repo.create(
+            PromptCreate(slug="review", title="Review", content="Summarize the pull request")
+        )
+        await repo.create(PromptCreate(slug="other", title="Other", content="Unrelated"))
+
+        prompts, total, _ = await repo.list_prompts(search="summar pull")
+        assert total == 1
+        assert prompts[0].slug == "review"
+
+    @pytest.mark.asyncio
+    async def test_list_prompts_search_tracks_updates(self, repo: PromptRepository) -> None:
+        """Test that the search index follows updates and deletes."""
+        await repo.create(PromptCreate(slug="doc", title="Doc", content="old wording"))
+
+        await repo.update("doc", PromptUpdate(content="fresh wording"))
+        _, old_total, _ = await repo.list_prompts(search="old")
+        _, new_total, _ = await repo.list_prompts(search="fresh")
+        assert old_total == 0
+        assert new_total == 1
+
+        await repo.delete("doc")
+        _, total, _ = await repo.list_prompts(search="fresh")
+        assert total == 0
+
+    @pytest.mark.asyncio
+    async def test_search_index_rebuilt_on_startup(self, tmp_path: Path) -> None:
+        """Test that startup rebuilds an FTS index only once its rowids were renumbered."""
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/pm.db")
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        statements: list[str] = []
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with sessions() as session:
+                repo = PromptRepository(session)
+                for name in ("beta", "gamma"):
+                    await repo.create(PromptCreate(slug=name, title=name.title(), content=name))
+            statements.clear()
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            assert not any("'rebuild'" in statement for statement in statements)
+
+            # Renumber rowids the way a VACUUM may, without firing the index triggers
+            async with engine.begin() as conn:
+                await conn.execute(text("UPDATE prompts SET rowid = rowid + 100"))
+            async with sessions() as session:
+                page = await PromptRepository(session).list_prompts(search="gamma")
+                assert page.items == []
+
+            statements.clear()
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            assert any("'rebuild'" in statement for statement in statements)
+            async with sessions() as session:
+                page = await PromptRepository(session).list_prompts(search="gamma")
+                assert [p.slug for p in page.items] == ["gamma"]
+        finally:
+            await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_list_prompts_relevance_sort(self, repo: PromptRepository) -> None:
+        """Test that relevance ranks title matches above content matches."""
+        await repo.create(
+            PromptCreate(slug="title-match", title="Python Tips", content="General advice")
+        )
+        await repo.create(
+            PromptCreate(slug="body-match", title="Notes", content="Mentions python once")
+        )
+
+        prompts, total, _ = await repo.list_prompts(search="python", sort="relevance")
+        assert total == 2
+        assert [p.slug for p in prompts] == ["title-match", "body-match"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("sort", ["created", "updated", "popular", "recent", "relevance"])
+    async def test_list_prompts_cursor_walks_all(
+        self, repo: PromptRepository, sort: str
+    ) -> None:
+        """Test that following cursors visits every prompt exactly once."""
+        for i in range(7):
+            await repo.create(
+                PromptCreate(slug=f"prompt-{i}", title=f"Prompt {i}", content="shared words")
+            )
+        # Give some prompts usage so popular/recent have ties, values and NULLs
+        for slug in ["prompt-1", "prompt-4", "prompt-4"]:
+            await repo.increment_usage(slug)
+
+        seen: list[str] = []
+        cursor = None
+        while True:
+            prompts, total, cursor = await repo.list_prompts(
+                page_size=3, search="shared", sort=sort, cursor=cursor
+            )
+            seen.extend(p.slug for p in prompts)
+            if cursor is None:
+                break
+
+        assert total == 7
+        assert sorted(seen) == [f"prompt-{i}" for i in range(7)]
+
+    @pytest.mark.asyncio
+    async def test_list_prompts_invalid_cursor(self, repo: PromptRepository) -> None:
+        """Test that malformed or mismatched cursors are rejected."""
+        with pytest.raises(InvalidCursorError):
+            await repo.list_prompts(cursor="not-a-cursor")
+
+        for i in range(2):
+            await repo.create(PromptCreate(slug=f"p-{i}", title=f"P {i}", content="c"))
+        _, _, cursor = await repo.list_prompts(page_size=1, sort="popular")
+        assert cursor is not None
+        with pytest.raises(InvalidCursorError):
+            await repo.list_prompts(cursor=cursor, sort="created")
+
+        # Well-formed cursors whose key has the wrong type for the sort order
+        for sort, value in (("popular", "1"), ("popular", True), ("created", 5), ("recent", [])):
+            payload = json.dumps([sort, value, "id"]).encode()
+            crafted = base64.urlsafe_b64encode(payload).decode()
+            with pytest.raises(InvalidCursorError):
+                await repo.list_prompts(cursor=crafted, sort=sort)
+
+    @pytest.mark.asyncio
+    async def test_list_prompts_total_modes(self, repo: PromptRepository) -> None:
+        """Test skipping and estimating the total count."""
+        _count_cache.clear()
+        await repo.create(PromptCreate(slug="a", title="A", content="c", category="x"))
+
+        _, total, _ = await repo.list_prompts(category="x", total_mode="none")
+        assert total is None
+
+        _, estimated, _ = await repo.list_prompts(category="x", total_mode="estimated")
+        assert estimated == 1
+
+        # Estimates are served from the cache until it expires
+        await repo.create(PromptCreate(slug="b", title="B", content="c", category="x"))
+        _, estimated, _ = await repo.list_prompts(category="x", total_mode="estimated")
+        _, exact, _ = await repo.list_prompts(category="x")
+        assert estimated == 1
+        assert exact == 2
+
     @pytest.mark.asyncio
     async def test_increment_usage(
         self, repo: PromptRepository, sample_prompt_data: dict[str, Any]
@@ -217,6 +404,56 @@ class TestPromptRepository:
         assert versions[1].version == 2
         assert versions[2].version == 1
 
+    @pytest.mark.asyncio
+    async def test_versions_stored_as_deltas(
+        self,
+        repo: PromptRepository,
+        sample_prompt_data: dict[str, Any],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that history is stored as snapshots and deltas and read back whole."""
+        monkeypatch.setattr(settings, "version_snapshot_interval", 5)
+        lines = [f"Line {i} of a long prompt\n" for i in range(50)]
+        contents = ["".join(lines)]
+        created = await repo.create(PromptCreate(**{**sample_prompt_data, "content": contents[0]}))
+        for version in range(2, 13):
+            lines[version] = f"Edited for version {version}\n"
+            contents.append("".join(lines))
+            await repo.update(created.slug, PromptUpdate(content=contents[-1]))
+
+        result = await repo.session.execute(
+            select(PromptVersion.version).where(PromptVersion.content.isnot(None))
+        )
+        assert sorted(result.scalars()) == [1, 6, 11]
+
+        repo.session.expunge_all()
+        assert [v.content for v in await repo.get_versions(created.slug)] == contents[::-1]
+        repo.session.expunge_all()
+        for version in (4, 9, 12):
+            record = await repo.get_version(created.slug, version)
+            assert record is not None
+            assert record.content == contents[version - 1]
+
+    @pytest.mark.asyncio
+    async def test_update_diffs_against_stored_history(
+        self, repo: PromptRepository, sample_prompt_data: dict[str, Any]
+    ) -> None:
+        """Test that a delta is based on the last version even if the prompt text differs."""
+        created = await repo.create(
+            PromptCreate(**{**sample_prompt_data, "content": "old 1\nold 2\nold 3\n"})
+        )
+        await repo.session.execute(
+            update(Prompt).where(Prompt.id == created.id).values(content="line A\nline B\n")
+        )
+        await repo.session.commit()
+
+        await repo.update(created.slug, PromptUpdate(content="line A\nline B\nline C\n"))
+
+        repo.session.expunge_all()
+        record = await repo.get_version(created.slug, 2)
+        assert record is not None
+        assert record.content == "line A\nline B\nline C\n"
+
     @pytest.mark.asyncio
     async def test_get_categories(self, repo: PromptRepository) -> None:
         """Test getting category list."""
@@ -255,3 +492,126 @@ class TestPromptRepository:
         assert tags["python"] == 2
         assert tags["api"] == 1
         assert tags["web"] == 1
+
+    @pytest.mark.asyncio
+    async def test_list_prompts_filter_by_tags(self, repo: PromptRepository) -> None:
+        """Test that tag filters require every requested tag."""
+        await repo.create(PromptCreate(slug="both", title="Both", content="c", tags=["a", "b"]))
+        await repo.create(PromptCreate(slug="only-a", title="A", content="c", tags=["a"]))
+
+        prompts, total, _ = await repo.list_prompts(tags=["a", "b"])
+        assert total == 1
+        assert prompts[0].slug == "both"
+
+        _, total, _ = await repo.list_prompts(tags=["a"])
+        assert total == 2
+
+    @pytest.mark.asyncio
+    async def test_tags_follow_updates_and_deletes(self, repo: PromptRepository) -> None:
+        """Test that the tag index is rewritten on update and cleared on delete."""
+        await repo.create(PromptCreate(slug="p", title="P", content="c", tags=["old", "old"]))
+        assert await repo.get_tags() == {"old": 1}
+
+        await repo.update("p", PromptUpdate(tags=["new"]))
+        assert await repo.get_tags() == {"new": 1}
+
+        await repo.delete("p")
+        assert await repo.get_tags() == {}
+
+    @pytest.mark.asyncio
+    async def test_tag_table_backfilled_on_create(
+        self, repo: PromptRepository, test_engine: AsyncEngine
+    ) -> None:
+        """Test that creating the tag table backfills it from the JSON column."""
+        await repo.create(PromptCreate(slug="p", title="P", content="c", tags=["x", "y"]))
+
+        async with test_engine.begin() as conn:
+            await conn.run_sync(PromptTag.__table__.drop)
+            await conn.run_sync(Base.metadata.create_all)
+
+        assert await repo.get_tags() == {"x": 1, "y": 1}
+
+    @pytest.mark.asyncio
+    async def test_revision_ignores_usage(self, repo: PromptRepository) -> None:
+        """Test that only prompt writes move the library revision."""
+        prompt = await repo.create(PromptCreate(slug="p", title="P", content="c"))
+        revision = await repo.get_revision()
+        await repo.add_usage({prompt.id: 3})
+        await repo.increment_usage("p")
+        assert await repo.get_revision() == revision
+
+        await repo.update("p", PromptUpdate(title="Q"))
+        assert await repo.get_revision() == revision + 1
+
+    @pytest.mark.asyncio
+    async def test_rollup_usage(self, repo: PromptRepository) -> None:
+        """Test that usage events are compacted into hourly and daily rollups."""
+        prompt = await repo.create(PromptCreate(slug="p", title="P", content="c"))
+        morning = datetime(2026, 1, 2, 9, 15)
+        await repo.add_usage({prompt.id: 2}, used_at=morning)
+        await repo.add_usage({prompt.id: 3}, used_at=morning + timedelta(hours=2))
+        assert await repo.rollup_usage() == 2
+
+        await repo.add_usage({prompt.id: 1}, used_at=morning + timedelta(minutes=30))
+        assert await repo.rollup_usage() == 1
+        assert await repo.rollup_usage() == 0
+
+        hours = await repo.get_usage_series("hour", datetime(2026, 1, 1))
+        assert hours == {datetime(2026, 1, 2, 9): 3, datetime(2026, 1, 2, 11): 3}
+        days = await repo.get_usage_series("day", datetime(2026, 1, 1), prompt.id)
+        assert days == {datetime(2026, 1, 2): 6}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_rollups(self, tmp_path: Path) -> None:
+        """Test that rollups running at once count every event exactly once."""
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/pm.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            async with sessions() as session:
+                repo = PromptRepository(session)
+                prompt = await repo.create(PromptCreate(slug="p", title="P", content="c"))
+                for minute in range(20):
+                    used_at = datetime(2026, 1, 2, 9, minute)
+                    await repo.add_usage({prompt.id: 1}, used_at=used_at)
+                await repo.rollup_usage()
+                for minute in range(20):
+                    used_at = datetime(2026, 1, 2, 9, 30 + minute)
+                    await repo.add_usage({prompt.id: 1}, used_at=used_at)
+
+            async def rollup() -> int:
+                async with sessions() as session:
+                    return await PromptRepository(session).rollup_usage()
+
+            assert sum(await asyncio.gather(*(rollup() for _ in range(4)))) == 20
+
+            async with sessions() as session:
+                hours = await PromptRepository(session).get_usage_series(
+                    "hour", datetime(2026, 1, 1)
+                )
+            assert hours == {datetime(2026, 1, 2, 9): 40}
+        finally:
+            await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_get_stats_snapshot(self, repo: PromptRepository) -> None:
+        """Test stats lists and that the snapshot is reused until the next write."""
+        a = await repo.create(PromptCreate(slug="a", title="A", content="c", category="x"))
+        b = await repo.create(PromptCreate(slug="b", title="B", content="c", tags=["t"]))
+        await repo.create(PromptCreate(slug="c", title="C", content="c", category="x"))
+        await repo.add_usage({a.id: 1, b.id: 3})
+
+        stats = await repo.get_stats()
+        assert stats["total_prompts"] == 3
+        assert stats["total_usage"] == 4
+        assert stats["total_categories"] == 1
+        assert stats["total_tags"] == 1
+        assert [p.slug for p in stats["most_used"]][:2] == ["b", "a"]
+        assert {p.slug for p in stats["recently_used"]} == {"a", "b"}
+        assert len(stats["recently_added"]) == 3
+        assert await repo.get_stats() is stats
+
+        await repo.delete("c")
+        stats = await repo.get_stats()
+        assert stats["total_prompts"] == 2
@@ -1,8 +1,12 @@
 """Tests for template engine."""
 
+import asyncio
+from typing import Literal
+
 import pytest
 
-from prompt_manager.core.templates import TemplateEngine, TemplateRenderError
+from prompt_manager.core.executor import RenderExecutor, RenderTask
+from prompt_manager.core.templates import TemplateEngine, TemplateRenderError, template_cache
 
 
 class TestTemplateEngine:
@@ -53,6 +57,43 @@ class TestTemplateEngine:
         variables = engine.extract_variables(content)
         assert "items" in variables
 
+    def test_extract_variables_ast(self, engine: TemplateEngine) -> None:
+        """Test extraction of nested expressions while skipping locals."""
+        content = (
+            "{{ user.name }} {{ items[0] + offset }}"
+            "{% set local = 1 %}{{ local }}"
+            "{% macro greet(who) %}{{ who }} {{ greeting }}{% endmacro %}"
+        )
+        variables = engine.extract_variables(content)
+        assert variables == ["greeting", "items", "offset", "user"]
+
+    def test_is_template_with_comment(self, engine: TemplateEngine) -> None:
+        """Test that comments count as template syntax."""
+        assert engine.is_template("Hello {# hidden #}")
+
+    def test_analyze(self, engine: TemplateEngine) -> None:
+        """Test deriving stored template metadata."""
+        info = engine.analyze("Hi {{ name }}")
+        assert info.is_template
+        assert info.variables == ["name"]
+        assert info.error is None
+        assert len(info.content_hash) == 64
+
+        plain = engine.analyze("Just text")
+        assert not plain.is_template
+        assert plain.variables == []
+
+        invalid = engine.analyze("Hi {{ name }")
+        assert not invalid.is_template
+        assert invalid.error is not None
+
+    @pytest.mark.parametrize(
+        "content", ["## Heading {#custom-id}", "x = {%s}", "{{ unclosed", "{% if %}"]
+    )
+    def test_stray_delimiters_are_plain_text(self, engine: TemplateEngine, content: str) -> None:
+        """Test that content with template syntax errors is not flagged as a template."""
+        assert not engine.is_template(content)
+
     def test_render_simple(self, engine: TemplateEngine) -> None:
         """Test simple template rendering."""
         content = "Hello {{ name }}!"
@@ -65,6 +106,23 @@ class TestTemplateEngine:
         result = engine.render(content, {"name": "Alice", "place": "Wonderland"})
         assert result == "Hello Alice, welcome to Wonderland!"
 
+    def test_compiled_template_is_cached(self, engine: TemplateEngine) -> None:
+        """Test that templates are compiled once and shared across engines."""
+        content = "Cached {{ value }} template"
+        template = engine.compile(content)
+        hits = template_cache.hits
+
+        assert TemplateEngine().compile(content) is template
+        assert template_cache.hits == hits + 1
+        assert TemplateEngine().render(content, {"value": 1}) == "Cached 1 template"
+
+    def test_render_output_limit(self, engine: TemplateEngine) -> None:
+        """Test that runaway output is stopped at the size budget."""
+        content = "{% for i in range(10**5) %}x{% endfor %}"
+        with pytest.raises(TemplateRenderError, match="exceeds 100 characters"):
+            engine.render(content, {}, max_output=100)
+        assert engine.render("{{ 'x' * 50 }}", {}, max_output=100) == "x" * 50
+
     def test_render_missing_variable(self, engine: TemplateEngine) -> None:
         """Test that missing variables raise an error."""
         content = "Hello {{ name }}!"
@@ -90,3 +148,66 @@ class TestTemplateEngine:
         valid, error = engine.validate_template(content)
         assert not valid
         assert error is not None
+
+
+class TestRenderExecutor:
+    """Tests for RenderExecutor."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("kind", ["thread", "inline"])
+    async def test_render_many(self, kind: Literal["thread", "inline"]) -> None:
+        """Test rendering batches in order with per-task errors."""
+        executor = RenderExecutor(kind=kind, workers=2, max_output=100)
+        tasks: list[RenderTask] = [("Hi {{ name }}", None, {"name": str(i)}) for i in range(5)]
+        tasks.append(("Hi {{ name }}", None, {}))
+        tasks.append(("{% for i in range(1000) %}x{% endfor %}", None, {}))
+        tasks.append(("{{ x + 1 }}", None, {"x": "a"}))
+        try:
+            results = await executor.render_many(tasks)
+            assert await executor.render("{{ a }}", {"a": 1}) == "1"
+        finally:
+            executor.shutdown()
+
+        assert results[:5] == [f"Hi {i}" for i in range(5)]
+        assert isinstance(results[5], TemplateRenderError)
+        assert isinstance(results[6], TemplateRenderError)
+        assert isinstance(results[7], TemplateRenderError)
+        assert "TypeError" in str(results[7])
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("kind", ["thread", "inline"])
+    async def test_runaway_render_fails_alone(self, kind: Literal["thread", "inline"]) -> None:
+        """Test that a template looping without output times out without failing the batch."""
+        executor = RenderExecutor(kind=kind, workers=1, timeout=0.2)
+        runaway = "{% for i in range(100000) %}{% for j in range(100000) %}{% endfor %}{% endfor %}"
+        tasks: list[RenderTask] = [(runaway, None, {}), ("Hi {{ name }}", None, {"name": "x"})]
+        try:
+            results = await executor.render_many(tasks)
+        finally:
+            executor.shutdown()
+
+        assert isinstance(results[0], TemplateRenderError)
+        assert "longer than 0.2 seconds" in str(results[0])
+        assert results[1] == "Hi x"
+
+    @pytest.mark.asyncio
+    async def test_timed_out_render_frees_worker(self) -> None:
+        """Test that a timed-out render stops, so the only worker can serve the next one."""
+        executor = RenderExecutor(kind="thread", workers=1, timeout=0.2)
+        runaway = "{% macro f(n) %}{% if n %}{{ f(n - 1) }}{{ f(n - 1) }}{% endif %}{% endmacro %}"
+        try:
+            with pytest.raises(TemplateRenderError, match="longer than"):
+                await executor.render(runaway + "{{ f(40) }}", {})
+            assert await asyncio.wait_for(executor.render("{{ a }}", {"a": 1}), 0.5) == "1"
+        finally:
+            executor.shutdown()
+
+    def test_oversized_values_rejected(self) -> None:
+        """Test that repetition and powers cannot build huge values in one expression."""
+        engine = TemplateEngine()
+        with pytest.raises(TemplateRenderError, match="exceeds 100 characters"):
+            engine.render("{{ 'x' * 10**10 }}", {}, max_output=100)
+        with pytest.raises(TemplateRenderError, match="bits"):
+            engine.render("{{ 10**100000000 }}", {})
+        with pytest.raises(TemplateRenderError, match="not allowed"):
+            engine.render("{% for i in range(10**9) %}{% endfor %}", {})
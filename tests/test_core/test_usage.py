@@ -0,0 +1,74 @@
+"""Tests for buffered usage counting."""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from prompt_manager.core.repository import PromptRepository
+from prompt_manager.core.schemas import PromptCreate
+from prompt_manager.core.service import PromptService
+from prompt_manager.core.usage import UsageAggregator, usage_aggregator
+
+
+class TestUsageAggregator:
+    """Tests for UsageAggregator."""
+
+    @pytest.mark.asyncio
+    async def test_flush_batches_counts(self, test_engine, test_session: AsyncSession) -> None:
+        """Test that buffered uses are written together on flush."""
+        repo = PromptRepository(test_session)
+        first = await repo.create(PromptCreate(slug="first", title="First", content="One"))
+        second = await repo.create(PromptCreate(slug="second", title="Second", content="Two"))
+
+        aggregator = UsageAggregator(interval=60, max_events=1000)
+        aggregator.start(async_sessionmaker(test_engine, expire_on_commit=False))
+        for _ in range(3):
+            aggregator.record(first.id)
+        aggregator.record(second.id, count=2)
+        await aggregator.stop()
+
+        test_session.expire_all()
+        assert (await repo.get_by_slug("first")).usage_count == 3
+        assert (await repo.get_by_slug("second")).usage_count == 2
+        assert (await repo.get_by_slug("first")).last_used_at is not None
+
+    @pytest.mark.asyncio
+    async def test_reads_buffer_usage(self, test_engine, test_session: AsyncSession) -> None:
+        """Test that reads record usage without writing while the aggregator runs."""
+        service = PromptService(test_session)
+        await service.create_prompt(PromptCreate(slug="read", title="Read", content="Hi"))
+
+        usage_aggregator.start(async_sessionmaker(test_engine, expire_on_commit=False))
+        try:
+            await service.get_prompt("read")
+            prompt = await service.get_prompt("read")
+            assert prompt is not None
+            assert prompt.usage_count == 2
+            assert not test_session.dirty
+        finally:
+            await usage_aggregator.stop()
+
+        test_session.expire_all()
+        prompt = await service.get_prompt("read", increment_usage=False)
+        assert prompt is not None
+        assert prompt.usage_count == 2
+
+    @pytest.mark.asyncio
+    async def test_flush_refreshes_cached_prompts(
+        self, test_engine, test_session: AsyncSession
+    ) -> None:
+        """Test that a cached prompt does not lose usage once it is flushed."""
+        service = PromptService(test_session)
+        await service.create_prompt(PromptCreate(slug="hot", title="Hot", content="Hi"))
+
+        usage_aggregator.start(async_sessionmaker(test_engine, expire_on_commit=False))
+        try:
+            for _ in range(3):
+                await service.get_prompt_read("hot")
+            await usage_aggregator.flush()
+
+            test_session.expire_all()
+            read = await service.get_prompt_read("hot", increment_usage=False)
+            assert read is not None
+            assert read.usage_count == 3
+        finally:
+            await usage_aggregator.stop()
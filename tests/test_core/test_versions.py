@@ -0,0 +1,59 @@
+"""Tests for delta-encoded version history."""
+
+from typing import NamedTuple
+
+import pytest
+
+from prompt_manager.core import versions
+from prompt_manager.core.config import settings
+
+
+class Row(NamedTuple):
+    """A stored version row."""
+
+    version: int
+    content: str | None
+    delta: str | None
+
+
+class TestVersionDeltas:
+    """Tests for version diffs and snapshots."""
+
+    @pytest.mark.parametrize(
+        ("old", "new"),
+        [
+            ("a\nb\nc\n", "a\nB\nc\n"),
+            ("a\nb\nc\n", "c\nb\na"),
+            ("", "new\n"),
+            ("gone\n", ""),
+            ("no newline", "no newline\nadded"),
+            ("x\n" * 50, "x\n" * 20 + "y\n" + "x\n" * 29),
+        ],
+    )
+    def test_patch_round_trip(self, old: str, new: str) -> None:
+        """Test that applying a diff reproduces the new text."""
+        assert versions.patch(old, versions.diff(old, new)) == new
+
+    def test_encode_history(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test snapshot placement and reconstruction of every version."""
+        monkeypatch.setattr(settings, "version_snapshot_interval", 4)
+        lines = [f"line {i}\n" for i in range(40)]
+        history = []
+        for version in range(1, 11):
+            lines[version] = f"edit {version}\n"
+            history.append((version, "".join(lines)))
+        history.append((11, "rewritten"))
+
+        encoded = versions.encode_history(history)
+        snapshots = [v for (v, _), (content, _) in zip(history, encoded) if content is not None]
+        assert snapshots == [1, 5, 9, 11]
+
+        rows = [
+            Row(version, content, delta)
+            for (version, _), (content, delta) in zip(history, encoded)
+        ]
+        assert versions.materialize("p", rows) == [text for _, text in history]
+        assert versions.reconstruct("p", rows[4:8]) == history[7][1]
+        assert versions.version_cache.get(("p", 8)) == history[7][1]
+        versions.version_cache.clear()
+
@@ -0,0 +1,63 @@
+"""Tests for the group-commit write queue."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from prompt_manager.core import database
+from prompt_manager.core.config import settings
+from prompt_manager.core.models import Base, LibraryRevision, Prompt
+from prompt_manager.core.repository import PromptRepository
+from prompt_manager.core.schemas import PromptCreate
+from prompt_manager.core.writer import WriteQueue
+
+
+class TestWriteQueue:
+    """Tests for WriteQueue."""
+
+    @pytest.mark.asyncio
+    async def test_group_commit(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that concurrent writes share one commit and fail independently."""
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/pm.db")
+        engine, read_engine = database.create_engines()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def failing(repo: PromptRepository) -> None:
+            await repo.create(PromptCreate(slug="rolled-back", title="R", content="r"))
+            raise ValueError("boom")
+
+        queue = WriteQueue(window=0.05)
+        queue.start(session_maker)
+        try:
+            results = await asyncio.gather(
+                *(
+                    queue.submit(
+                        lambda repo, i=i: repo.create(
+                            PromptCreate(slug=f"p-{i}", title="P", content=f"content {i}")
+                        )
+                    )
+                    for i in range(10)
+                ),
+                queue.submit(failing),
+                return_exceptions=True,
+            )
+        finally:
+            await queue.stop()
+
+        assert [prompt.slug for prompt in results[:10]] == [f"p-{i}" for i in range(10)]
+        assert results[0].content == "content 0"
+        assert isinstance(results[10], ValueError)
+
+        async with session_maker() as session:
+            slugs = set((await session.execute(select(Prompt.slug))).scalars())
+            assert slugs == {f"p-{i}" for i in range(10)}
+            assert await session.scalar(select(func.count()).select_from(LibraryRevision)) == 1
+            assert await session.scalar(select(LibraryRevision.revision)) == 1
+
+        await engine.dispose()
+        await read_engine.dispose()